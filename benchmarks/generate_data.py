@@ -0,0 +1,161 @@
+import argparse
+import random
+from datetime import date, timedelta
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+REGIONS = ['North', 'South', 'East', 'West']
+BASE_PRODUCTS = [
+    ('Laptop', 'Premium', 45000), ('Mouse', 'Wireless', 500), ('Keyboard', 'Mechanical', 1800),
+    ('Monitor', 'LED', 12000), ('Webcam', 'HD', 2500), ('Headphones', 'Noise Cancelling', 3000),
+    ('USB Cable', 'Braided', 200), ('External Hard Drive', '1TB', 5000), ('Wireless Mouse', 'Gaming', 900),
+    ('Laptop Charger', '65W', 1900)
+]
+# Names that only survive a correct non-UTF-8 round trip
+ACCENTED_NAMES = ['Câble USB', 'Écran', 'Clé USB', 'Haut-parleur Señal', 'Caméra']
+BATCH_ROWS = 10000 # Lines generated per write call
+INVALID_KINDS = ['missing_field', 'bad_transaction_id', 'zero_quantity', 'zero_price', 'empty_customer',
+                 'empty_region', 'non_numeric', 'bad_product_id']
+
+
+def product_catalog(products=200):
+    """
+    Returns: list of (ProductID, ProductName, base UnitPrice) for P101, P102, ...
+    The names cycle through BASE_PRODUCTS so IDs past P110 look like the sample data.
+    """
+    catalog = []
+    for i in range(products):
+        name, _, price = BASE_PRODUCTS[i % len(BASE_PRODUCTS)]
+        if i >= len(BASE_PRODUCTS):
+            name = f"{name} {i // len(BASE_PRODUCTS) + 1}"
+        catalog.append((f"P{101 + i}", name, price))
+    return catalog
+
+
+def _cum_weights(count, skew):
+    """
+    Zipf-style cumulative weights: item k has weight 1 / (k + 1) ** skew.
+    skew=0 is uniform; around 1 a few items dominate, as in real sales.
+    """
+    total = 0.0
+    weights = []
+    for k in range(count):
+        total += 1.0 / (k + 1) ** skew
+        weights.append(total)
+    return weights
+
+
+def _format_number(value, rng, comma_ratio):
+    # Requirement: the sample file writes some numbers with thousands separators
+    if value >= 1000 and rng.random() < comma_ratio:
+        return f"{value:,}"
+    return str(value)
+
+
+def _invalid_fields(fields, rng):
+    kind = rng.choice(INVALID_KINDS)
+    if kind == 'missing_field':
+        return fields[:rng.randint(1, 7)]
+    if kind == 'bad_transaction_id':
+        fields[0] = 'X' + fields[0][1:]
+    elif kind == 'zero_quantity':
+        fields[4] = rng.choice(['0', '-1'])
+    elif kind == 'zero_price':
+        fields[5] = '0'
+    elif kind == 'empty_customer':
+        fields[6] = ''
+    elif kind == 'empty_region':
+        fields[7] = ''
+    elif kind == 'non_numeric':
+        fields[rng.choice([4, 5])] = 'abc'
+    else:
+        # Passes clean_data but is rejected by validate_and_filter
+        fields[2] = 'Q' + fields[2][1:]
+    return fields
+
+
+def generate_sales_file(path, rows, seed=42, invalid_ratio=0.05, comma_ratio=0.1, encoding='utf-8',
+                        accented_ratio=0.0, products=200, customers=None, days=365, skew=0.0,
+                        regions=REGIONS, start_date=date(2024, 1, 1)):
+    """
+    Writes a reproducible pipe-delimited file in the data/sales_data.txt format.
+    The same arguments always produce the same bytes; lines are written in
+    batches, so 10^8 rows need no more memory than 10^4.
+    invalid_ratio: share of rows broken in one of the INVALID_KINDS ways
+    comma_ratio: share of numbers >= 1000 (and of product names) containing commas
+    encoding / accented_ratio: output encoding and share of non-ASCII product names
+    skew: Zipf exponent for product, customer and region popularity (0 = uniform)
+    Returns: dict with the number of rows written and how many were made invalid
+    """
+    rng = random.Random(seed)
+    catalog = product_catalog(products)
+    customers = customers or max(50, rows // 20)
+    id_width = max(3, len(str(rows)))
+    customer_width = max(3, len(str(customers)))
+    dates = [(start_date + timedelta(days=d)).isoformat() for d in range(days)]
+
+    product_weights = _cum_weights(len(catalog), skew)
+    customer_weights = _cum_weights(customers, skew)
+    region_weights = _cum_weights(len(regions), skew)
+
+    invalid = 0
+    with open(path, 'w', encoding=encoding, newline='\n') as f:
+        f.write(HEADER)
+        for batch_start in range(0, rows, BATCH_ROWS):
+            count = min(BATCH_ROWS, rows - batch_start)
+            batch_products = rng.choices(catalog, cum_weights=product_weights, k=count)
+            batch_customers = rng.choices(range(1, customers + 1), cum_weights=customer_weights, k=count)
+            batch_regions = rng.choices(regions, cum_weights=region_weights, k=count)
+
+            lines = []
+            for i in range(count):
+                pid, name, base_price = batch_products[i]
+                if accented_ratio and rng.random() < accented_ratio:
+                    name = rng.choice(ACCENTED_NAMES)
+                elif rng.random() < comma_ratio:
+                    name = f"{name},{BASE_PRODUCTS[(int(pid[1:]) - 101) % len(BASE_PRODUCTS)][1]}"
+                price = max(1, int(base_price * rng.uniform(0.8, 1.2)))
+
+                fields = [
+                    f"T{batch_start + i + 1:0{id_width}d}",
+                    rng.choice(dates),
+                    pid,
+                    name,
+                    _format_number(rng.randint(1, 10), rng, comma_ratio),
+                    _format_number(price, rng, comma_ratio),
+                    f"C{batch_customers[i]:0{customer_width}d}",
+                    batch_regions[i]
+                ]
+                if rng.random() < invalid_ratio:
+                    fields = _invalid_fields(fields, rng)
+                    invalid += 1
+                lines.append("|".join(fields))
+            f.write("\n".join(lines) + "\n")
+
+    return {'rows': rows, 'invalid': invalid}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic sales data for benchmarks")
+    parser.add_argument('output', help="file to write")
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--invalid-ratio', type=float, default=0.05)
+    parser.add_argument('--comma-ratio', type=float, default=0.1)
+    parser.add_argument('--encoding', default='utf-8', choices=['utf-8', 'latin-1', 'cp1252'])
+    parser.add_argument('--accented-ratio', type=float, default=0.0,
+                        help="share of product names with non-ASCII characters")
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--customers', type=int, help="default: rows / 20 (at least 50)")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--skew', type=float, default=0.0, help="Zipf exponent (0 = uniform)")
+    args = parser.parse_args(argv)
+
+    stats = generate_sales_file(args.output, args.rows, seed=args.seed, invalid_ratio=args.invalid_ratio,
+                                comma_ratio=args.comma_ratio, encoding=args.encoding,
+                                accented_ratio=args.accented_ratio, products=args.products,
+                                customers=args.customers, days=args.days, skew=args.skew)
+    print(f"Wrote {stats['rows']} rows ({stats['invalid']} invalid) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
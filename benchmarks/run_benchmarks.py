@@ -0,0 +1,297 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+
+from benchmarks.generate_data import generate_sales_file, product_catalog
+from utils.file_handler import read_sales_data
+from utils.mmap_parser import parse_sales_file, parse_and_filter
+from utils.data_processor import (clean_data, validate_and_filter, calculate_metrics, region_wise_sales,
+                                  top_selling_products, customer_analysis, top_customers, daily_sales_trend,
+                                  find_peak_sales_day, low_performing_products, generate_report,
+                                  generate_sales_report, sales_by_period, rolling_sales_metrics,
+                                  cohort_retention, repeat_purchase_distribution, product_associations,
+                                  REPORT_SECTIONS, REPORT_DEPENDENCIES)
+from utils.sales_aggregate import aggregate_sales
+from utils.transaction_index import TransactionIndex
+from utils.customer_analytics import analyze_customers
+from utils.api_handler import enrich_sales_data, save_enriched_data
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_DATA_DIR = os.path.join(BENCH_DIR, 'data')
+DEFAULT_TOLERANCE = 2.0 # A timing more than 2x its baseline counts as a regression
+MIN_TIMING = 0.02 # Timings below this (seconds) are too noisy to compare
+MANY_CUSTOMERS_ROWS = 200000 # Extra case with rows / 2 customers (report-cache fingerprints scale with them)
+
+
+def dataset_path(data_dir, rows, seed, invalid_ratio, skew, encoding, customers=None):
+    """
+    Generates the dataset once per parameter set and reuses it afterwards.
+    customers: distinct customers (default: the generator's rows / 20)
+    """
+    suffix = f"_c{customers}" if customers else ""
+    name = f"sales_{rows}_s{seed}_inv{invalid_ratio}_skew{skew}_{encoding}{suffix}.txt"
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Generating {path}...")
+        # Write under a temporary name so an interrupted run leaves no partial dataset
+        generate_sales_file(path + '.tmp', rows, seed=seed, invalid_ratio=invalid_ratio, skew=skew,
+                            encoding=encoding, accented_ratio=0.01 if encoding != 'utf-8' else 0.0,
+                            customers=customers)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def synthetic_product_mapping(products=200, coverage=0.8):
+    """
+    Offline stand-in for the DummyJSON mapping: the first `coverage` share of
+    the catalog is known, so enrichment sees both matches and misses.
+    """
+    mapping = {}
+    for pid, name, _ in product_catalog(products)[:int(products * coverage)]:
+        mapping[int(pid[1:])] = {'title': name, 'category': 'electronics', 'brand': 'Generic', 'rating': 4.5}
+    return mapping
+
+
+def fingerprint(value):
+    """
+    Order-preserving hash of a result; floats are rounded so that a change in
+    summation order does not register as a different answer.
+    """
+    def canonical(v):
+        if isinstance(v, float):
+            return round(v, 2)
+        if isinstance(v, dict):
+            return [[canonical(k), canonical(x)] for k, x in v.items()]
+        if isinstance(v, (list, tuple)):
+            return [canonical(x) for x in v]
+        if isinstance(v, (set, frozenset)):
+            return sorted(canonical(x) for x in v)
+        if hasattr(v, 'to_dict'):
+            return canonical(v.to_dict()) # SalesAggregate
+        if hasattr(v, '__iter__') and not isinstance(v, str):
+            return [canonical(x) for x in v] # TransactionTable and other row containers
+        return v
+    return hashlib.sha256(json.dumps(canonical(value)).encode('utf-8')).hexdigest()[:16]
+
+
+def file_fingerprint(path):
+    with open(path, encoding='utf-8') as f:
+        text = re.sub('Generated: .*', '', f.read()) # The report timestamp changes every run
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def run_case(path, repeat):
+    """
+    Times every pipeline function on one dataset (best of `repeat` runs).
+    Returns: tuple (timings dict name -> seconds, results dict name -> fingerprint,
+    report_cache_costs() of the sales report sections)
+    """
+    timings = {}
+    results = {}
+    out_dir = tempfile.mkdtemp(prefix='sales_bench_')
+
+    def measure(name, func, *args, result_of=None):
+        best = None
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(io.StringIO()): # The functions print progress
+                start = time.perf_counter()
+                value = func(*args)
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+        results[name] = fingerprint(value) if result_of is None else result_of()
+        return value
+
+    raw = measure('read_sales_data', read_sales_data, path)
+    table = measure('clean_data', clean_data, raw, True)
+    measure('parse_sales_file', parse_sales_file, path)
+    agg = measure('aggregate_sales', aggregate_sales, table)
+    measure('validate_and_filter', validate_and_filter, table, None, 1000)
+    measure('parse_and_filter', parse_and_filter, path, None, 1000)
+    index = measure('build_transaction_index', TransactionIndex, table, result_of=lambda: None)
+    measure('indexed_filter', index.query, 'North', 1000, 20000)
+    measure('calculate_metrics', calculate_metrics, agg)
+    measure('region_wise_sales', region_wise_sales, agg)
+    measure('top_selling_products', top_selling_products, agg, 5)
+    measure('customer_analysis', customer_analysis, agg)
+    measure('top_customers', top_customers, agg, 5)
+    measure('daily_sales_trend', daily_sales_trend, agg)
+    measure('find_peak_sales_day', find_peak_sales_day, agg)
+    measure('low_performing_products', low_performing_products, agg, 15)
+    measure('sales_by_period', sales_by_period, agg, 'week')
+    measure('rolling_sales_metrics', rolling_sales_metrics, agg)
+    customers = measure('analyze_customers', analyze_customers, table, result_of=lambda: None)
+    measure('cohort_retention', cohort_retention, customers)
+    measure('repeat_purchase_distribution', repeat_purchase_distribution, customers)
+    measure('product_associations', product_associations, customers)
+    enriched = measure('enrich_sales_data', enrich_sales_data, table, synthetic_product_mapping())
+
+    enriched_file = os.path.join(out_dir, 'enriched_sales_data.txt')
+    sales_report = os.path.join(out_dir, 'sales_report.txt')
+    summary_report = os.path.join(out_dir, 'summary_report.txt')
+    measure('save_enriched_data', save_enriched_data, enriched, enriched_file,
+            result_of=lambda: file_fingerprint(enriched_file))
+    measure('generate_sales_report', generate_sales_report, agg, enriched, sales_report,
+            result_of=lambda: file_fingerprint(sales_report))
+    # The first run fills the section cache, the best of the others is a cache hit
+    cached_report = os.path.join(out_dir, 'cached_sales_report.txt')
+    measure('generate_sales_report_cached',
+            lambda: generate_sales_report(agg, enriched, cached_report, cache=os.path.join(out_dir, 'sections.json')),
+            result_of=lambda: file_fingerprint(cached_report))
+    measure('generate_report', generate_report, agg, summary_report,
+            result_of=lambda: file_fingerprint(summary_report))
+
+    cache_costs = report_cache_costs(agg, enriched, repeat)
+
+    for name in os.listdir(out_dir):
+        os.remove(os.path.join(out_dir, name))
+    os.rmdir(out_dir)
+    return timings, results, cache_costs
+
+
+def compare(case, current, baseline, tolerance):
+    """
+    Returns: list of regression messages (wrong results or slower timings)
+    """
+    problems = []
+    for name, result in current['results'].items():
+        expected = baseline['results'].get(name)
+        if expected is not None and expected != result:
+            problems.append(f"{case} {name}: result changed ({expected} -> {result})")
+    for name, seconds in current['timings'].items():
+        expected = baseline['timings'].get(name)
+        if expected is not None and max(seconds, expected) >= MIN_TIMING and seconds > expected * tolerance:
+            problems.append(f"{case} {name}: {seconds:.4f}s vs baseline {expected:.4f}s "
+                            f"({seconds / expected:.2f}x)")
+    return problems
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report_cache_costs(agg, enriched, repeat):
+    """
+    Times, for every cacheable report section, fingerprinting its
+    dependencies against building the section from the aggregate.
+    Returns: dict section name -> [fingerprint seconds, build seconds]
+    """
+    inputs = {'aggregate': agg, 'enriched': enriched, 'associations': [], 'rates': None, 'currencies': None}
+    costs = {}
+    for section in REPORT_SECTIONS:
+        if section.volatile or not section.depends:
+            continue
+        fingerprint_seconds = best_time(lambda: [REPORT_DEPENDENCIES[name](inputs) for name in section.depends],
+                                        repeat)
+        costs[section.name] = [fingerprint_seconds, best_time(lambda: section.build(inputs), repeat)]
+    return costs
+
+
+def check_report_cache(case, cache_costs):
+    """
+    A cache hit has to be cheaper than the rebuild it skips: a section's
+    fingerprints may not take longer than building it.
+    Returns: list of problem messages
+    """
+    return [f"{case} report cache: fingerprinting {name} takes {fingerprint:.4f}s, building it {build:.4f}s"
+            for name, (fingerprint, build) in cache_costs.items()
+            if fingerprint >= MIN_TIMING and fingerprint > build]
+
+
+def print_case(case, rows, current, baseline):
+    print(f"\n--- {case} ---")
+    print(f"{'Function':<30}{'seconds':>10}{'rows/s':>14}{'baseline':>10}{'ratio':>8}  result")
+    for name, seconds in current['timings'].items():
+        expected = (baseline or {}).get('timings', {}).get(name)
+        ratio = f"{seconds / expected:.2f}" if expected else "-"
+        base = f"{expected:.4f}" if expected is not None else "-"
+        rate = f"{rows / seconds:,.0f}" if seconds >= MIN_TIMING else "-" # Views over the aggregate are O(groups)
+        result = "-"
+        if baseline and name in baseline.get('results', {}):
+            result = "ok" if baseline['results'][name] == current['results'][name] else "CHANGED"
+        print(f"{name:<30}{seconds:>10.4f}{rate:>14}{base:>10}{ratio:>8}  {result}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sales pipeline on synthetic data")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000],
+                        help="dataset sizes (default: 10000 100000; up to 10^8 fits the generator)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--invalid-ratio', type=float, default=0.05)
+    parser.add_argument('--skew', type=float, default=1.0, help="Zipf exponent for popularity (0 = uniform)")
+    parser.add_argument('--encoding', default='utf-8', choices=['utf-8', 'latin-1', 'cp1252'])
+    parser.add_argument('--many-customers', type=int, default=MANY_CUSTOMERS_ROWS, metavar='ROWS',
+                        help=f"also run a case of ROWS rows with ROWS / 2 customers "
+                             f"(default: {MANY_CUSTOMERS_ROWS}; 0 skips it)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per function; the best is kept")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store this run as the new baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    cases = baseline.get('cases', {}) if args.update_baseline else {}
+    problems = []
+    runs = [(rows, None) for rows in args.rows]
+    if args.many_customers:
+        runs.append((args.many_customers, args.many_customers // 2))
+    for rows, customers in runs:
+        case = f"rows={rows},seed={args.seed},invalid={args.invalid_ratio},skew={args.skew},encoding={args.encoding}"
+        if customers:
+            case += f",customers={customers}"
+        path = dataset_path(args.data_dir, rows, args.seed, args.invalid_ratio, args.skew, args.encoding,
+                            customers)
+        timings, results, cache_costs = run_case(path, args.repeat)
+        current = {'timings': {k: round(v, 6) for k, v in timings.items()}, 'results': results}
+
+        previous = baseline.get('cases', {}).get(case)
+        print_case(case, rows, current, previous)
+        if args.update_baseline:
+            cases[case] = current
+            continue
+        problems.extend(check_report_cache(case, cache_costs))
+        if previous:
+            problems.extend(compare(case, current, previous, args.tolerance))
+        else:
+            print(f"(no baseline for {case}; run with --update-baseline to record one)")
+
+    if args.update_baseline:
+        baseline = {'python': platform.python_version(), 'machine': platform.machine(), 'cases': cases}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if problems:
+        print("\nRegressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
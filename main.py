@@ -1,100 +1,233 @@
-from utils.file_handler import read_sales_data
-from utils.data_processor import (clean_data, calculate_total_revenue, calculate_metrics, region_wise_sales, 
- top_selling_products, customer_analysis, daily_sales_trend, find_peak_sales_day, low_performing_products, generate_report, validate_and_filter, generate_sales_report)
-from utils.api_handler import fetch_all_products, get_currency_rate, create_product_mapping, enrich_sales_data, save_enriched_data
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.data_processor import generate_report, generate_sales_report, calculate_metrics
+from utils.sales_aggregate import merge_aggregates
+from utils.api_handler import fetch_rate_table
+from utils.currency import print_converted_totals
+from utils.checkpoint import incremental_aggregate, DEFAULT_CHECKPOINT
+from utils.pipeline import STAGES, run_pipeline, run_pipeline_quietly, output_paths, output_name, common_root
+
+DEFAULT_INPUT = "data/sales_data.txt"
+DEFAULT_MIN_AMOUNT = 1000
+DEFAULT_OUTPUT_DIR = "output"
+DEFAULT_ENRICHED_FILE = "data/enriched_sales_data.txt"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sales analytics pipeline")
+    parser.add_argument('inputs', nargs='*', default=[DEFAULT_INPUT],
+                        help=f"input files or glob patterns (default: {DEFAULT_INPUT})")
+    parser.add_argument('--region', help="only keep transactions from this region")
+    parser.add_argument('--min-amount', type=float,
+                        help=f"minimum transaction amount for the summary report (default: {DEFAULT_MIN_AMOUNT})")
+    parser.add_argument('--max-amount', type=float, help="maximum transaction amount for the summary report")
+    parser.add_argument('--output-dir',
+                        help=f"directory for reports and the enriched data (default: reports in "
+                             f"{DEFAULT_OUTPUT_DIR}/, enriched data in {DEFAULT_ENRICHED_FILE})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes: files run in parallel, or a single file is parsed in chunks")
+    parser.add_argument('--interactive', action='store_true',
+                        help="prompt for filters (default when run from a terminal without filter options)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always re-parse inputs and rebuild every report section instead of using "
+                             "the columnar and report caches")
+    parser.add_argument('--enriched-format', choices=['text', 'columnar'], default='text',
+                        help="format of the enriched data file (default: text)")
+    parser.add_argument('--compress', choices=['gzip', 'zstd'],
+                        help="compress the text enriched data file (zstd needs the zstandard package)")
+    parser.add_argument('--time-windows', action='store_true',
+                        help="add weekly/monthly rollups and rolling 7/30-day metrics to the sales report")
+    parser.add_argument('--associations', action='store_true',
+                        help="add products frequently bought together (support/confidence/lift) to the sales report")
+    parser.add_argument('--currencies', type=lambda v: [c.strip().upper() for c in v.split(',') if c.strip()],
+                        help="comma-separated currency codes the reports also show totals in, e.g. EUR,GBP,JPY "
+                             "(one exchange-rate request covers all of them)")
+    parser.add_argument('--report-format', action='append', choices=['json', 'csv'], default=[],
+                        help="also write the reports as JSON (<report>.json) or CSV (<report>_<section>.csv); "
+                             "repeat for both")
+    parser.add_argument('--metrics-file', help="write per-stage timing/memory/row/HTTP metrics as JSON")
+    parser.add_argument('--profile-dir', help="write a cProfile dump per pipeline stage to this directory")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="measure peak Python memory per stage with tracemalloc (slower)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only process rows appended since the last incremental run")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                        help=f"checkpoint file for --incremental (default: {DEFAULT_CHECKPOINT})")
+    args = parser.parse_args(argv)
+
+    # Expand globs ourselves so patterns also work when the shell does not
+    files = []
+    for pattern in args.inputs:
+        matches = sorted(glob.glob(pattern))
+        files.extend(matches if matches else [pattern])
+    args.inputs = list(dict.fromkeys(files)) # De-duplicate, keep order
+    args.report_formats = ('text',) + tuple(dict.fromkeys(args.report_format))
+    if args.output_dir is None:
+        args.output_dir = DEFAULT_OUTPUT_DIR
+        args.enriched_file = DEFAULT_ENRICHED_FILE
+    else:
+        args.enriched_file = os.path.join(args.output_dir, 'enriched_sales_data.txt')
+
+    filters_given = args.region is not None or args.min_amount is not None or args.max_amount is not None
+    if args.min_amount is None:
+        args.min_amount = DEFAULT_MIN_AMOUNT
+    args.interactive = args.interactive or (not filters_given and len(args.inputs) == 1 and sys.stdin.isatty())
+    return args
+
+def prompt_filters(available_regions, min_amount, max_amount):
+    """
+    Interactive filter selection (the original Part 5 user flow).
+    Returns: tuple (region, min_amount, max_amount)
+    """
+    do_filter = input("\nDo you want to filter data? (y/n): ").lower().strip()
+    if do_filter == 'y':
+        target_region = input("Enter Region to filter: ").strip()
+        min_amt = float(input("Enter minimum amount (default 1000): ") or 1000)
+        return target_region, min_amt, max_amount
+    return None, min_amount, max_amount
+
+def run_incremental(input_file, checkpoint_file, report_file, sales_report_file, currencies=None,
+                    report_formats=('text',), use_cache=True, region=None, min_amount=DEFAULT_MIN_AMOUNT,
+                    max_amount=None):
+    """
+    Refreshes the summary reports from the checkpointed aggregates plus the
+    newly appended rows; API enrichment is skipped in this mode. The summary
+    report uses the region/amount filters, as in a full run.
+    """
+    print("\n[1/2] Updating aggregates with appended rows...")
+    sales_agg, filtered_agg, new_rows = incremental_aggregate(input_file, checkpoint_file, region, min_amount,
+                                                              max_amount)
+    print(f"✓ {new_rows} new rows, {sales_agg.transaction_count} valid transactions in total "
+          f"({filtered_agg.transaction_count} after filtering)")
+
+    print("\n[2/2] Generating reports...")
+    rates = fetch_rate_table("USD") if currencies else None
+    generate_sales_report(sales_agg, None, sales_report_file, rates=rates, currencies=currencies,
+                          formats=report_formats, cache=use_cache)
+    generate_report(filtered_agg, report_file, rates, currencies, formats=report_formats, cache=use_cache)
+
+def run_batch(args):
+    """
+    Runs the full pipeline for every input file across a process pool,
+    then writes a combined roll-up report from the merged aggregates.
+    Returns: list of per-file results
+    """
+    options = {'region': args.region, 'min_amount': args.min_amount, 'max_amount': args.max_amount,
+               'trace_memory': args.trace_memory, 'use_cache': not args.no_cache,
+               'enriched_format': args.enriched_format, 'compression': args.compress,
+               'time_windows': args.time_windows, 'associations': args.associations,
+               'currencies': args.currencies, 'report_formats': args.report_formats}
+    tasks = []
+    root = common_root(args.inputs) # Same-named files from different directories get separate outputs
+    for f in args.inputs:
+        file_options = dict(options, **output_paths(f, args.output_dir, root))
+        if args.profile_dir:
+            file_options['profile_dir'] = os.path.join(args.profile_dir, output_name(f, root))
+        tasks.append((f, file_options))
+
+    print(f"\nProcessing {len(tasks)} files with {args.workers} workers...")
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for result in executor.map(run_pipeline_quietly, tasks):
+            if result['error']:
+                # The captured console output shows how far the file got
+                print(f"✗ {result['input_file']}: failed: {result['error']}")
+                print(result['log'].rstrip())
+            else:
+                print(f"✓ {result['input_file']}: {result['row_count']} records")
+            results.append(result)
+
+    succeeded = [r for r in results if not r['error']]
+    if not succeeded:
+        raise ValueError("No input file was processed successfully")
+
+    # Combined roll-up over every successfully processed file
+    print("\nGenerating combined roll-up report...")
+    combined = merge_aggregates(r['aggregate'] for r in succeeded)
+    combined_filtered = merge_aggregates(r['filtered_aggregate'] for r in succeeded)
+    rates = fetch_rate_table("USD") # One request (or cache hit) for every currency below
+    generate_sales_report(combined, None, os.path.join(args.output_dir, 'combined_sales_report.txt'),
+                          time_windows=args.time_windows, rates=rates, currencies=args.currencies,
+                          formats=args.report_formats, cache=not args.no_cache)
+    generate_report(combined_filtered, os.path.join(args.output_dir, 'combined_summary_report.txt'),
+                    rates, args.currencies, formats=args.report_formats, cache=not args.no_cache)
+
+    rev_usd, qty = calculate_metrics(combined_filtered)
+    print("\n--- Combined Global Summary ---")
+    print(f"Total Revenue (USD): ${rev_usd:,.2f}")
+    print_converted_totals(rev_usd, rates, args.currencies or ['EUR'])
+    return results
+
+def print_stage_timings(results):
+    """
+    Prints one row of per-stage wall times (seconds) per input file.
+    """
+    print("\n--- Stage Timings (seconds) ---")
+    root = common_root([r['input_file'] for r in results])
+    labels = [output_name(r['input_file'], root) for r in results] # Same names as the output directories
+    width = max(len(label) for label in labels) + 2
+    print(f"{'File':<{width}}" + "".join(f"{s:>11}" for s in STAGES) + f"{'total':>11}")
+    for label, r in zip(labels, results):
+        row = "".join(f"{r['timings'].get(s, 0.0):>11.3f}" for s in STAGES)
+        print(f"{label:<{width}}{row}{sum(r['timings'].values()):>11.3f}")
+
+def write_metrics(results, path):
+    """
+    Saves the per-file instrumentation metrics as one JSON document.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    metrics = {'files': {r['input_file']: r.get('metrics') for r in results}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2)
+    print(f"Metrics written to: {path}")
+
+def main(argv=None):
+    args = parse_args(argv)
 
-def main():
     print("=" * 40)
     print("        SALES ANALYTICS SYSTEM")
     print("=" * 40)
 
     try:
-        # 1. Setup Paths
-        input_file = "data/sales_data.txt"
-        report_file = "output/summary_report.txt"
-        
-        # [1/10] Reading Data
-        print("\n[1/10] Reading sales data...")
-        raw_data = read_sales_data(input_file)
-        print(f"✓ Successfully read {len(raw_data)} transactions")
-
-        # [2/10] Cleaning Data
-        print("\n[2/10] Parsing and cleaning data...")
-        cleaned_data = clean_data(raw_data)
-        total_rev = calculate_total_revenue(cleaned_data)
-        print(f"✓ Parsed {len(cleaned_data)} records")
-        print(f"Task 2.1 - Total Revenue: {total_rev}")
-
-        # [3/10] Display Filter Options (User Interaction Requirement)
-        print("\n[3/10] Filter Options Available:")
-        available_regions = sorted(list(set(t['Region'] for t in cleaned_data)))
-        amounts = [t['Quantity'] * t['UnitPrice'] for t in cleaned_data]
-        print(f"Regions: {', '.join(available_regions)}")
-        print(f"Amount Range: ${min(amounts):,.2f} - ${max(amounts):,.2f}")
-
-        do_filter = input("\nDo you want to filter data? (y/n): ").lower().strip()
-        
-        # [4/10] Validation and Filtering
-        print("\n[4/10] Validating transactions...")
-        if do_filter == 'y':
-            target_region = input(f"Enter Region to filter: ").strip()
-            min_amt = float(input("Enter minimum amount (default 1000): ") or 1000)
-            filtered_data, inv_count, summary = validate_and_filter(cleaned_data, region=target_region, min_amount=min_amt)
+        os.makedirs(args.output_dir, exist_ok=True)
+        report_file = os.path.join(args.output_dir, "summary_report.txt")
+
+        if args.incremental:
+            if len(args.inputs) > 1:
+                raise ValueError("--incremental works on a single input file (one checkpoint per file)")
+            run_incremental(args.inputs[0], args.checkpoint, report_file,
+                            os.path.join(args.output_dir, "sales_report.txt"), args.currencies,
+                            args.report_formats, not args.no_cache, args.region, args.min_amount,
+                            args.max_amount)
+            print("\n" + "=" * 40)
+            print("✓ Incremental refresh complete!")
+            print("=" * 40)
+            return
+
+        if len(args.inputs) > 1:
+            results = run_batch(args)
         else:
-            # Matches your existing logic
-            filtered_data, inv_count, summary = validate_and_filter(cleaned_data, min_amount=1000)
-        print(f"✓ Valid: {len(filtered_data)} | Invalid: {inv_count}")
-
-        # [5/10] Data Analyses (Running your Part 2 functions)
-        print("\n[5/10] Analyzing sales data...")
-        # (Your existing analysis calls)
-        regions = region_wise_sales(cleaned_data)
-        top_prods = top_selling_products(cleaned_data, n=3)
-        customers = customer_analysis(cleaned_data)
-        trend = daily_sales_trend(cleaned_data)
-        peak = find_peak_sales_day(cleaned_data)
-        low_prods = low_performing_products(cleaned_data, threshold=15)
-        print("✓ Analysis complete")
-
-        # [6/10] API Fetch
-        print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        if api_products:
-            print(f"✓ Fetched {len(api_products)} products")
-            print(f"Sample Product from API: {api_products[0]}")
-        
-        # [7/10] Enrichment
-        print("\n[7/10] Enriching sales data...")
-        product_map = create_product_mapping(api_products)
-        if product_map:
-            print(f"Mapping Check (ID 1): {product_map.get(1)}")
-        
-        enriched_data = enrich_sales_data(cleaned_data, product_map)
-        if enriched_data:
-            match_count = sum(1 for t in enriched_data if t.get('API_Match'))
-            print(f"✓ Enriched {match_count} transactions")
-            print(f"Sample Enriched Record (Match={enriched_data[0]['API_Match']})")
-
-        # [8/10] Saving Data
-        print("\n[8/10] Saving enriched data...")
-        save_enriched_data(enriched_data)
-        print("✓ Saved to: data/enriched_sales_data.txt")
-
-        # [9/10] Generating Final Report
-        print("\n[9/10] Generating comprehensive report...")
-        generate_sales_report(cleaned_data, enriched_data) 
-        
-        # [10/10] Final Analytics and Reporting
-        print("\n[10/10] Finalizing Global Summary...")
-        rate = get_currency_rate("USD", "EUR")
-        rev_usd, qty = calculate_metrics(filtered_data)
-        rev_eur = rev_usd * rate
-        
-        print(f"\n--- Final Global Summary ---")
-        print(f"Total Revenue (USD): ${rev_usd:,.2f}")
-        print(f"Total Revenue (EUR): €{rev_eur:,.2f} (at rate {rate})")
-        
-        generate_report(filtered_data, report_file)
+            results = [run_pipeline(
+                args.inputs[0], enriched_file=args.enriched_file,
+                sales_report_file=os.path.join(args.output_dir, "sales_report.txt"),
+                summary_file=report_file, region=args.region, min_amount=args.min_amount,
+                max_amount=args.max_amount, workers=args.workers,
+                choose_filters=prompt_filters if args.interactive else None,
+                trace_memory=args.trace_memory, profile_dir=args.profile_dir,
+                use_cache=not args.no_cache, enriched_format=args.enriched_format,
+                compression=args.compress, time_windows=args.time_windows,
+                associations=args.associations, currencies=args.currencies,
+                report_formats=args.report_formats)]
+
+        print_stage_timings(results)
+        if args.metrics_file:
+            write_metrics(results, args.metrics_file)
         print("\n" + "=" * 40)
         print("✓ Process Complete! All reports generated.")
         print("=" * 40)
@@ -104,6 +237,7 @@ def main():
         print("\n" + "!" * 40)
         print(f"An error occurred during execution: {e}")
         print("!" * 40)
+        sys.exit(1) # Non-zero status, so scripts and cron jobs see the failure
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
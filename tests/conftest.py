@@ -0,0 +1,99 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from benchmarks.generate_data import generate_sales_file
+from utils import api_cache
+from utils.api_cache import ApiCache
+
+
+@pytest.fixture
+def sales_file(tmp_path):
+    """
+    A reproducible 3,000-row sales file with every kind of invalid row.
+    """
+    path = tmp_path / 'sales_data.txt'
+    generate_sales_file(str(path), rows=3000, seed=7, invalid_ratio=0.05, products=40, customers=150, days=120)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """
+    An empty API cache, used by every cached_get_json call of the test.
+    """
+    test_cache = ApiCache(str(tmp_path / 'api_cache.sqlite'))
+    monkeypatch.setattr(api_cache, '_default_cache', test_cache)
+    return test_cache
+
+
+class StubCatalog:
+    """
+    A local stand-in for the DummyJSON products API: /products (skip/limit
+    pages with 'total') and /products/{id} (404 for unknown IDs).
+    """
+
+    def __init__(self, ids, fail=False):
+        self.products = [{'id': i, 'title': f"Product {i}", 'category': 'stub', 'brand': 'Acme',
+                          'price': float(i), 'rating': 4.5} for i in ids]
+        self.fail = fail # Answer every request with HTTP 500
+        self.requests = []
+        catalog = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                catalog.requests.append(self.path)
+                if catalog.fail:
+                    self._send(500, {'message': 'unavailable'})
+                    return
+                parts = url.path.strip('/').split('/')
+                if len(parts) == 2:
+                    match = [p for p in catalog.products if p['id'] == int(parts[1])]
+                    if match:
+                        self._send(200, match[0])
+                    else:
+                        self._send(404, {'message': 'not found'})
+                    return
+                query = parse_qs(url.query)
+                skip, limit = int(query['skip'][0]), int(query['limit'][0])
+                self._send(200, {'products': catalog.products[skip:skip + limit],
+                                 'total': len(catalog.products), 'skip': skip, 'limit': limit})
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_catalog():
+    """
+    Returns: callable(ids, fail=False) starting a StubCatalog, shut down after the test
+    """
+    servers = []
+
+    def start(ids, fail=False):
+        servers.append(StubCatalog(ids, fail))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
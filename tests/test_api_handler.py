@@ -0,0 +1,59 @@
+import requests
+
+from utils.api_handler import fetch_all_products, fetch_rate_table, create_product_mapping
+
+
+def test_fetch_all_products_pages_through_the_catalog(stub_catalog, cache):
+    catalog = stub_catalog(range(1, 251))
+
+    products = fetch_all_products(base_url=catalog.base_url, page_size=100, offline=False, log=lambda m: None)
+
+    assert [p['id'] for p in products] == list(range(1, 251)) # Page order is kept
+    assert set(products[0]) == {'id', 'title', 'category', 'brand', 'price', 'rating'}
+    assert len(catalog.requests) == 3
+
+
+def test_fetch_all_products_serves_fresh_pages_from_the_cache(stub_catalog, cache):
+    catalog = stub_catalog(range(1, 51))
+    fetch_all_products(base_url=catalog.base_url, offline=False, log=lambda m: None)
+
+    again = fetch_all_products(base_url=catalog.base_url, offline=False, log=lambda m: None)
+    assert len(again) == 50
+    assert len(catalog.requests) == 1
+
+    fetch_all_products(base_url=catalog.base_url, ttl=0, offline=False, log=lambda m: None)
+    assert len(catalog.requests) == 2 # ttl=0 always asks the API
+
+
+def test_fetch_all_products_reports_the_fetch_time(stub_catalog, cache):
+    catalog = stub_catalog(range(1, 11))
+    key = cache.make_key(f"{catalog.base_url}/products", {'limit': 100, 'skip': 0})
+    cache.set(key, {'products': catalog.products, 'total': 10}, fetched_at=1000.0)
+
+    products, fetched_at = fetch_all_products(base_url=catalog.base_url, offline=True, with_fetched_at=True,
+                                              log=lambda m: None)
+    assert len(products) == 10
+    assert fetched_at == 1000.0
+
+
+def test_fetch_all_products_returns_empty_list_when_the_api_fails(stub_catalog, cache):
+    catalog = stub_catalog(range(1, 11), fail=True)
+    messages = []
+
+    with requests.Session() as session: # No retries, so the test stays fast
+        products = fetch_all_products(base_url=catalog.base_url, offline=False, session=session,
+                                      log=messages.append)
+
+    assert products == []
+    assert messages[0].startswith("API Failure")
+
+
+def test_fetch_rate_table_falls_back_offline_without_a_cached_response(cache):
+    table = fetch_rate_table("USD", offline=True, log=lambda m: None)
+    assert table.fallback
+    assert table.rate('EUR') == 0.85
+
+
+def test_create_product_mapping_keys_by_id():
+    mapping = create_product_mapping([{'id': 7, 'title': 'Lamp', 'category': 'home', 'brand': 'Acme', 'rating': 4}])
+    assert mapping == {7: {'title': 'Lamp', 'category': 'home', 'brand': 'Acme', 'rating': 4}}
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from main import main
+from utils import api_cache, prefetch
+from utils.checkpoint import incremental_aggregate
+from utils.data_processor import validate_and_filter
+from utils.mmap_parser import parse_sales_file
+from utils.sales_aggregate import aggregate_sales
+
+FILTERS = {'region': 'North', 'min_amount': 500, 'max_amount': None}
+
+
+def _normalized(agg):
+    # Chunk sums are added in another order; compare floats to the cent
+    return json.loads(json.dumps(agg.to_dict()), parse_float=lambda v: round(float(v), 4))
+
+
+def _full_aggregates(path, **filters):
+    table = parse_sales_file(path)
+    filtered, _, _ = validate_and_filter(table, **filters)
+    return aggregate_sales(table), aggregate_sales(filtered)
+
+
+@pytest.fixture
+def growing_file(sales_file, tmp_path):
+    """
+    Returns: (path, write) where write(fraction) rewrites the file with that
+    share of sales_file's bytes, cut after a newline (so the file only grows)
+    """
+    with open(sales_file, 'rb') as f:
+        data = f.read()
+    path = tmp_path / 'growing.txt'
+
+    def write(fraction):
+        end = data.rfind(b'\n', 0, int(len(data) * fraction)) + 1 if fraction < 1 else len(data)
+        path.write_bytes(data[:end])
+
+    return str(path), write
+
+
+def test_appended_rows_update_both_aggregates(growing_file, tmp_path):
+    path, write = growing_file
+    checkpoint = str(tmp_path / 'checkpoint.json')
+
+    new_rows = []
+    for fraction in (0.3, 0.3, 0.7, 1):
+        write(fraction)
+        agg, filtered_agg, parsed = incremental_aggregate(path, checkpoint, **FILTERS)
+        new_rows.append(parsed)
+
+    assert new_rows[1] == 0 # Nothing appended
+    assert sum(new_rows) == 3000
+    full_agg, full_filtered = _full_aggregates(path, **FILTERS)
+    assert _normalized(agg) == _normalized(full_agg)
+    assert _normalized(filtered_agg) == _normalized(full_filtered)
+
+
+def test_changed_filters_rebuild_from_scratch(sales_file, tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    incremental_aggregate(sales_file, checkpoint, **FILTERS)
+
+    _, filtered_agg, parsed = incremental_aggregate(sales_file, checkpoint, min_amount=5000)
+
+    assert parsed == 3000
+    assert _normalized(filtered_agg) == _normalized(_full_aggregates(sales_file, min_amount=5000)[1])
+
+
+def test_replaced_file_is_reprocessed(growing_file, tmp_path):
+    path, write = growing_file
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    write(1)
+    incremental_aggregate(path, checkpoint)
+
+    write(0.5) # Truncated
+    agg, _, parsed = incremental_aggregate(path, checkpoint)
+
+    assert parsed < 3000
+    assert _normalized(agg) == _normalized(_full_aggregates(path)[0])
+
+
+def test_incremental_summary_matches_a_full_run(growing_file, tmp_path, monkeypatch, cache):
+    path, write = growing_file
+    monkeypatch.chdir(tmp_path)
+    for module in (api_cache, prefetch):
+        monkeypatch.setattr(module, 'OFFLINE', True) # No background requests from a test
+    filters = ['--region', 'North', '--min-amount', '500', '--no-cache']
+
+    write(0.6)
+    main([path, '--incremental', '--output-dir', 'output'] + filters)
+    write(1)
+    main([path, '--incremental', '--output-dir', 'output'] + filters)
+    main([path, '--output-dir', 'full'] + filters)
+
+    with open('full/summary_report.txt', encoding='utf-8') as full, \
+            open('output/summary_report.txt', encoding='utf-8') as incremental:
+        assert incremental.read() == full.read()
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from utils.api_handler import enrich_sales_data
+from utils.columnar_cache import META_FILE, load_cleaned_table, load_table, save_table
+from utils.mmap_parser import parse_sales_file
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / 'cols')
+
+
+def _load(sales_file, cache_dir, capsys):
+    table = load_cleaned_table(sales_file, cache_path=cache_dir)
+    return table, "from cache" in capsys.readouterr().out
+
+
+def test_round_trip_and_cache_hit(sales_file, cache_dir, capsys):
+    expected = list(parse_sales_file(sales_file))
+    capsys.readouterr()
+
+    table, hit = _load(sales_file, cache_dir, capsys)
+    assert not hit and list(table) == expected
+
+    table, hit = _load(sales_file, cache_dir, capsys)
+    assert hit and list(table) == expected
+
+
+def test_appended_rows_invalidate_the_cache(sales_file, cache_dir, capsys):
+    _load(sales_file, cache_dir, capsys)
+    with open(sales_file, 'a', encoding='utf-8') as f:
+        f.write("T9999|2024-05-01|P101|Mouse|1|10.0|C1|North\n")
+
+    table, hit = _load(sales_file, cache_dir, capsys)
+
+    assert not hit
+    assert table[-1]['TransactionID'] == 'T9999'
+
+
+def test_touched_file_is_checked_by_content(sales_file, cache_dir, capsys):
+    _load(sales_file, cache_dir, capsys)
+    stat = os.stat(sales_file)
+
+    os.utime(sales_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert _load(sales_file, cache_dir, capsys)[1] # Same bytes: still a hit
+
+    with open(sales_file, 'r+b') as f: # Same size, other content
+        f.seek(-3, os.SEEK_END)
+        f.write(b'Wst')
+    os.utime(sales_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    table, hit = _load(sales_file, cache_dir, capsys)
+    assert not hit
+    assert list(table) == list(parse_sales_file(sales_file))
+
+
+def test_damaged_caches_are_misses(sales_file, cache_dir, capsys):
+    _load(sales_file, cache_dir, capsys)
+    with open(os.path.join(cache_dir, 'quantity.bin'), 'r+b') as f:
+        f.truncate(8)
+    assert load_table(cache_dir, source=sales_file) is None
+
+    _load(sales_file, cache_dir, capsys) # Rewritten
+    meta_path = os.path.join(cache_dir, META_FILE)
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    meta['version'] = -1
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    assert load_table(cache_dir, source=sales_file) is None
+
+
+def test_enriched_tables_keep_product_info(sales_file, cache_dir):
+    enriched = enrich_sales_data(parse_sales_file(sales_file), {101: {'category': 'stub', 'brand': 'Acme'}})
+
+    save_table(enriched, cache_dir)
+
+    assert list(load_table(cache_dir)) == list(enriched)
@@ -0,0 +1,52 @@
+from array import array
+
+import pytest
+
+from utils.api_handler import enrich_sales_data, save_enriched_data
+from utils.currency import RateTable, format_money
+from utils.mmap_parser import parse_sales_file
+
+RATES = RateTable('USD', {'EUR': 0.92, 'GBP': 0.79, 'JPY': 149.5})
+
+
+def test_convert_totals_and_columns():
+    totals = RATES.convert_totals({'North': 100.0, 'South': 50.0}, ['EUR', 'JPY', 'XYZ'])
+    assert totals == {'North': {'EUR': pytest.approx(92.0), 'JPY': pytest.approx(14950.0)},
+                      'South': {'EUR': pytest.approx(46.0), 'JPY': pytest.approx(7475.0)}}
+
+    column = RATES.convert_column(array('d', [1.0, 2.5, 0.0]), ['GBP', 'USD'])
+    assert list(column['GBP']) == pytest.approx([0.79, 1.975, 0.0])
+    assert list(column['USD']) == [1.0, 2.5, 0.0]
+
+
+def test_available_skips_unknown_currencies(capsys):
+    assert RATES.available(['EUR', 'XYZ', 'USD']) == ['EUR', 'USD']
+    assert "No exchange rate for XYZ" in capsys.readouterr().out
+
+
+def test_format_money():
+    assert format_money(1234.5, 'EUR') == "€1,234.50"
+    assert format_money(1234.5, 'CHF') == "CHF 1,234.50"
+
+
+def test_enriched_rows_get_converted_revenue_columns(sales_file, tmp_path):
+    table = parse_sales_file(sales_file)
+    path = str(tmp_path / 'enriched.txt')
+
+    save_enriched_data(enrich_sales_data(table, {}), path, rates=RATES, currencies=['EUR', 'XYZ', 'JPY'])
+
+    with open(path, encoding='utf-8') as f:
+        header, *lines = f.read().splitlines()
+    assert header.endswith("|API_Match|Revenue_EUR|Revenue_JPY")
+    assert len(lines) == len(table)
+    for line, t in zip(lines, table):
+        fields = line.split('|')
+        revenue = t['Quantity'] * t['UnitPrice']
+        assert float(fields[-2]) == pytest.approx(revenue * 0.92, abs=0.006)
+        assert float(fields[-1]) == pytest.approx(revenue * 149.5, abs=0.006)
+
+    # Row dicts (e.g. a stream of enriched rows) give the same file
+    dict_path = str(tmp_path / 'enriched_dicts.txt')
+    save_enriched_data(enrich_sales_data(list(table), {}), dict_path, rates=RATES, currencies=['EUR', 'JPY'])
+    with open(dict_path, encoding='utf-8') as f:
+        assert f.read().splitlines() == [header] + lines
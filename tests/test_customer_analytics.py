@@ -0,0 +1,60 @@
+from utils.customer_analytics import analyze_customers
+from utils.mmap_parser import parse_sales_file
+from utils.transaction_table import TransactionTable
+
+
+def _row(customer, day, product, amount=100.0):
+    return {'TransactionID': 'T1', 'Date': day, 'ProductID': 'P101', 'ProductName': product,
+            'Quantity': 1, 'UnitPrice': amount, 'CustomerID': customer, 'Region': 'North'}
+
+
+ROWS = [
+    _row('C1', '2024-01-05', 'Laptop'), _row('C1', '2024-01-05', 'Mouse'),
+    _row('C1', '2024-03-10', 'Laptop'),
+    _row('C2', '2024-01-20', 'Mouse'),
+    _row('C3', '2024-02-01', 'Monitor'), _row('C3', '2024-03-02', 'Mouse'), _row('C3', '2024-03-02', 'Cable'),
+    _row('C4', '2024-02-14', 'Cable'),
+]
+
+
+def test_retention_matrix():
+    matrix = analyze_customers(ROWS).retention_matrix()
+
+    assert matrix == {
+        '2024-01': {'customers': 2, 'active': [2, 0, 1], 'retention': [100.0, 0.0, 50.0]},
+        '2024-02': {'customers': 2, 'active': [2, 1], 'retention': [100.0, 50.0]},
+    }
+
+
+def test_repeat_and_basket_distributions():
+    analytics = analyze_customers(ROWS)
+
+    assert analytics.repeat_distribution() == ({1: 2, 2: 2}, 50.0)
+    assert analytics.basket_size_distribution() == ({1: 4, 2: 2}, round(8 / 6, 2))
+
+
+def test_products_are_sorted_distinct_codes():
+    analytics = analyze_customers(ROWS)
+
+    assert analytics.products_bought('C1') == ['Laptop', 'Mouse']
+    assert analytics.unique_products('C3') == 3
+    assert analytics.unique_products('C9') == 0
+    assert all(list(codes) == sorted(set(codes)) for codes in analytics.product_codes)
+
+
+def test_table_and_dict_rows_give_the_same_histories(sales_file):
+    table = parse_sales_file(sales_file)
+    from_table = analyze_customers(table)
+    from_dicts = analyze_customers(iter(list(table)))
+
+    assert from_table.retention_matrix() == from_dicts.retention_matrix()
+    assert from_table.repeat_distribution() == from_dicts.repeat_distribution()
+    assert from_table.basket_size_distribution() == from_dicts.basket_size_distribution()
+    for customer in table.customer_ids.values:
+        assert from_table.products_bought(customer) == from_dicts.products_bought(customer)
+
+
+def test_empty_input():
+    analytics = analyze_customers(TransactionTable())
+    assert analytics.retention_matrix() == {}
+    assert analytics.repeat_distribution() == ({}, 0.0)
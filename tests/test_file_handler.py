@@ -0,0 +1,47 @@
+import types
+
+from utils.data_processor import clean_data
+from utils.file_handler import SAMPLE_SIZE, detect_encoding, read_sales_data
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def test_stream_yields_the_same_lines_as_the_list(sales_file):
+    stream = read_sales_data(sales_file, stream=True)
+
+    assert isinstance(stream, types.GeneratorType)
+    lines = list(stream)
+    assert lines == read_sales_data(sales_file)
+    assert clean_data(iter(lines)) == clean_data(lines)
+
+
+def test_header_and_blank_lines_are_skipped(tmp_path):
+    path = tmp_path / 'sales.txt'
+    path.write_text(HEADER + "T1|2024-01-01|P1|Mouse|1|10.0|C1|North\n\n   \r\nT2|2024-01-02|P2|Cable|2|5.0|C2|South",
+                    encoding='utf-8')
+
+    assert list(read_sales_data(str(path), stream=True)) == ["T1|2024-01-01|P1|Mouse|1|10.0|C1|North",
+                                                             "T2|2024-01-02|P2|Cable|2|5.0|C2|South"]
+
+
+def test_latin1_bytes_after_the_sample_are_decoded(tmp_path):
+    path = tmp_path / 'sales.txt'
+    filler = "T1|2024-01-01|P1|Mouse|1|10.0|C1|North\n" * (SAMPLE_SIZE // 20)
+    path.write_bytes((HEADER + filler).encode('utf-8') + "T2|2024-01-02|P2|Café|1|5.0|C2|South\n".encode('latin-1'))
+
+    assert detect_encoding(str(path)) == 'utf-8' # Only the sample is inspected
+    assert list(read_sales_data(str(path), stream=True))[-1] == "T2|2024-01-02|P2|Café|1|5.0|C2|South"
+
+
+def test_cp1252_file_is_detected(tmp_path):
+    path = tmp_path / 'sales.txt'
+    path.write_bytes((HEADER + "T1|2024-01-01|P1|Café|1|10.0|C1|North\n").encode('cp1252'))
+
+    assert detect_encoding(str(path)) == 'latin-1' # First encoding that decodes the sample
+    assert read_sales_data(str(path)) == ["T1|2024-01-01|P1|Café|1|10.0|C1|North"]
+
+
+def test_missing_file(capsys):
+    assert list(read_sales_data('no/such/file.txt', stream=True)) == []
+    assert read_sales_data('no/such/file.txt') == []
+    assert "was not found" in capsys.readouterr().out
@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+from utils.hyperloglog import HyperLogLog
+
+
+def _sketch(values, precision=10):
+    sketch = HyperLogLog(precision)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+@pytest.mark.parametrize('precision', [8, 10, 12])
+@pytest.mark.parametrize('n', [1000, 20000])
+def test_estimate_within_three_standard_errors(precision, n):
+    error = 1.04 / math.sqrt(1 << precision)
+    estimate = _sketch((f"C{i}" for i in range(n)), precision).count()
+    assert abs(estimate - n) <= 3 * error * n
+
+
+def test_small_sets_are_nearly_exact():
+    for n in (0, 1, 5, 20):
+        assert len(_sketch(f"P{i}" for i in range(n))) == n
+
+
+def test_duplicates_do_not_count():
+    assert len(_sketch(["C1"] * 500 + ["C2"] * 500)) == 2
+
+
+def test_sparse_and_dense_sketches_agree():
+    values = [f"C{i}" for i in range(300)]
+    for n in (3, 31, 32, 33, 300): # Around the switch to dense registers
+        sparse = _sketch(values[:n])
+        dense = HyperLogLog(10)
+        dense._sparse, dense._dense = None, bytearray(1024) # Dense from the first value
+        for value in values[:n]:
+            dense.add(value)
+        assert sparse.registers == dense.registers
+        assert sparse.count() == dense.count()
+
+
+def test_update_is_the_union():
+    a = _sketch(f"C{i}" for i in range(0, 3000))
+    b = _sketch(f"C{i}" for i in range(2000, 6000))
+    union = _sketch(f"C{i}" for i in range(0, 6000))
+
+    a.update(b)
+
+    assert a.registers == union.registers
+
+
+def test_registers_round_trip_through_hex():
+    sketch = _sketch(f"C{i}" for i in range(5000))
+    copy = HyperLogLog(10)
+    copy.registers = bytearray.fromhex(sketch.registers.hex())
+    assert copy.count() == sketch.count()
+
+
+def test_mismatched_precision_is_rejected():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).update(HyperLogLog(12))
+    with pytest.raises(ValueError):
+        HyperLogLog(3)
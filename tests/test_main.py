@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from main import DEFAULT_MIN_AMOUNT, main, parse_args
+from utils import api_cache, prefetch
+from utils.pipeline import common_root, output_paths
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch, cache):
+    monkeypatch.chdir(tmp_path)
+    for module in (api_cache, prefetch):
+        monkeypatch.setattr(module, 'OFFLINE', True) # No background requests from a test
+
+
+def test_min_amount_defaults_after_parsing():
+    args = parse_args(['data.txt'])
+    assert args.min_amount == DEFAULT_MIN_AMOUNT
+    assert not args.interactive # Not a terminal under pytest
+
+    assert parse_args(['data.txt', '--min-amount', '0']).min_amount == 0
+    assert parse_args(['data.txt', '--report-format', 'json', '--report-format', 'json']).report_formats == \
+        ('text', 'json')
+
+
+def test_same_named_inputs_get_separate_output_dirs(tmp_path):
+    inputs = [str(tmp_path / 'north' / 'sales.txt'), str(tmp_path / 'south' / 'sales.txt')]
+    root = common_root(inputs)
+    out = str(tmp_path / 'out')
+
+    paths = [output_paths(f, out, root) for f in inputs]
+
+    assert paths[0]['sales_report_file'] != paths[1]['sales_report_file']
+    assert os.path.dirname(paths[0]['sales_report_file']) == os.path.join(out, 'north', 'sales')
+
+
+def test_errors_exit_with_status_1(offline, tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path / 'missing.txt'), '--output-dir', str(tmp_path / 'out'), '--no-cache'])
+    assert exit_info.value.code == 1
+    assert "An error occurred" in capsys.readouterr().out
+
+
+def test_incremental_writes_to_the_output_dir(sales_file, offline, tmp_path):
+    main([sales_file, '--incremental', '--output-dir', 'out2', '--no-cache'])
+
+    assert sorted(os.listdir(tmp_path / 'out2')) == ['sales_report.txt', 'summary_report.txt']
+    assert not os.path.exists(tmp_path / 'output')
+
+
+def test_single_file_writes_enriched_data_to_the_output_dir(sales_file, offline, tmp_path):
+    main([sales_file, '--output-dir', 'out', '--no-cache'])
+
+    assert os.path.exists(tmp_path / 'out' / 'enriched_sales_data.txt')
+    assert not os.path.exists(tmp_path / 'data')
+
+
+def test_batch_labels_and_logs(sales_file, offline, tmp_path, capsys):
+    inputs = []
+    for name in ('a', 'b'):
+        os.makedirs(tmp_path / name)
+        inputs.append(str(tmp_path / name / 'sales_data.txt'))
+        os.link(sales_file, inputs[-1])
+    inputs.append(str(tmp_path / 'c' / 'sales_data.txt')) # Missing: this file fails
+
+    main(inputs + ['--output-dir', 'out', '--workers', '2', '--no-cache'])
+
+    out = capsys.readouterr().out
+    timings = out.split("--- Stage Timings (seconds) ---")[1].splitlines()
+    assert [line.split()[0] for line in timings[2:5]] == [os.path.join(n, 'sales_data') for n in 'abc']
+    assert "was not found" in out.split("✗")[1] # The failed file's console output is shown
+    for name in 'abc':
+        assert os.path.getsize(tmp_path / 'out' / name / 'sales_data' / 'pipeline.log') > 0
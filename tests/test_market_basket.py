@@ -0,0 +1,76 @@
+import math
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from utils.customer_analytics import analyze_customers
+from utils.market_basket import BY_CUSTOMER, BY_DAY, basket_pair_counts, count_pairs, day_baskets
+from utils.mmap_parser import parse_sales_file
+
+
+def _brute_force(baskets, min_count):
+    items = Counter(p for basket in baskets for p in basket)
+    pairs = Counter(pair for basket in baskets
+                    for pair in combinations(sorted(p for p in basket if items[p] >= min_count), 2))
+    return items, {pair: n for pair, n in pairs.items() if n >= min_count}
+
+
+def _basket_sets(transactions, by):
+    baskets = {}
+    for t in transactions:
+        key = t['CustomerID'] if by == BY_CUSTOMER else (t['CustomerID'], t['Date'])
+        baskets.setdefault(key, set()).add(t['ProductName'])
+    return list(baskets.values())
+
+
+@pytest.mark.parametrize('by', [BY_CUSTOMER, BY_DAY])
+@pytest.mark.parametrize('min_support', [0.0, 0.05])
+def test_pair_counts_match_brute_force(sales_file, by, min_support):
+    table = parse_sales_file(sales_file)
+    baskets = _basket_sets(table, by)
+    min_count = max(1, math.ceil(min_support * len(baskets)))
+    items, expected = _brute_force(baskets, min_count)
+
+    counts = basket_pair_counts(table, by=by, min_support=min_support)
+
+    assert counts.basket_count == len(baskets)
+    assert {tuple(sorted((a, b))): n for a, b, n in counts.pairs()} == expected
+    assert {counts.names[code]: n for code, n in enumerate(counts.item_counts)} == dict(items)
+
+
+def test_rules_support_confidence_and_lift():
+    baskets = [[0, 1], [0, 1], [0, 2], [1, 2], [0, 1, 2]]
+    counts = count_pairs(baskets, ['bread', 'milk', 'eggs'], min_support=0.0)
+
+    rule = next(r for r in counts.rules() if (r['antecedent'], r['consequent']) == ('bread', 'milk'))
+
+    assert rule['count'] == 3
+    assert rule['support'] == 0.6
+    assert rule['confidence'] == 0.75 # 3 of the 4 bread baskets
+    assert rule['lift'] == round(0.75 / (4 / 5), 4)
+    assert all(r['confidence'] >= 0.7 for r in counts.rules(min_confidence=0.7))
+
+
+def test_customer_analytics_and_transactions_give_the_same_pairs(sales_file):
+    table = parse_sales_file(sales_file)
+    from_table = basket_pair_counts(table, min_support=0.02)
+    from_analytics = basket_pair_counts(analyze_customers(table), min_support=0.02)
+    assert sorted(from_table.pairs()) == sorted(from_analytics.pairs())
+
+
+def test_day_baskets_are_sorted_distinct_codes(sales_file):
+    table = parse_sales_file(sales_file)
+    for dicts in (False, True):
+        baskets, names = day_baskets(list(table) if dicts else table)
+        assert all(list(b) == sorted(set(b)) for b in baskets)
+        assert sorted(sorted(names[p] for p in b) for b in baskets) == \
+            sorted(sorted(s) for s in _basket_sets(table, BY_DAY))
+
+
+def test_parallel_counting_matches_serial():
+    baskets = [[i % 7, (i * 3) % 11 + 7, 20 + i % 5] for i in range(6000)]
+    names = [f"P{i}" for i in range(25)]
+    serial = count_pairs(baskets, names, min_support=0.0)
+    parallel = count_pairs(baskets, names, min_support=0.0, workers=2)
+    assert parallel.pair_counts == serial.pair_counts
@@ -0,0 +1,55 @@
+import pytest
+
+from utils import mmap_parser
+from utils.data_processor import clean_data
+from utils.file_handler import read_sales_data
+from utils.mmap_parser import parse_file, parse_sales_file
+
+HEADER = b"TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def _expected(path):
+    return clean_data(read_sales_data(path))
+
+
+@pytest.mark.parametrize('block_bytes', [64, 1000, 4 * 1024 * 1024])
+def test_any_block_size_gives_the_clean_data_rows(sales_file, monkeypatch, block_bytes):
+    monkeypatch.setattr(mmap_parser, 'BLOCK_BYTES', block_bytes)
+    assert list(parse_sales_file(sales_file)) == _expected(sales_file)
+
+
+def test_line_longer_than_a_block(tmp_path, monkeypatch):
+    monkeypatch.setattr(mmap_parser, 'BLOCK_BYTES', 64)
+    path = tmp_path / 'sales.txt'
+    long_name = "Cable " + "x" * 500
+    path.write_bytes(HEADER + b"T1|2024-01-01|P1|Mouse|1|10.0|C1|North\n" +
+                     f"T2|2024-01-02|P2|{long_name}|2|5.0|C2|South\n".encode('utf-8') +
+                     b"T3|2024-01-03|P3|Monitor|1|300.0|C3|East")
+
+    table = parse_sales_file(str(path))
+
+    assert [t['TransactionID'] for t in table] == ['T1', 'T2', 'T3'] # Last line has no newline
+    assert table[1]['ProductName'] == long_name
+    assert list(table) == _expected(str(path))
+
+
+@pytest.mark.parametrize('content', [b"", HEADER, HEADER + b"\n\n"])
+def test_empty_files(tmp_path, content):
+    path = tmp_path / 'sales.txt'
+    path.write_bytes(content)
+
+    table, total_parsed, invalid_count = parse_file(str(path))
+
+    assert (len(table), total_parsed, invalid_count) == (0, 0, 0)
+
+
+def test_invalid_bytes_fall_back_per_line(tmp_path, monkeypatch):
+    monkeypatch.setattr(mmap_parser, 'BLOCK_BYTES', 100)
+    path = tmp_path / 'sales.txt'
+    path.write_bytes(HEADER + b"T1|2024-01-01|P1|Mouse|1|10.0|C1|North\r\n" * 3 +
+                     "T2|2024-01-02|P2|Café|1|5.0|C2|South\r\n".encode('latin-1'))
+
+    table = parse_sales_file(str(path))
+
+    assert table[-1]['ProductName'] == "Café"
+    assert list(table) == _expected(str(path))
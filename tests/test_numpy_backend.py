@@ -0,0 +1,28 @@
+import pytest
+
+from utils.data_processor import customer_analysis, daily_sales_trend, region_wise_sales, top_selling_products
+from utils.mmap_parser import parse_sales_file
+from utils.sales_aggregate import aggregate_sales
+from utils.transaction_table import TransactionTable
+
+pytest.importorskip('numpy')
+
+
+def test_numpy_backend_matches_python_exactly(sales_file):
+    table = parse_sales_file(sales_file)
+
+    python = aggregate_sales(table)
+    vectorized = aggregate_sales(table, backend='numpy')
+
+    assert vectorized.to_dict() == python.to_dict() # Same totals, bit for bit, and same dict order
+    for view in (region_wise_sales, customer_analysis, daily_sales_trend, top_selling_products):
+        assert view(vectorized) == view(python)
+
+
+def test_numpy_backend_on_an_empty_table():
+    assert aggregate_sales(TransactionTable(), backend='numpy').to_dict() == aggregate_sales([]).to_dict()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        aggregate_sales([], backend='cuda')
@@ -0,0 +1,70 @@
+import gzip
+
+import pytest
+
+from utils.api_handler import enrich_sales_data, iter_enriched_sales, save_enriched_data
+from utils.columnar_cache import load_table
+from utils.data_processor import clean_data
+from utils.file_handler import read_sales_data
+from utils.output_writer import chunked, open_text_output, write_chunks
+
+MAPPING = {101: {'category': 'stub', 'brand': 'Acme', 'rating': 4.5}}
+
+
+@pytest.fixture
+def records(sales_file):
+    return clean_data(read_sales_data(sales_file))
+
+
+def _read(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_chunked_writes_every_line(tmp_path):
+    lines = (f"{i}\n" for i in range(10))
+    assert [len(chunk) for chunk in chunked(lines, size=4)] == [4, 4, 2]
+
+    path = str(tmp_path / 'lines.txt')
+    with open_text_output(path) as f:
+        assert write_chunks(f, chunked((f"{i}\n" for i in range(10)), size=4)) == 10
+    assert _read(path) == "".join(f"{i}\n" for i in range(10))
+
+
+@pytest.mark.parametrize('name', ['enriched.txt', 'enriched.txt.gz'])
+def test_generator_list_and_table_write_the_same_text(records, tmp_path, name):
+    expected = str(tmp_path / 'expected.txt')
+    save_enriched_data(enrich_sales_data(records, MAPPING), expected)
+
+    from_generator = str(tmp_path / f"generator-{name}")
+    save_enriched_data(iter_enriched_sales(records, MAPPING), from_generator)
+    assert _read(from_generator) == _read(expected)
+    assert _read(expected).count("\n") == len(records) + 1
+
+
+def test_generator_to_columnar(records, tmp_path, capsys):
+    path = str(tmp_path / 'enriched.cols')
+
+    save_enriched_data(iter_enriched_sales(records, MAPPING), path, file_format='columnar')
+
+    assert "Error" not in capsys.readouterr().out
+    assert list(load_table(path)) == enrich_sales_data(records, MAPPING)
+
+
+def test_zstd_output(records, tmp_path):
+    zstandard = pytest.importorskip('zstandard')
+    path = str(tmp_path / 'enriched.txt.zst')
+
+    save_enriched_data(iter_enriched_sales(records, MAPPING), path)
+
+    with open(path, 'rb') as f:
+        text = zstandard.ZstdDecompressor().stream_reader(f).read().decode('utf-8')
+    plain = str(tmp_path / 'enriched.txt')
+    save_enriched_data(iter_enriched_sales(records, MAPPING), plain)
+    assert text == _read(plain)
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        open_text_output(str(tmp_path / 'x.txt'), 'lz4')
@@ -0,0 +1,42 @@
+import pytest
+
+from utils.data_processor import clean_data
+from utils.file_handler import read_sales_data
+from utils.mmap_parser import parse_sales_file
+from utils.parallel_processor import aggregate_files, parallel_aggregate, parallel_clean_data
+from utils.sales_aggregate import aggregate_sales
+
+
+@pytest.mark.parametrize('as_table', [False, True])
+def test_parallel_clean_data_matches_serial(sales_file, capsys, as_table):
+    serial = clean_data(read_sales_data(sales_file))
+    serial_stats = capsys.readouterr().out
+
+    parallel = parallel_clean_data(sales_file, workers=3, as_table=as_table) # 12 chunks
+
+    assert list(parallel) == serial
+    assert capsys.readouterr().out == serial_stats
+
+
+def test_parallel_aggregate_matches_serial(sales_file):
+    expected = aggregate_sales(parse_sales_file(sales_file))
+    merged = parallel_aggregate(sales_file, workers=3)
+
+    assert merged.transaction_count == expected.transaction_count
+    assert merged.total_quantity == expected.total_quantity
+    assert merged.total_revenue == pytest.approx(expected.total_revenue)
+    assert {name: data['qty'] for name, data in merged.products.items()} == \
+        {name: data['qty'] for name, data in expected.products.items()}
+    assert {cid: data['products'] for cid, data in merged.customers.items()} == \
+        {cid: data['products'] for cid, data in expected.customers.items()}
+
+
+def test_aggregate_files_merges_every_file(sales_file):
+    merged = aggregate_files([sales_file, sales_file], workers=2)
+    assert merged.transaction_count == 2 * aggregate_sales(parse_sales_file(sales_file)).transaction_count
+
+
+def test_missing_file(capsys):
+    assert parallel_clean_data('no/such/file.txt', workers=2) == []
+    assert len(parallel_clean_data('no/such/file.txt', workers=2, as_table=True)) == 0
+    assert "was not found" in capsys.readouterr().out
@@ -0,0 +1,100 @@
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from utils import prefetch
+from utils.api_handler import fetch_all_products
+from utils.currency import RateTable
+from utils.prefetch import ApiPrefetcher
+from utils.product_resolver import ProductResolver
+
+
+@pytest.fixture
+def prefetcher_factory(tmp_path, monkeypatch, cache):
+    monkeypatch.chdir(tmp_path) # The resolver's .cache/products.sqlite lives here
+    prefetchers = []
+
+    def make(**kwargs):
+        prefetchers.append(ApiPrefetcher(**kwargs))
+        return prefetchers[-1]
+
+    yield make
+    for p in prefetchers:
+        p.close()
+
+
+def test_rates_fall_back_after_the_await_timeout(prefetcher_factory, monkeypatch, capsys):
+    release = threading.Event()
+    monkeypatch.setattr(prefetch, 'fetch_rate_table', lambda base, log: release.wait(5))
+    prefetcher = prefetcher_factory(offline=True, await_timeout=0.1)
+
+    prefetcher.start_rates("USD")
+    started = time.monotonic()
+    rates = prefetcher.rates()
+    release.set()
+
+    assert time.monotonic() - started < 2
+    assert rates.fallback and rates.rate('EUR') == 0.85
+    assert prefetcher.rates() is rates # Collected once
+    assert "took longer than 0.1s" in capsys.readouterr().out
+
+
+def test_failed_lookup_uses_the_fallback(prefetcher_factory, monkeypatch, capsys):
+    def broken(base, log):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(prefetch, 'fetch_rate_table', broken)
+    prefetcher = prefetcher_factory(offline=True)
+    prefetcher.start_rates("GBP")
+
+    rates = prefetcher.rates()
+
+    assert rates.fallback and rates.rate('EUR') is None # No fallback rates from GBP
+    assert "boom" in capsys.readouterr().out
+
+
+def test_messages_are_printed_when_collected(prefetcher_factory, monkeypatch, capsys):
+    def fetch(base, log):
+        log("fetched")
+        return RateTable(base, {'EUR': 0.9})
+
+    monkeypatch.setattr(prefetch, 'fetch_rate_table', fetch)
+    prefetcher = prefetcher_factory(offline=True)
+    prefetcher.start_rates("USD")
+    time.sleep(0.05)
+    assert capsys.readouterr().out == "" # Nothing is printed from the background thread
+
+    assert prefetcher.rates().rate('EUR') == 0.9
+    assert capsys.readouterr().out == "fetched\n"
+
+
+def test_catalog_resolves_products_without_lookups(prefetcher_factory, monkeypatch, stub_catalog):
+    catalog = stub_catalog(range(1, 31))
+    monkeypatch.setattr(prefetch, 'fetch_all_products', partial(fetch_all_products, base_url=catalog.base_url))
+    prefetcher = prefetcher_factory(offline=False)
+
+    prefetcher.start_catalog()
+    prefetcher.start_products(['P5', 'P6', 'P30'])
+    product_map, fetched = prefetcher.products()
+
+    assert sorted(product_map) == [5, 6, 30]
+    assert fetched == 0 # Everything came with the catalog
+    assert all('/products?' in path for path in catalog.requests)
+
+
+def test_unreachable_catalog_serves_stored_products(prefetcher_factory, monkeypatch, stub_catalog):
+    resolver = ProductResolver()
+    resolver.add_products([{'id': 7, 'title': "Stored", 'category': 'c', 'brand': 'b', 'rating': 4.0}])
+    resolver.close()
+    catalog = stub_catalog(range(1, 31), fail=True)
+    monkeypatch.setattr(prefetch, 'fetch_all_products', partial(fetch_all_products, base_url=catalog.base_url))
+    prefetcher = prefetcher_factory(offline=False)
+
+    prefetcher.start_catalog()
+    prefetcher.start_products(['P7', 'P8'])
+    product_map, fetched = prefetcher.products()
+
+    assert product_map[7]['title'] == "Stored"
+    assert 8 not in product_map and fetched == 0 # Not retried once the catalog failed
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from utils.product_resolver import ProductResolver
+
+
+@pytest.fixture
+def resolver_factory(tmp_path):
+    resolvers = []
+
+    def make(base_url=None, offline=False):
+        resolver = ProductResolver(str(tmp_path / 'products.sqlite'), offline=offline,
+                                   base_url=base_url or 'http://127.0.0.1:9')
+        resolvers.append(resolver)
+        return resolver
+
+    yield make
+    for resolver in resolvers:
+        resolver.close()
+
+
+def test_resolve_batches_ids_and_reuses_stored_products(stub_catalog, resolver_factory):
+    catalog = stub_catalog(range(1, 101))
+    resolver = resolver_factory(catalog.base_url)
+
+    mapping = resolver.resolve(['P5', 'P6', 'P7', 'P60', 'bad'])
+    assert sorted(mapping) == [5, 6, 7, 60]
+    assert mapping[60]['title'] == "Product 60"
+    assert resolver.last_fetched == 4
+    assert len(catalog.requests) == 2 # 5-7 and 60 are too far apart for one batch
+
+    assert sorted(resolver.resolve(['P5', 'P60'])) == [5, 60]
+    assert resolver.last_fetched == 0
+    assert len(catalog.requests) == 2
+
+
+def test_resolve_re_requests_ids_missing_from_a_gapped_batch(stub_catalog, resolver_factory):
+    catalog = stub_catalog([i for i in range(1, 31) if i not in (11, 12)])
+    resolver = resolver_factory(catalog.base_url)
+
+    mapping = resolver.resolve(['P5', 'P12', 'P20', 'P25', 'P30'])
+
+    assert sorted(mapping) == [5, 20, 25, 30]
+    assert all(mapping[i]['title'] == f"Product {i}" for i in mapping)
+    assert any(path.startswith('/products/12?') for path in catalog.requests)
+    assert resolver._load({12})[12][0] is None # Absent per the API, not retried until expiry
+
+
+def test_offline_resolve_serves_stored_products_only(stub_catalog, resolver_factory):
+    catalog = stub_catalog(range(1, 11))
+    resolver_factory(catalog.base_url).resolve(['P1', 'P2'])
+
+    offline = resolver_factory(catalog.base_url, offline=True)
+    requests_before = len(catalog.requests)
+    assert sorted(offline.resolve(['P1', 'P2', 'P3'])) == [1, 2]
+    assert len(catalog.requests) == requests_before
+
+
+def test_add_products_keeps_the_fetch_time_and_newer_rows(resolver_factory):
+    resolver = resolver_factory(offline=True)
+    resolver.add_products([{'id': 1, 'title': 'new'}])
+    old = time.time() - 10 * resolver.ttl
+
+    resolver.add_products([{'id': 1, 'title': 'old'}, {'id': 2, 'title': 'old'}], fetched_at=old)
+
+    stored = resolver._load({1, 2})
+    assert stored[1][0]['title'] == 'new'
+    assert stored[2] == ({'title': 'old', 'category': None, 'brand': None, 'rating': None}, old)
@@ -0,0 +1,32 @@
+from utils.data_processor import calculate_metrics, validate_and_filter
+from utils.mmap_parser import parse_sales_file
+from utils.profiler import MetricsRecorder
+
+
+def test_stages_record_calls_and_row_counts(sales_file):
+    recorder = MetricsRecorder()
+    previous = recorder.activate()
+    try:
+        with recorder.stage('clean') as record:
+            table = parse_sales_file(sales_file)
+            record.rows_out = len(table)
+        validate_and_filter(table, region='North')
+        calculate_metrics(table)
+    finally:
+        recorder.deactivate(previous)
+
+    stages = recorder.stages
+    assert stages['clean']['calls'] == 1
+    assert stages['clean']['rows_out'] == len(table)
+    assert stages['mmap_parser.parse_sales_file']['rows_out'] == len(table)
+    # Tuple results are not row counts
+    assert stages['data_processor.validate_and_filter']['rows_in'] == len(table)
+    assert stages['data_processor.validate_and_filter']['rows_out'] is None
+    assert stages['data_processor.calculate_metrics']['rows_out'] is None
+
+
+def test_instrumented_functions_are_free_without_a_recorder(sales_file):
+    table = parse_sales_file(sales_file)
+    recorder = MetricsRecorder()
+    calculate_metrics(table)
+    assert recorder.stages == {}
@@ -0,0 +1,87 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from utils.data_processor import generate_report, generate_sales_report
+from utils.mmap_parser import parse_sales_file
+from utils.report_engine import ReportEngine, Section
+from utils.sales_aggregate import aggregate_sales
+
+
+def _engine(cache_path=None):
+    builds = []
+
+    def build(inputs):
+        builds.append(inputs['name'])
+        return {'total': inputs['total']}
+
+    sections = [Section('total', ('total',), build, lambda data: f"Total: {data['total']}\n",
+                        rows=lambda data: (['total'], [[data['total']]]))]
+    engine = ReportEngine(sections, {'total': lambda inputs: str(inputs['total'])}, cache_path=cache_path)
+    return engine, builds
+
+
+def test_unchanged_sections_are_reused(tmp_path):
+    engine, builds = _engine(str(tmp_path / 'sections.json'))
+    out = str(tmp_path / 'report.txt')
+
+    engine.render(['total'], {'name': 'first', 'total': 10}, out)
+    engine.render(['total'], {'name': 'second', 'total': 10}, out)
+    engine.render(['total'], {'name': 'third', 'total': 11}, out)
+
+    assert builds == ['first', 'third']
+    assert (engine.hits, engine.misses) == (1, 2)
+    with open(out, encoding='utf-8') as f:
+        assert f.read() == "Total: 11\n"
+
+    reloaded, builds = _engine(str(tmp_path / 'sections.json'))
+    reloaded.render(['total'], {'name': 'fourth', 'total': 10}, out)
+    assert builds == [] # Served from the file
+
+
+def test_json_and_csv_formats(tmp_path):
+    engine, _ = _engine()
+    out = str(tmp_path / 'report.txt')
+
+    written = engine.render(['total'], {'name': 'x', 'total': 5}, out, formats=('json', 'csv'))
+
+    assert written == [str(tmp_path / 'report.json'), str(tmp_path / 'report_total.csv')]
+    with open(written[0], encoding='utf-8') as f:
+        assert json.load(f)['sections'] == {'total': {'total': 5}}
+    with open(written[1], encoding='utf-8', newline='') as f:
+        assert list(csv.reader(f)) == [['total'], ['5']]
+    with pytest.raises(ValueError):
+        engine.render(['total'], {'name': 'x', 'total': 5}, out, formats=('xml',))
+
+
+def _render_total(args):
+    cache_path, out, total = args
+    engine, _ = _engine(cache_path)
+    engine.render(['total'], {'name': str(total), 'total': total}, out)
+
+
+def test_parallel_writers_keep_each_others_entries(tmp_path):
+    cache_path = str(tmp_path / 'sections.json')
+    tasks = [(cache_path, str(tmp_path / f"r{i}.txt"), i) for i in range(12)]
+
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_render_total, tasks))
+
+    with open(cache_path, encoding='utf-8') as f:
+        assert len(json.load(f)['entries']) == 12
+
+
+def test_generators_only_use_the_cache_file_when_asked(sales_file, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # The default cache file is relative to the working directory
+    agg = aggregate_sales(parse_sales_file(sales_file))
+
+    generate_sales_report(agg, None, str(tmp_path / 'sales_report.txt'))
+    generate_report(agg, str(tmp_path / 'summary_report.txt'))
+    assert not os.path.exists(tmp_path / '.cache')
+
+    cache_path = str(tmp_path / 'sections.json')
+    generate_report(agg, str(tmp_path / 'summary_report.txt'), cache=cache_path)
+    assert os.path.exists(cache_path)
@@ -0,0 +1,73 @@
+import pytest
+
+from utils.data_processor import clean_data, validate_and_filter
+from utils.file_handler import read_sales_data
+from utils.mmap_parser import parse_and_filter, parse_sales_file
+from utils.rule_engine import CLEAN_RULES, FILTER, VALIDATION_RULES, Rule, compile_rules
+
+FILTERS = [
+    {},
+    {'region': 'North'},
+    {'min_amount': 5000},
+    {'region': 'East', 'min_amount': 1000, 'max_amount': 40000},
+    {'region': 'Nowhere'},
+]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_parse_and_filter_matches_validate_and_filter(sales_file, filters):
+    expected, expected_invalid, expected_summary = validate_and_filter(parse_sales_file(sales_file), **filters)
+
+    table, invalid, summary = parse_and_filter(sales_file, **filters)
+
+    assert list(table) == expected
+    assert invalid == expected_invalid
+    for field, value in expected_summary.items():
+        assert summary[field] == value, field
+
+
+def test_clean_rules_match_clean_data(sales_file):
+    expected = clean_data(read_sales_data(sales_file))
+
+    table, _, summary = parse_and_filter(sales_file, rules=CLEAN_RULES)
+
+    assert list(table) == expected
+    assert summary['total_input'] == len(expected)
+
+
+def test_rule_counts_add_up(sales_file):
+    table, _, summary = parse_and_filter(sales_file, region='South')
+    assert sum(summary['rules'].values()) + len(table) == summary['total_parsed']
+    assert summary['rules']['region'] == summary['filtered_by_region']
+
+
+def test_list_values_are_frozen_and_cached(sales_file):
+    rules = CLEAN_RULES + VALIDATION_RULES + (Rule('regions', 'Region', 'in', ['North', 'East'], FILTER),)
+    assert compile_rules(rules) is compile_rules(list(rules))
+
+    table, _, _ = parse_and_filter(sales_file, rules=rules)
+
+    assert set(table.regions.values) == {'North', 'East'}
+    assert len(table) == sum(len(validate_and_filter(parse_sales_file(sales_file), region=r)[0])
+                             for r in ('North', 'East'))
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        compile_rules((Rule('bad', 'Colour', 'eq', 'red'),))
+    with pytest.raises(ValueError):
+        compile_rules((Rule('bad', 'Region', 'matches', 'N.*'),))
+    with pytest.raises(ValueError):
+        compile_rules(CLEAN_RULES + CLEAN_RULES[:1])
+
+
+@pytest.mark.parametrize('content', [b"", b"TransactionID|Date|ProductID\n"])
+def test_parse_and_filter_empty_files(tmp_path, content):
+    path = tmp_path / 'sales.txt'
+    path.write_bytes(content)
+
+    table, invalid, summary = parse_and_filter(str(path), region='North', min_amount=1000)
+
+    assert len(table) == 0 and invalid == 0
+    assert summary['total_parsed'] == summary['final_count'] == 0
+    assert not any(summary['rules'].values())
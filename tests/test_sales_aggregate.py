@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from utils.data_processor import clean_lines
+from utils.file_handler import read_sales_data
+from utils.sales_aggregate import SalesAggregate, aggregate_sales, merge_aggregates
+from utils.transaction_table import TransactionTable
+
+
+@pytest.fixture
+def transactions(sales_file):
+    records, _, _ = clean_lines(read_sales_data(sales_file))
+    return records
+
+
+def _normalized(agg):
+    # Floats summed in another order differ in the last bits; the rest must match exactly
+    return json.loads(json.dumps(agg.to_dict()), parse_float=lambda v: round(float(v), 4))
+
+
+def test_table_and_dict_rows_give_the_same_aggregate(transactions):
+    table = TransactionTable.from_records(transactions)
+    assert _normalized(aggregate_sales(table)) == _normalized(aggregate_sales(transactions))
+
+
+@pytest.mark.parametrize('approximate', [False, True])
+def test_merging_shards_matches_a_single_pass(transactions, approximate):
+    single = aggregate_sales(transactions, approximate=approximate)
+    shards = [aggregate_sales(transactions[i:i + 700], approximate=approximate)
+              for i in range(0, len(transactions), 700)]
+
+    merged = merge_aggregates(shards)
+
+    assert _normalized(merged) == _normalized(single)
+    assert list(merged.customers) == list(single.customers) # First-seen order survives the merge
+
+
+def test_to_dict_round_trip(transactions):
+    for approximate in (False, True):
+        agg = aggregate_sales(transactions, approximate=approximate)
+        assert SalesAggregate.from_dict(json.loads(json.dumps(agg.to_dict()))).to_dict() == agg.to_dict()
+
+
+def test_merge_rejects_mixed_modes(transactions):
+    with pytest.raises(ValueError):
+        aggregate_sales(transactions[:10]).merge(aggregate_sales(transactions[:10], approximate=True))
+
+
+def test_totals_match_the_rows(transactions):
+    agg = aggregate_sales(transactions)
+    assert agg.transaction_count == len(transactions)
+    assert agg.total_revenue == pytest.approx(sum(t['Quantity'] * t['UnitPrice'] for t in transactions))
+    assert sum(r['transaction_count'] for r in agg.regions.values()) == len(transactions)
+    for customer, stats in agg.customers.items():
+        bought = {t['ProductName'] for t in transactions if t['CustomerID'] == customer}
+        assert stats['products'] == bought
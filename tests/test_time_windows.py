@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+
+import pytest
+
+from utils.data_processor import rolling_sales_metrics, sales_by_period, day_over_day_sales
+from utils.mmap_parser import parse_sales_file
+from utils.sales_aggregate import aggregate_sales
+from utils.time_windows import MONTHLY, WEEKLY, daily_series, period_rollup, rolling_metrics
+
+
+@pytest.fixture
+def table(sales_file):
+    return parse_sales_file(sales_file)
+
+
+def test_rolling_windows_match_brute_force(table):
+    rows = list(table)
+    metrics = rolling_sales_metrics(table, windows=(7, 30))
+
+    for day in list(metrics)[::11]:
+        end = date.fromisoformat(day)
+        for days in (7, 30):
+            start = (end - timedelta(days=days - 1)).isoformat()
+            window = [t for t in rows if start <= t['Date'] <= day]
+            assert metrics[day][f'revenue_{days}d'] == round(sum(t['Quantity'] * t['UnitPrice'] for t in window), 2)
+            assert metrics[day][f'transactions_{days}d'] == len(window)
+            assert metrics[day][f'unique_customers_{days}d'] == len({t['CustomerID'] for t in window})
+
+
+@pytest.mark.parametrize('period', [WEEKLY, MONTHLY])
+def test_period_totals_match_brute_force(table, period):
+    rows = list(table)
+    rollup = sales_by_period(table, period)
+
+    def label(day):
+        d = date.fromisoformat(day)
+        if period == MONTHLY:
+            return f"{d.year}-{d.month:02d}"
+        year, week, _ = d.isocalendar()
+        return f"{year}-W{week:02d}"
+
+    expected = {}
+    for t in rows:
+        stats = expected.setdefault(label(t['Date']), {'revenue': 0.0, 'transaction_count': 0, 'customers': set()})
+        stats['revenue'] += t['Quantity'] * t['UnitPrice']
+        stats['transaction_count'] += 1
+        stats['customers'].add(t['CustomerID'])
+
+    assert list(rollup) == sorted(expected)
+    for key, stats in expected.items():
+        assert rollup[key] == {'revenue': round(stats['revenue'], 2), 'transaction_count': stats['transaction_count'],
+                               'unique_customers': len(stats['customers'])}
+
+
+def test_approximate_windows_stay_close(table):
+    series = daily_series(aggregate_sales(table, approximate=True))
+    exact = rolling_metrics(daily_series(aggregate_sales(table)), windows=(30,))
+    approximate = rolling_metrics(series, windows=(30,), approximate=True)
+    for day, row in exact.items():
+        assert approximate[day]['revenue_30d'] == row['revenue_30d']
+        assert abs(approximate[day]['unique_customers_30d'] - row['unique_customers_30d']) <= \
+            max(3, 0.1 * row['unique_customers_30d'])
+    assert list(period_rollup(series, MONTHLY, approximate=True)) == list(sales_by_period(table, MONTHLY))
+
+
+def test_day_over_day_uses_zero_for_missing_days():
+    rows = [{'TransactionID': 'T1', 'Date': day, 'ProductID': 'P1', 'ProductName': 'Mouse', 'Quantity': 1,
+             'UnitPrice': price, 'CustomerID': 'C1', 'Region': 'North'}
+            for day, price in (('2024-01-01', 100.0), ('2024-01-02', 150.0), ('2024-01-04', 80.0))]
+
+    changes = day_over_day_sales(rows)
+
+    assert changes['2024-01-02'] == {'revenue': 150.0, 'previous_revenue': 100.0, 'change': 50.0, 'change_pct': 50.0}
+    assert changes['2024-01-04']['previous_revenue'] == 0.0
+    assert changes['2024-01-04']['change_pct'] is None
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from utils.data_processor import largest_transactions, low_performing_products
+from utils.mmap_parser import parse_sales_file
+from utils.parallel_processor import parallel_aggregate
+from utils.sales_aggregate import SalesAggregate, aggregate_sales, merge_aggregates
+from utils.topk import TopK, bottom_k, top_k
+
+# Few distinct scores, so ties between chunks are common
+_rng = random.Random(3)
+ITEMS = [(_rng.randint(0, 20), f"item{i}") for i in range(500)]
+
+
+def _sorted(items, k, largest):
+    return sorted(items, key=lambda x: x[0], reverse=largest)[:k] # Stable: ties in arrival order
+
+
+@pytest.mark.parametrize('largest', [True, False])
+@pytest.mark.parametrize('k', [0, 1, 10, 600])
+def test_merged_chunks_equal_one_pass(k, largest):
+    whole = TopK(k, largest)
+    chunks = []
+    for start in range(0, len(ITEMS), 64):
+        chunk = TopK(k, largest)
+        for score, item in ITEMS[start:start + 64]:
+            chunk.add(score, item)
+            whole.add(score, item)
+        chunks.append(chunk)
+
+    merged = chunks[0]
+    for chunk in chunks[1:]:
+        merged.update(chunk)
+
+    assert merged.items() == whole.items() == _sorted(ITEMS, k, largest)
+    assert TopK.from_items(k, whole.items(), largest).items() == whole.items()
+
+
+def test_directions_do_not_merge():
+    with pytest.raises(ValueError):
+        TopK(3).update(TopK(3, largest=False))
+
+
+def test_top_and_bottom_k_match_sorted():
+    assert top_k(ITEMS, 10, key=lambda x: x[0]) == _sorted(ITEMS, 10, True)
+    assert bottom_k(ITEMS, 10, key=lambda x: x[0]) == _sorted(ITEMS, 10, False)
+
+
+def test_largest_transactions_survive_shard_merges(sales_file):
+    table = parse_sales_file(sales_file)
+    rows = list(table)
+    expected = sorted(rows, key=lambda t: t['Quantity'] * t['UnitPrice'], reverse=True)[:5]
+
+    whole = aggregate_sales(rows)
+    shards = merge_aggregates(aggregate_sales(rows[i:i + 250]) for i in range(0, len(rows), 250))
+    for agg in (whole, aggregate_sales(table), shards, parallel_aggregate(sales_file, workers=3),
+                SalesAggregate.from_dict(whole.to_dict())):
+        assert [t['TransactionID'] for t in largest_transactions(agg)] == [t['TransactionID'] for t in expected]
+
+
+def test_low_performing_bound_matches_the_sorted_list(sales_file):
+    agg = aggregate_sales(parse_sales_file(sales_file))
+    full = low_performing_products(agg, threshold=10**9)
+    assert low_performing_products(agg, threshold=10**9, n=5) == full[:5]
@@ -0,0 +1,35 @@
+import pytest
+
+from utils.data_processor import clean_data, validate_and_filter
+from utils.file_handler import read_sales_data
+from utils.mmap_parser import parse_sales_file
+from utils.transaction_index import TransactionIndex
+
+FILTERS = [
+    {},
+    {'region': 'West'},
+    {'min_amount': 2000, 'max_amount': 20000},
+    {'region': 'South', 'min_amount': 10000},
+    {'region': 'Nowhere'},
+]
+
+
+@pytest.mark.parametrize('as_table', [False, True])
+@pytest.mark.parametrize('filters', FILTERS)
+def test_index_queries_match_validate_and_filter(sales_file, as_table, filters):
+    transactions = parse_sales_file(sales_file) if as_table else clean_data(read_sales_data(sales_file))
+    index = TransactionIndex(transactions)
+
+    assert validate_and_filter(index, **filters) == validate_and_filter(transactions, **filters)
+
+
+def test_lookup_returns_valid_rows_with_the_value(sales_file):
+    transactions = clean_data(read_sales_data(sales_file))
+    index = TransactionIndex(transactions)
+    customer = transactions[0]['CustomerID']
+
+    expected = [t for t in transactions if t['CustomerID'] == customer and t['ProductID'].startswith('P')]
+    assert index.lookup('CustomerID', customer) == expected
+    assert index.count('CustomerID', customer) == len(expected)
+    with pytest.raises(ValueError):
+        index.lookup('UnitPrice', 100)
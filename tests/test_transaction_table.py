@@ -0,0 +1,46 @@
+import pytest
+
+from utils.api_handler import enrich_sales_data
+from utils.data_processor import clean_data, enrichment_summary, validate_and_filter
+from utils.file_handler import read_sales_data
+from utils.transaction_table import TransactionTable
+
+FILTERS = [
+    {},
+    {'region': 'North'},
+    {'min_amount': 1000, 'max_amount': 30000},
+    {'region': 'Nowhere'},
+]
+
+
+@pytest.fixture
+def records(sales_file):
+    rows = clean_data(read_sales_data(sales_file))
+    # Rows the T/P/C prefix checks reject
+    rows[3] = dict(rows[3], ProductID='X3')
+    rows[8] = dict(rows[8], CustomerID='D8')
+    return rows
+
+
+def test_rows_round_trip(records):
+    table = TransactionTable.from_records(records)
+    assert len(table) == len(records)
+    assert list(table) == records
+    assert table[-1] == records[-1]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_validate_and_filter_reads_table_columns(records, filters):
+    expected = validate_and_filter(records, **filters)
+    assert validate_and_filter(TransactionTable.from_records(records), **filters) == expected
+    assert expected[1] >= 2 # Includes the two rows changed above
+
+
+def test_enrichment_is_summarized_per_product(records):
+    mapping = {int(pid[1:]): {'category': 'stub'} for pid in {t['ProductID'] for t in records[:50]}
+               if pid.startswith('P')}
+
+    enriched = enrich_sales_data(TransactionTable.from_records(records), mapping)
+
+    assert enrichment_summary(enriched) == enrichment_summary(iter(list(enriched)))
+    assert enrichment_summary(enriched)[0] == sum(1 for t in enriched if t['API_Match'])
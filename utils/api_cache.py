@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from utils.profiler import record_http
+
+DEFAULT_CACHE_PATH = os.environ.get('SALES_API_CACHE', '.cache/api_cache.sqlite')
+DEFAULT_TTL = 6 * 60 * 60 # Seconds a response is served without revalidation
+DEFAULT_STALE_WHILE_REVALIDATE = 24 * 60 * 60 # Extra seconds a stale response may be served
+OFFLINE = os.environ.get('SALES_API_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+class OfflineCacheMiss(requests.exceptions.RequestException):
+    """
+    Raised in offline mode when no cached response exists.
+    Subclasses RequestException so existing API error handling applies.
+    """
+
+
+class ApiCache:
+    """
+    SQLite store of JSON API responses keyed by URL and query parameters.
+    A new connection is opened per call so background refresh threads can
+    use the same cache safely.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                         "key TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def make_key(url, params=None):
+        return url + '?' + json.dumps(params or {}, sort_keys=True)
+
+    def get(self, key):
+        """
+        Returns: tuple (payload, fetched_at) or None if not cached
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, payload, fetched_at=None):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO responses (key, payload, fetched_at) VALUES (?, ?, ?)",
+                         (key, json.dumps(payload), fetched_at or time.time()))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+_default_cache = None
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+
+def get_default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ApiCache()
+    return _default_cache
+
+
+def _fetch_json(url, params, timeout, session=None):
+    start = time.perf_counter()
+    try:
+        response = (session or requests).get(url, params=params, timeout=timeout)
+    except requests.exceptions.RequestException:
+        record_http(url, time.perf_counter() - start) # Failed requests count too
+        raise
+    record_http(response.url, time.perf_counter() - start, response.status_code)
+    response.raise_for_status()
+    return response.json()
+
+
+def _refresh_in_background(cache, key, url, params, timeout, session):
+    """
+    Revalidates a stale entry without blocking the caller.
+    At most one refresh per key runs at a time; failures keep the old entry.
+    """
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        try:
+            cache.set(key, _fetch_json(url, params, timeout, session))
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def cached_get_json(url, params=None, ttl=DEFAULT_TTL, stale_while_revalidate=DEFAULT_STALE_WHILE_REVALIDATE,
+                    offline=None, cache=None, timeout=10, session=None, with_fetched_at=False):
+    """
+    GETs a JSON endpoint through the local cache.
+    - fresh entry (age < ttl): served without any HTTP call
+    - stale entry within stale_while_revalidate: served at once, refreshed in the background
+    - older or missing: fetched; on failure the last good response is served
+    - offline mode: only the cache is used, whatever the age
+    with_fetched_at: return (payload, time the served response was fetched)
+    instead of the payload, so callers can tell a stale response from a new one.
+    Raises: requests.exceptions.RequestException if nothing usable is available
+    """
+    cache = cache or get_default_cache()
+    offline = OFFLINE if offline is None else offline
+    key = ApiCache.make_key(url, params)
+    entry = cache.get(key)
+
+    if entry is not None:
+        payload, fetched_at = entry
+        age = time.time() - fetched_at
+        if offline or age < ttl:
+            return entry if with_fetched_at else payload
+        if age < ttl + stale_while_revalidate:
+            _refresh_in_background(cache, key, url, params, timeout, session)
+            return entry if with_fetched_at else payload
+    elif offline:
+        raise OfflineCacheMiss(f"Offline mode: no cached response for {url}")
+
+    try:
+        payload = _fetch_json(url, params, timeout, session)
+    except (requests.exceptions.RequestException, ValueError):
+        if entry is not None:
+            print(f"API unavailable, serving last good response for {url}")
+            return entry if with_fetched_at else entry[0]
+        raise
+
+    fetched_at = time.time()
+    cache.set(key, payload, fetched_at)
+    return (payload, fetched_at) if with_fetched_at else payload
@@ -1,23 +1,68 @@
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.api_cache import cached_get_json, DEFAULT_STALE_WHILE_REVALIDATE
+from utils.currency import RateTable, FALLBACK_RATES
+from utils.transaction_table import TransactionTable
+from utils.columnar_cache import save_table
+from utils.output_writer import CHUNK_ROWS, chunked, open_text_output, write_chunks
+from utils.profiler import instrumented
+
+RATES_TTL = 60 * 60 # Exchange rates are re-fetched at most hourly
+PRODUCTS_TTL = 24 * 60 * 60 # The product catalog changes rarely
+DUMMYJSON_URL = "https://dummyjson.com"
+FETCH_WORKERS = 4 # Concurrent catalog page requests
+API_FIELDS = ['API_Category', 'API_Brand', 'API_Rating', 'API_Match']
+
+def _stale_window(ttl):
+    # ttl=0 asks for a fresh response, so a stale one must not be served either
+    return DEFAULT_STALE_WHILE_REVALIDATE if ttl > 0 else 0
 
-def get_currency_rate(base="USD", target="EUR"):
+@instrumented
+def get_currency_rate(base="USD", target="EUR", ttl=RATES_TTL, offline=None, log=print):
     """
     Fetches real-time exchange rates using a public API.
+    Responses are cached locally (see utils/api_cache.py): ttl=0 forces a
+    fresh request (the cached response is only served if it fails),
+    offline=True serves only the last good response.
+    log: receives the status message (background fetches collect it instead of printing).
     """
     url = f"https://api.exchangerate-api.com/v4/latest/{base}"
     
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status() 
-        data = response.json()
+        data = cached_get_json(url, ttl=ttl, stale_while_revalidate=_stale_window(ttl), offline=offline,
+                               timeout=10)
         
         rate = data['rates'].get(target)
-        print(f"Successfully fetched exchange rate: 1 {base} = {rate} {target}")
+        log(f"Successfully fetched exchange rate: 1 {base} = {rate} {target}")
         return rate
     except Exception as e:
-        print(f"API Error fetching rate: {e}. Using fallback rate 0.85")
+        log(f"API Error fetching rate: {e}. Using fallback rate 0.85")
         return 0.85
-    
+
+@instrumented
+def fetch_rate_table(base="USD", ttl=RATES_TTL, offline=None, log=print):
+    """
+    Fetches every exchange rate from `base` with one latest/{base} request
+    (served from the local cache while fresh, see get_currency_rate).
+    Returns: RateTable (FALLBACK_RATES if the API and cache both fail)
+    """
+    url = f"https://api.exchangerate-api.com/v4/latest/{base}"
+
+    try:
+        data = cached_get_json(url, ttl=ttl, stale_while_revalidate=_stale_window(ttl), offline=offline,
+                               timeout=10)
+        table = RateTable(base, data['rates'])
+        log(f"Successfully fetched exchange rates: 1 {base} in {len(table.rates)} currencies")
+        return table
+    except Exception as e:
+        log(f"API Error fetching rates: {e}. Using fallback rate 0.85")
+        return RateTable(base, FALLBACK_RATES if base == "USD" else {}, fallback=True)
+
 def create_product_mapping(api_products):
     """
     Creates a mapping of product IDs to specific product info.
@@ -39,90 +84,233 @@ def create_product_mapping(api_products):
     
     return mapping
 
+def _product_info(raw_pid, product_mapping):
+    """
+    Looks up the API fields for one local ProductID (P101 -> 101).
+    Returns: dict with API_Category, API_Brand, API_Rating and API_Match
+    """
+    try:
+        numeric_id = int(raw_pid.replace('P', '').strip())
+    except ValueError:
+        numeric_id = None
+
+    if numeric_id in product_mapping:
+        info = product_mapping[numeric_id]
+        return {
+            'API_Category': info.get('category'),
+            'API_Brand': info.get('brand'),
+            'API_Rating': info.get('rating'),
+            'API_Match': True
+        }
+    return {'API_Category': None, 'API_Brand': None, 'API_Rating': None, 'API_Match': False}
+
+@instrumented
 def enrich_sales_data(transactions, product_mapping):
     """
     Enriches transaction data with API product information.
+    A TransactionTable is enriched once per distinct ProductID instead of
+    copying every row; its rows then carry the API fields.
+    """
+    if isinstance(transactions, TransactionTable):
+        info = [_product_info(pid, product_mapping) for pid in transactions.product_ids.values]
+        return transactions.with_product_info(info)
+
+    return list(iter_enriched_sales(transactions, product_mapping))
+
+def iter_enriched_sales(transactions, product_mapping):
+    """
+    Lazily yields enriched copies of transaction dicts, so enrichment can be
+    streamed straight into save_enriched_data without building a list.
     """
-    enriched_list = []
+    info_by_pid = {} # Each distinct ProductID is parsed and looked up once
 
     for t in transactions:
         # Create a copy to avoid changing the original data
         enriched_t = t.copy()
-        
-        # 1. Extract numeric ID (P101 -> 101)
-        # Requirement: Correctly extracts numeric IDs
+
+        # Requirement: Correctly extracts numeric IDs, handles enrichment and missing products
         raw_pid = t.get('ProductID', '')
-        try:
-            # Removes 'P' and converts the rest to an integer
-            numeric_id = int(raw_pid.replace('P', '').strip())
-        except ValueError:
-            numeric_id = None
-
-        # 2. Enrich with API data
-        # Requirement: Handles enrichment and missing products
-        if numeric_id in product_mapping:
-            info = product_mapping[numeric_id]
-            enriched_t['API_Category'] = info.get('category')
-            enriched_t['API_Brand'] = info.get('brand')
-            enriched_t['API_Rating'] = info.get('rating')
-            enriched_t['API_Match'] = True
-        else:
-            # Requirement: Handles Missing products
-            enriched_t['API_Category'] = None
-            enriched_t['API_Brand'] = None
-            enriched_t['API_Rating'] = None
-            enriched_t['API_Match'] = False
-            
-        enriched_list.append(enriched_t)
+        info = info_by_pid.get(raw_pid)
+        if info is None:
+            info = info_by_pid[raw_pid] = _product_info(raw_pid, product_mapping)
+        enriched_t.update(info)
+
+        yield enriched_t
 
-    return enriched_list
+def _api_columns(t):
+    # Handle None values by converting them to empty strings
+    category = t.get('API_Category')
+    brand = t.get('API_Brand')
+    rating = t.get('API_Rating')
+    return "|".join([
+        str(category) if category else "",
+        str(brand) if brand else "",
+        str(rating) if rating else "",
+        str(t.get('API_Match', False))
+    ])
 
-def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
+def _enriched_line(t):
+    return "|".join([
+        str(t.get('TransactionID', '')),
+        str(t.get('Date', '')),
+        str(t.get('ProductID', '')),
+        str(t.get('ProductName', '')),
+        str(t.get('Quantity', 0)),
+        str(t.get('UnitPrice', 0.0)),
+        str(t.get('CustomerID', '')),
+        str(t.get('Region', '')),
+        _api_columns(t)
+    ]) + "\n"
+
+def _converted_suffixes(converted, start, end):
+    """
+    Formats rows start:end of converted revenue columns (see RateTable.convert_column)
+    as one "|<amount>|<amount>...\n" line ending per row.
+    """
+    columns = [map('{:.2f}'.format, column[start:end]) for column in converted.values()]
+    return ["|" + "|".join(values) + "\n" for values in zip(*columns)]
+
+def _table_line_chunks(table, size=CHUNK_ROWS, converted=None):
+    """
+    Serializes an enriched TransactionTable column-wise: the API fields are
+    formatted once per ProductID and each chunk is joined with C-level maps.
+    converted: optional dict currency -> revenue column, appended to each row.
+    """
+    newline = "\n" if converted is None else ""
+    api_suffix = [_api_columns(info) + newline for info in table.product_info]
+    for start in range(0, len(table), size):
+        end = min(start + size, len(table))
+        product_codes = table.product_ids.codes[start:end]
+        lines = map("|".join, zip(
+            table.transaction_ids[start:end],
+            map(table.dates.values.__getitem__, table.dates.codes[start:end]),
+            map(table.product_ids.values.__getitem__, product_codes),
+            map(table.product_names.values.__getitem__, table.product_names.codes[start:end]),
+            map(str, table.quantity[start:end]),
+            map(str, table.unit_price[start:end]),
+            map(table.customer_ids.values.__getitem__, table.customer_ids.codes[start:end]),
+            map(table.regions.values.__getitem__, table.regions.codes[start:end]),
+            map(api_suffix.__getitem__, product_codes)))
+        if converted is not None:
+            lines = map(str.__add__, lines, _converted_suffixes(converted, start, end))
+        yield list(lines)
+
+def _converted_line_chunks(enriched_transactions, rates, currencies):
+    """
+    Serializes enriched row dicts chunk by chunk, each chunk's revenue
+    converted into every currency with one RateTable.convert_column call.
+    """
+    for rows in chunked(enriched_transactions):
+        amounts = array('d', [t.get('Quantity', 0) * t.get('UnitPrice', 0.0) for t in rows])
+        converted = rates.convert_column(amounts, currencies)
+        yield list(map(str.__add__, (_enriched_line(t)[:-1] for t in rows),
+                       _converted_suffixes(converted, 0, len(rows))))
+
+@instrumented
+def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt', file_format='text',
+                       compression=None, rates=None, currencies=None):
     """
     Saves enriched transactions back to a pipe-delimited file.
+    Accepts a list, an enriched TransactionTable or a generator of rows (see
+    iter_enriched_sales), which is written as it is consumed. Rows are
+    serialized in chunks with one large write() each.
+    compression: "gzip" or "zstd" (default: inferred from a .gz/.zst filename)
+    rates/currencies: a RateTable and currency codes; each row then also gets
+    its revenue (Quantity * UnitPrice) in every currency as Revenue_<code>
+    columns (text format only).
+    file_format="columnar" writes a binary columnar directory instead
+    (see utils.columnar_cache.load_table to read it back).
     """
+    if file_format == 'columnar':
+        _save_enriched_columnar(enriched_transactions, filename)
+        return
+
     # Requirement: Include new columns in header
     header = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
-    
+    # Currencies without a rate are already reported by the console summary
+    currencies = [c for c in currencies or () if rates is not None and rates.rate(c) is not None]
+    if currencies:
+        header = header[:-1] + "".join(f"|Revenue_{c}" for c in currencies) + "\n"
+
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
+        if isinstance(enriched_transactions, TransactionTable) and enriched_transactions.product_info is not None:
+            converted = rates.convert_column(enriched_transactions.revenue, currencies) if currencies else None
+            chunks = _table_line_chunks(enriched_transactions, converted=converted)
+        elif currencies:
+            chunks = _converted_line_chunks(enriched_transactions, rates, currencies)
+        else:
+            chunks = chunked(map(_enriched_line, enriched_transactions))
+        with open_text_output(filename, compression) as f:
             f.write(header)
-            for t in enriched_transactions:
-                # Handle None values by converting them to empty strings
-                line = [
-                    str(t.get('TransactionID', '')),
-                    str(t.get('Date', '')),
-                    str(t.get('ProductID', '')),
-                    str(t.get('ProductName', '')),
-                    str(t.get('Quantity', 0)),
-                    str(t.get('UnitPrice', 0.0)),
-                    str(t.get('CustomerID', '')),
-                    str(t.get('Region', '')),
-                    str(t.get('API_Category') if t.get('API_Category') else ""),
-                    str(t.get('API_Brand') if t.get('API_Brand') else ""),
-                    str(t.get('API_Rating') if t.get('API_Rating') else ""),
-                    str(t.get('API_Match', False))
-                ]
-                f.write("|".join(line) + "\n")
+            write_chunks(f, chunks)
         print(f"Enriched data successfully saved to {filename}")
     except Exception as e:
         print(f"Error saving enriched data: {e}")
+
+def _save_enriched_columnar(enriched_transactions, path):
+    try:
+        table = enriched_transactions
+        if not isinstance(table, TransactionTable):
+            # One pass, so a generator is consumed only once
+            table = TransactionTable()
+            info = {}
+            for t in enriched_transactions:
+                table.append_record(t)
+                if t['ProductID'] not in info:
+                    info[t['ProductID']] = {field: t.get(field) for field in API_FIELDS}
+            table.product_info = [info[pid] for pid in table.product_ids.values]
+        save_table(table, path)
+        print(f"Enriched data successfully saved to {path}")
+    except Exception as e:
+        print(f"Error saving enriched data: {e}")
     
-def fetch_all_products():
+def create_session(pool_size=FETCH_WORKERS, retries=3, backoff=0.5):
     """
-    Fetches all products from DummyJSON API using limit=100.
+    Creates a requests.Session with a connection pool sized for pool_size
+    concurrent requests and automatic retry with exponential backoff.
     """
-    url = "https://dummyjson.com/products?limit=100"
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff,
+                  status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(['GET']))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+@instrumented
+def fetch_all_products(ttl=PRODUCTS_TTL, offline=None, page_size=100, max_workers=FETCH_WORKERS,
+                       base_url=DUMMYJSON_URL, session=None, log=print, with_fetched_at=False):
+    """
+    Fetches all products from DummyJSON API, paging with skip/limit.
+    The first page reports the catalog 'total'; the remaining pages are
+    fetched concurrently (at most max_workers at once) over one pooled
+    session. Pages are cached locally with the same ttl/offline options as
+    get_currency_rate. base_url lets tests point at a local stub server.
+    log: receives the status message, as in get_currency_rate.
+    with_fetched_at: return (products, fetched_at), where fetched_at is when
+    the oldest page was fetched (earlier than now for cached pages).
+    """
+    url = f"{base_url}/products"
+    own_session = session is None
+    if own_session:
+        session = create_session(max_workers)
+
+    def fetch_page(skip):
+        return cached_get_json(url, params={'limit': page_size, 'skip': skip}, ttl=ttl,
+                               stale_while_revalidate=_stale_window(ttl), offline=offline, timeout=10,
+                               session=session, with_fetched_at=True)
     
     try:
-        # Attempt to get data from API
-        response = requests.get(url, timeout=10)
-        
-        # Check if the request was successful (Status Code 200)
-        response.raise_for_status()
-        
-        data = response.json()
-        raw_products = data.get('products', [])
+        # Attempt to get data from the cache or the API (raises on HTTP errors)
+        first_page, fetched_at = fetch_page(0)
+        raw_products = list(first_page.get('products', []))
+        total = first_page.get('total', len(raw_products))
+
+        # map() keeps page order, so products stay sorted as the API returns them
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for page, page_fetched_at in executor.map(fetch_page, range(page_size, total, page_size)):
+                raw_products.extend(page.get('products', []))
+                fetched_at = min(fetched_at, page_fetched_at)
         
         # Format the products to match the Expected Output Format
         formatted_products = []
@@ -136,10 +324,13 @@ def fetch_all_products():
                 'rating': p.get('rating')
             })
             
-        print(f"Successfully fetched {len(formatted_products)} products from API.")
-        return formatted_products
+        log(f"Successfully fetched {len(formatted_products)} products from API.")
+        return (formatted_products, fetched_at) if with_fetched_at else formatted_products
 
     except requests.exceptions.RequestException as e:
         # Proper error handling (Requirement)
-        print(f"API Failure: Could not connect to DummyJSON. Error: {e}")
-        return [] # Return empty list if API fails (Requirement)
\ No newline at end of file
+        log(f"API Failure: Could not connect to DummyJSON. Error: {e}")
+        return ([], None) if with_fetched_at else [] # Return empty list if API fails (Requirement)
+    finally:
+        if own_session:
+            session.close()
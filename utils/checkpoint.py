@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+
+from utils.file_handler import detect_encoding, data_start_offset, complete_lines_end
+from utils.data_processor import print_cleaning_stats, validate_and_filter
+from utils.mmap_parser import parse_line_range
+from utils.sales_aggregate import SalesAggregate, aggregate_sales
+
+DEFAULT_CHECKPOINT = '.cache/sales_checkpoint.json'
+CHECKPOINT_VERSION = 2 # Checkpoints of other versions are rebuilt from scratch
+HEAD_BYTES = 4096 # Leading bytes fingerprinted to detect a replaced/rotated file
+
+
+def _head_hash(filename, length):
+    with open(filename, 'rb') as file:
+        return hashlib.sha256(file.read(length)).hexdigest()
+
+
+def load_checkpoint(path):
+    """
+    Returns: checkpoint dict, or None if missing or unreadable
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_checkpoint(path, checkpoint):
+    """
+    Writes the checkpoint atomically so an interrupted run never leaves a
+    half-written file behind.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def _resumable(checkpoint, filename, size, filters):
+    """
+    A checkpoint is reused only for the same file that has only grown, and
+    only with the filters its filtered aggregate was built with.
+    """
+    if not checkpoint or checkpoint.get('version') != CHECKPOINT_VERSION:
+        return False
+    if checkpoint.get('source') != os.path.abspath(filename):
+        return False
+    if checkpoint.get('filters') != filters:
+        return False
+    if checkpoint['offset'] > size:
+        return False # Truncated or replaced
+    return checkpoint['head_hash'] == _head_hash(filename, checkpoint['head_length'])
+
+
+def incremental_aggregate(filename, checkpoint_path=DEFAULT_CHECKPOINT, region=None, min_amount=None,
+                          max_amount=None):
+    """
+    Updates the saved aggregates with the lines appended since the last run.
+    Only the tail after the checkpointed offset is parsed; complete lines
+    only, so a row still being written is picked up next time. If the file
+    was truncated or replaced, or the filters changed, the aggregates are
+    rebuilt from scratch.
+    region/min_amount/max_amount: filters of the second aggregate, the same
+    as validate_and_filter applies to the summary report of a full run.
+    Prints cumulative cleaning stats.
+    Returns: tuple (SalesAggregate, filtered SalesAggregate, new_rows_parsed)
+    """
+    try:
+        size = os.path.getsize(filename)
+    except FileNotFoundError:
+        print(f"Error: The file '{filename}' was not found.")
+        return SalesAggregate(), SalesAggregate(), 0
+
+    filters = {'region': region, 'min_amount': min_amount, 'max_amount': max_amount}
+    checkpoint = load_checkpoint(checkpoint_path)
+    if _resumable(checkpoint, filename, size, filters):
+        agg = SalesAggregate.from_dict(checkpoint['aggregate'])
+        filtered_agg = SalesAggregate.from_dict(checkpoint['filtered_aggregate'])
+        start = checkpoint['offset']
+        encoding = checkpoint['encoding']
+        total_parsed = checkpoint['total_parsed']
+        invalid_count = checkpoint['invalid_count']
+        print(f"Resuming from checkpoint: {total_parsed} rows already processed")
+    else:
+        agg = SalesAggregate()
+        filtered_agg = SalesAggregate()
+        start = data_start_offset(filename)
+        encoding = detect_encoding(filename)
+        total_parsed = 0
+        invalid_count = 0
+        print("No usable checkpoint: processing the whole file")
+
+    end = complete_lines_end(filename, start, size)
+    table, parsed, invalid = parse_line_range(filename, start, end, encoding)
+    agg.merge(aggregate_sales(table))
+    if len(table):
+        filtered, _, _ = validate_and_filter(table, region=region, min_amount=min_amount, max_amount=max_amount)
+        filtered_agg.merge(aggregate_sales(filtered))
+    total_parsed += parsed
+    invalid_count += invalid
+
+    head_length = min(end, HEAD_BYTES)
+    save_checkpoint(checkpoint_path, {
+        'version': CHECKPOINT_VERSION,
+        'source': os.path.abspath(filename),
+        'offset': end,
+        'head_length': head_length,
+        'head_hash': _head_hash(filename, head_length),
+        'encoding': encoding,
+        'total_parsed': total_parsed,
+        'invalid_count': invalid_count,
+        'aggregate': agg.to_dict(),
+        'filters': filters,
+        'filtered_aggregate': filtered_agg.to_dict()
+    })
+
+    print(f"New rows parsed this run: {parsed}")
+    print_cleaning_stats(total_parsed, invalid_count, agg.transaction_count)
+    return agg, filtered_agg, parsed
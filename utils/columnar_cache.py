@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sys
+from array import array
+
+from utils.transaction_table import DictionaryColumn, TransactionTable
+from utils.data_processor import print_cleaning_stats
+from utils.mmap_parser import parse_file
+from utils.parallel_processor import parallel_parse
+from utils.profiler import instrumented
+
+CACHE_DIR = os.environ.get('SALES_COLUMNAR_CACHE', '.cache/columnar')
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+NUMERIC_COLUMNS = ['quantity', 'unit_price', 'revenue']
+
+
+def source_fingerprint(filename, with_hash=True):
+    """
+    Returns: dict with the size, mtime and (optionally) SHA-256 of a file
+    """
+    stat = os.stat(filename)
+    fingerprint = {'path': os.path.abspath(filename), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        fingerprint['sha256'] = digest.hexdigest()
+    return fingerprint
+
+
+def default_cache_path(filename):
+    """
+    Cache directory for a source file: <CACHE_DIR>/<stem>-<hash of its absolute path>
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    key = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()[:10]
+    return os.path.join(CACHE_DIR, f"{stem}-{key}")
+
+
+def _write_strings(path, values):
+    # Values come from newline-split lines, so '\n' is a safe separator
+    with open(path, 'wb') as f:
+        f.write('\n'.join(values).encode('utf-8'))
+
+
+def _read_strings(path, count):
+    if count == 0:
+        return []
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8').split('\n')
+
+
+def _read_array(path, typecode, count, byteorder):
+    values = array(typecode)
+    with open(path, 'rb') as f:
+        values.fromfile(f, count)
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    return values
+
+
+def save_table(table, path, source=None, stats=None):
+    """
+    Writes a TransactionTable as one binary file per column plus meta.json.
+    Numbers and dictionary codes are raw array('q'/'d'/'I') dumps, so loading
+    is a few fromfile() calls; strings are stored once per distinct value.
+    source: source_fingerprint() of the input file, recorded for validation
+    stats: optional cleaning stats (total_parsed, invalid_count) to replay
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path) # The cache is invalid until the new meta.json lands
+
+    columns = {}
+    for attr in TransactionTable.CODED_FIELDS.values():
+        column = getattr(table, attr)
+        with open(os.path.join(path, f"{attr}.codes"), 'wb') as f:
+            column.codes.tofile(f)
+        _write_strings(os.path.join(path, f"{attr}.values"), column.values)
+        columns[attr] = {'typecode': column.codes.typecode, 'values': len(column.values)}
+    for attr in NUMERIC_COLUMNS:
+        values = getattr(table, attr)
+        with open(os.path.join(path, f"{attr}.bin"), 'wb') as f:
+            values.tofile(f)
+        columns[attr] = {'typecode': values.typecode}
+    _write_strings(os.path.join(path, 'transaction_ids.values'), table.transaction_ids)
+
+    meta = {
+        'version': FORMAT_VERSION,
+        'rows': len(table),
+        'byteorder': sys.byteorder,
+        'columns': columns,
+        'product_info': table.product_info,
+        'source': source,
+        'stats': list(stats) if stats else None
+    }
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def load_meta(path):
+    """
+    Returns: the cache's meta dict, or None if missing, unreadable or from another format version
+    """
+    try:
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if meta.get('version') == FORMAT_VERSION else None
+
+
+def is_fresh(meta, source):
+    """
+    A cache matches its source when size and mtime are unchanged; if only the
+    mtime moved (e.g. the file was touched or copied), the SHA-256 decides.
+    """
+    recorded = meta.get('source') if meta else None
+    if not recorded:
+        return False
+    try:
+        current = source_fingerprint(source, with_hash=False)
+    except FileNotFoundError:
+        return False
+    if current['size'] != recorded['size']:
+        return False
+    if current['mtime_ns'] == recorded['mtime_ns']:
+        return True
+    return source_fingerprint(source)['sha256'] == recorded.get('sha256')
+
+
+def load_table(path, source=None):
+    """
+    Loads a table written by save_table.
+    source: if given, the cache is only used when it still matches this file
+    Returns: TransactionTable (enriched if it was saved enriched), or None
+    """
+    meta = load_meta(path)
+    if meta is None or (source is not None and not is_fresh(meta, source)):
+        return None
+
+    rows = meta['rows']
+    byteorder = meta['byteorder']
+    columns = meta['columns']
+    try:
+        table = TransactionTable()
+        for attr in TransactionTable.CODED_FIELDS.values():
+            info = columns[attr]
+            codes = _read_array(os.path.join(path, f"{attr}.codes"), info['typecode'], rows, byteorder)
+            values = _read_strings(os.path.join(path, f"{attr}.values"), info['values'])
+            setattr(table, attr, DictionaryColumn.from_values(values, codes))
+        for attr in NUMERIC_COLUMNS:
+            setattr(table, attr, _read_array(os.path.join(path, f"{attr}.bin"), columns[attr]['typecode'],
+                                             rows, byteorder))
+        table.transaction_ids = _read_strings(os.path.join(path, 'transaction_ids.values'), rows)
+    except (OSError, EOFError, KeyError, ValueError):
+        return None # Incomplete or corrupted cache: treat as a miss
+
+    if meta.get('product_info') is not None:
+        table = table.with_product_info(meta['product_info'])
+    return table
+
+
+@instrumented
+def load_cleaned_table(filename, workers=1, cache_path=None):
+    """
+    Returns the cleaned TransactionTable for a sales file: from the columnar
+    cache when it still matches the file, otherwise by parsing it (in
+    parallel if workers > 1) and refreshing the cache.
+    The cleaning stats are printed either way, as clean_data does.
+    """
+    cache_path = cache_path or default_cache_path(filename)
+    table = load_table(cache_path, source=filename)
+    if table is not None:
+        total_parsed, invalid_count = load_meta(cache_path)['stats']
+        print(f"✓ Loaded {len(table)} cleaned records from cache {cache_path}")
+        print_cleaning_stats(total_parsed, invalid_count, len(table))
+        return table
+
+    try:
+        source = source_fingerprint(filename) # Taken first, so later appends invalidate the cache
+        if workers > 1:
+            table, total_parsed, invalid_count = parallel_parse(filename, workers, as_table=True)
+        else:
+            table, total_parsed, invalid_count = parse_file(filename)
+    except FileNotFoundError:
+        print(f"Error: The file '{filename}' was not found.")
+        print_cleaning_stats(0, 0, 0)
+        return TransactionTable()
+    print_cleaning_stats(total_parsed, invalid_count, len(table))
+
+    try:
+        save_table(table, cache_path, source=source, stats=(total_parsed, invalid_count))
+    except OSError as e:
+        print(f"Warning: could not write columnar cache {cache_path}: {e}")
+    return table
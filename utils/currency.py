@@ -0,0 +1,98 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; conversions fall back to plain Python
+    np = None
+
+FALLBACK_RATES = {'EUR': 0.85} # Same fallback as get_currency_rate (from USD)
+CURRENCY_SYMBOLS = {'USD': '$', 'EUR': '€', 'GBP': '£', 'JPY': '¥', 'INR': '₹'}
+
+
+def format_money(amount, currency):
+    """
+    Returns: e.g. "€1,234.50", or "CHF 1,234.50" for currencies without a symbol
+    """
+    symbol = CURRENCY_SYMBOLS.get(currency, currency + ' ')
+    return f"{symbol}{amount:,.2f}"
+
+
+class RateTable:
+    """
+    Every exchange rate from one base currency, as returned by a single
+    latest/{base} request (see api_handler.fetch_rate_table). Conversions
+    into any number of target currencies use the table in memory, so no
+    HTTP call is made per amount, region or currency.
+    """
+
+    def __init__(self, base, rates, fallback=False):
+        self.base = base
+        self.rates = dict(rates)
+        self.rates[base] = 1.0
+        self.fallback = fallback # True when the API failed and FALLBACK_RATES are used
+
+    def rate(self, currency):
+        """
+        Returns: float units of `currency` per unit of the base, or None if unknown
+        """
+        return self.rates.get(currency)
+
+    def available(self, currencies):
+        """
+        Keeps the currencies the table has a rate for, warning about the rest.
+        Returns: list of currency codes
+        """
+        known = []
+        for currency in currencies:
+            if currency in self.rates:
+                known.append(currency)
+            else:
+                print(f"Warning: No exchange rate for {currency}, skipping it")
+        return known
+
+    def _rate_vector(self, currencies):
+        # Currencies without a rate are left out of every conversion
+        currencies = [c for c in currencies if c in self.rates]
+        return currencies, [self.rates[c] for c in currencies]
+
+    def convert(self, amount, currencies):
+        """
+        Returns: dict currency -> amount in that currency
+        """
+        currencies, rates = self._rate_vector(currencies)
+        return {c: amount * r for c, r in zip(currencies, rates)}
+
+    def convert_totals(self, totals, currencies):
+        """
+        Converts a dict of base-currency amounts (e.g. revenue per region)
+        into every currency at once: one outer product of amounts x rates.
+        Returns: dict key -> {currency: amount}
+        """
+        keys = list(totals)
+        currencies, rates = self._rate_vector(currencies)
+        if np is not None and keys:
+            matrix = np.outer(np.fromiter(totals.values(), dtype=np.float64, count=len(keys)), rates).tolist()
+        else:
+            matrix = [[amount * r for r in rates] for amount in totals.values()]
+        return {key: dict(zip(currencies, row)) for key, row in zip(keys, matrix)}
+
+    def convert_column(self, values, currencies):
+        """
+        Converts a column of base-currency amounts (e.g. TransactionTable.revenue)
+        row by row into every currency. With NumPy the array('d') is read
+        without copying and each currency is one vectorized multiply.
+        Returns: dict currency -> array('d')
+        """
+        currencies, rates = self._rate_vector(currencies)
+        if np is not None and isinstance(values, array) and values.typecode == 'd':
+            column = np.frombuffer(values, dtype=np.float64) if len(values) else np.zeros(0)
+            return {c: array('d', (column * r).tobytes()) for c, r in zip(currencies, rates)}
+        return {c: array('d', [v * r for v in values]) for c, r in zip(currencies, rates)}
+
+
+def print_converted_totals(amount, rates, currencies):
+    """
+    Prints a base-currency total in each requested currency (one line each).
+    """
+    for currency, converted in rates.convert(amount, rates.available(currencies)).items():
+        print(f"Total Revenue ({currency}): {format_money(converted, currency)} (at rate {rates.rate(currency)})")
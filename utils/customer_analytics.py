@@ -0,0 +1,223 @@
+from array import array
+from bisect import bisect_left
+from datetime import date
+
+from utils.transaction_table import TransactionTable, DictionaryColumn
+from utils.profiler import instrumented
+
+
+def bit_positions(mask):
+    """
+    Yields the positions of the set bits of an int, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def insert_code(codes, code):
+    """
+    Adds a code to a sorted array('I') of distinct codes (no-op if present).
+    """
+    i = bisect_left(codes, code)
+    if i == len(codes) or codes[i] != code:
+        codes.insert(i, code)
+
+
+class CustomerAnalytics:
+    """
+    Per-customer purchase history in integer-coded form, built in one pass
+    by analyze_customers(). Customers, products and purchase days are
+    dictionary-encoded; each customer keeps running totals in typed arrays,
+    the products it bought as a sorted array('I') of product codes (sized
+    by what it bought, not by the catalog) and the months it bought in as
+    an int bitmap over the few month codes. Baskets (one customer on one
+    day) are counted per (customer, day) pair, so memory grows with
+    distinct keys, not with rows.
+    """
+
+    def __init__(self):
+        self.customers = DictionaryColumn() # Only the value <-> code mapping is used
+        self.products = DictionaryColumn()
+        self.days = DictionaryColumn()
+        self.months = DictionaryColumn() # 'YYYY-MM'
+
+        # Indexed by customer code
+        self.purchase_count = array('I')
+        self.total_spent = array('d')
+        self.product_codes = [] # Sorted array('I') of product codes per customer
+        self.month_bits = []
+
+        self.baskets = {} # customer code << 32 | day code -> transaction lines (int keys are smaller than tuples)
+        self._day_month_bit = [] # Day code -> bit of its month (0 if the date is invalid)
+
+    def _customer_code(self, customer):
+        code = self.customers.encode(customer)
+        if code == len(self.purchase_count):
+            self.purchase_count.append(0)
+            self.total_spent.append(0.0)
+            self.product_codes.append(array('I'))
+            self.month_bits.append(0)
+        return code
+
+    def _day_code(self, day):
+        code = self.days.encode(day)
+        if code == len(self._day_month_bit):
+            # Each distinct date is parsed once
+            try:
+                parsed = date.fromisoformat(day)
+                month = f"{parsed.year:04d}-{parsed.month:02d}"
+            except ValueError:
+                self._day_month_bit.append(0)
+            else:
+                self._day_month_bit.append(1 << self.months.encode(month))
+        return code
+
+    def add_values(self, customer, product, day, amount):
+        """
+        Folds one row into the customer's history.
+        """
+        c = self._customer_code(customer)
+        d = self._day_code(day)
+        self.purchase_count[c] += 1
+        self.total_spent[c] += amount
+        insert_code(self.product_codes[c], self.products.encode(product))
+        self.month_bits[c] |= self._day_month_bit[d]
+        key = c << 32 | d
+        self.baskets[key] = self.baskets.get(key, 0) + 1
+
+    def add_table(self, table):
+        """
+        Folds a TransactionTable in, translating its dictionary codes once
+        per distinct value instead of looking up strings per row.
+        """
+        customer_map = [self._customer_code(v) for v in table.customer_ids.values]
+        product_map = [self.products.encode(v) for v in table.product_names.values]
+        day_map = [self._day_code(v) for v in table.dates.values]
+        month_bit = [self._day_month_bit[d] for d in day_map]
+
+        purchase_count, total_spent = self.purchase_count, self.total_spent
+        product_codes, month_bits, baskets = self.product_codes, self.month_bits, self.baskets
+        for c, p, d, amount in zip(table.customer_ids.codes, table.product_names.codes,
+                                   table.dates.codes, table.revenue):
+            code = customer_map[c]
+            purchase_count[code] += 1
+            total_spent[code] += amount
+            codes, product = product_codes[code], product_map[p]
+            i = bisect_left(codes, product) # insert_code, inlined for the per-row loop
+            if i == len(codes) or codes[i] != product:
+                codes.insert(i, product)
+            month_bits[code] |= month_bit[d]
+            key = code << 32 | day_map[d]
+            baskets[key] = baskets.get(key, 0) + 1
+
+    def __len__(self):
+        return len(self.purchase_count)
+
+    def products_bought(self, customer):
+        """
+        Returns: sorted list of the product names a customer bought
+        """
+        code = self.customers.code_of(customer)
+        if code is None:
+            return []
+        names = self.products.values
+        return sorted(names[p] for p in self.product_codes[code])
+
+    def unique_products(self, customer):
+        code = self.customers.code_of(customer)
+        return 0 if code is None else len(self.product_codes[code])
+
+    def _month_index(self):
+        # Month code -> months since year 0, so month differences are plain subtraction
+        return [int(m[:4]) * 12 + int(m[5:7]) - 1 for m in self.months.values]
+
+    def cohorts(self):
+        """
+        Groups customers by the month of their first purchase.
+        Returns: dict cohort month -> list of sets of month offsets, one per customer
+        """
+        index = self._month_index()
+        labels = self.months.values
+        cohorts = {}
+        for mask in self.month_bits:
+            if not mask:
+                continue # Only undated purchases
+            codes = list(bit_positions(mask))
+            first = min(codes, key=index.__getitem__)
+            cohorts.setdefault(labels[first], []).append({index[m] - index[first] for m in codes})
+        return dict(sorted(cohorts.items()))
+
+    def retention_matrix(self):
+        """
+        Share of each first-purchase cohort that bought again N months later.
+        Returns: dict cohort month -> {'customers', 'active' (count per month
+        offset 0, 1, ...), 'retention' (% of the cohort per offset)}
+        """
+        index = self._month_index()
+        last = max(index) if index else 0
+        matrix = {}
+        for cohort, members in self.cohorts().items():
+            start = int(cohort[:4]) * 12 + int(cohort[5:7]) - 1
+            active = [0] * (last - start + 1) # Up to the latest month in the data
+            for offsets in members:
+                for k in offsets:
+                    active[k] += 1
+            matrix[cohort] = {
+                'customers': len(members),
+                'active': active,
+                'retention': [round(n / len(members) * 100, 2) for n in active]
+            }
+        return matrix
+
+    def repeat_distribution(self):
+        """
+        Number of customers by how many separate days they purchased on.
+        Returns: tuple (dict visits -> customers, ascending; repeat rate in %)
+        """
+        visits = [0] * len(self)
+        for key in self.baskets:
+            visits[key >> 32] += 1
+        distribution = {}
+        for n in visits:
+            distribution[n] = distribution.get(n, 0) + 1
+        repeaters = sum(count for n, count in distribution.items() if n > 1)
+        repeat_rate = round(repeaters / len(self) * 100, 2) if len(self) else 0.0
+        return dict(sorted(distribution.items())), repeat_rate
+
+    def basket_size_distribution(self):
+        """
+        Number of baskets (one customer, one day) by transaction lines.
+        Returns: tuple (dict lines -> baskets, ascending; average lines per basket)
+        """
+        distribution = {}
+        for lines in self.baskets.values():
+            distribution[lines] = distribution.get(lines, 0) + 1
+        average = round(sum(self.purchase_count) / len(self.baskets), 2) if self.baskets else 0.0
+        return dict(sorted(distribution.items())), average
+
+
+@instrumented
+def analyze_customers(transactions):
+    """
+    Builds CustomerAnalytics in one streaming pass.
+    Accepts transaction dicts (a list or a lazy iterator) or a TransactionTable.
+    Returns: CustomerAnalytics
+    """
+    analytics = CustomerAnalytics()
+    if isinstance(transactions, TransactionTable):
+        analytics.add_table(transactions)
+        return analytics
+    for t in transactions:
+        analytics.add_values(t['CustomerID'], t['ProductName'], t['Date'], t['Quantity'] * t['UnitPrice'])
+    return analytics
+
+
+def as_customer_analytics(data):
+    """
+    Accepts either transactions or a ready CustomerAnalytics.
+    """
+    if isinstance(data, CustomerAnalytics):
+        return data
+    return analyze_customers(data)
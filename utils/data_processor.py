@@ -1,68 +1,37 @@
-def clean_data(raw_lines):
-    valid_records = []
+from datetime import datetime
+from collections import Counter
+
+from utils.sales_aggregate import as_aggregate
+from utils.transaction_table import TransactionTable
+from utils.transaction_index import TransactionIndex
+from utils.profiler import instrumented
+from utils.topk import top_k, bottom_k
+from utils.customer_analytics import as_customer_analytics
+from utils.market_basket import basket_pair_counts, BY_CUSTOMER
+from utils.currency import format_money
+from utils.report_engine import ReportEngine, Section, digest, REPORT_CACHE
+from utils.time_windows import daily_series, period_rollup, rolling_metrics, day_over_day, MONTHLY, WEEKLY
+
+def clean_lines(raw_lines, as_table=False):
+    """
+    Parses and validates raw lines without printing anything.
+    Shared by clean_data and the parallel chunk workers.
+    Returns: tuple (valid_records, total_parsed, invalid_count)
+    """
+    valid_records = TransactionTable() if as_table else []
     invalid_count = 0
-    total_parsed = len(raw_lines)
+    total_parsed = 0
 
     for line in raw_lines:
-        parts = line.split('|') # Requirement: Split by pipe delimiter 
-        
-        if len(parts) < 8:
+        total_parsed += 1
+        parts = line.split('|') # Requirement: Split by pipe delimiter
+        if len(parts) != 8: # Extra delimiters would break the unpacking below
             invalid_count += 1
             continue
 
         tid, date, pid, pname, qty, price, cid, region = parts
 
-        # Requirement: Handle commas in ProductNames and Numbers 
-        pname = pname.replace(',', '')
-        qty_str = qty.replace(',', '')
-        price_str = price.replace(',', '')
-
-        try:
-            qty_val = int(qty_str)
-            price_val = float(price_str.replace(',', '')) # Handle potential commas in prices 
-
-            # Requirement: Validation Rules 
-            if (tid.startswith('T') and # TransactionID must start with 'T'
-                qty_val > 0 and          # Quantity > 0
-                price_val > 0 and        # UnitPrice > 0
-                cid.strip() != "" and    # Missing CustomerID -> Remove
-                region.strip() != ""):   # Missing Region -> Remove
-                
-                # Matching the "Expected Output Format" from your screenshot
-                valid_records.append({
-                    'TransactionID': tid,
-                    'Date': date,
-                    'ProductID': pid,
-                    'ProductName': pname,
-                    'Quantity': qty_val,
-                    'UnitPrice': price_val,
-                    'CustomerID': cid,
-                    'Region': region
-                })
-            else:
-                invalid_count += 1
-        except ValueError:
-            invalid_count += 1
-
-    # Required Validation Output 
-    print(f"Total records parsed: {total_parsed}")
-    print(f"Invalid records removed: {invalid_count}")
-    print(f"Valid records after cleaning: {len(valid_records)}")
-    
-    return valid_records
-
-def clean_data(raw_lines):
-    valid_records = []
-    invalid_count = 0
-    total_parsed = len(raw_lines)
-
-    for line in raw_lines:
-        parts = line.split('|')
-        if len(parts) < 8:
-            invalid_count += 1
-            continue
-
-        tid, date, pid, pname, qty, price, cid, region = parts
+        # Requirement: Handle commas in ProductNames and Numbers
         pname = pname.replace(',', '')
         qty_str = qty.replace(',', '')
         price_str = price.replace(',', '')
@@ -71,9 +40,14 @@ def clean_data(raw_lines):
             qty_val = int(qty_str)
             price_val = float(price_str)
 
+            # Requirement: Validation Rules
             if (tid.startswith('T') and qty_val > 0 and price_val > 0 and 
                 cid.strip() != "" and region.strip() != ""):
                 
+                if as_table:
+                    valid_records.append(tid, date, pid, pname, qty_val, price_val, cid, region)
+                    continue
+
                 valid_records.append({
                     'TransactionID': tid,
                     'Date': date,
@@ -89,10 +63,26 @@ def clean_data(raw_lines):
         except ValueError:
             invalid_count += 1
 
+    return valid_records, total_parsed, invalid_count
+
+def print_cleaning_stats(total_parsed, invalid_count, valid_count):
+    # Required Validation Output
     print(f"Total records parsed: {total_parsed}")
     print(f"Invalid records removed: {invalid_count}")
-    print(f"Valid records after cleaning: {len(valid_records)}")
+    print(f"Valid records after cleaning: {valid_count}")
+
+@instrumented
+def clean_data(raw_lines, as_table=False):
+    """
+    Parses and validates raw lines into transaction dicts.
+    Accepts a list or a lazy iterator (e.g. read_sales_data(..., stream=True)).
+    With as_table=True the records are stored in a columnar TransactionTable.
+    """
+    valid_records, total_parsed, invalid_count = clean_lines(raw_lines, as_table)
+    print_cleaning_stats(total_parsed, invalid_count, len(valid_records))
     return valid_records
+
+@instrumented
 def calculate_total_revenue(transactions):
     """
     Calculates total revenue from all transactions.
@@ -106,7 +96,23 @@ def calculate_total_revenue(transactions):
     
     return float(total)
 #Task 1.3: Data Validation and Filtering 
+@instrumented
 def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Drops rows failing the T/P/C prefix checks, then filters by region and
+    transaction amount. Pass a TransactionIndex to answer repeated filters
+    with index lookups instead of a full scan.
+    Returns: tuple (transactions, invalid_count, summary)
+    """
+    if isinstance(transactions, TransactionIndex):
+        index = transactions
+        print("\n--- Data Validation & Filtering ---")
+        print(f"Available Regions: {', '.join(index.all_regions)}")
+        print(f"Transaction Amount Range: ${index.min_amount:,.2f} to ${index.max_amount:,.2f}")
+        return index.query(region, min_amount, max_amount)
+    if isinstance(transactions, TransactionTable):
+        return _validate_and_filter_table(transactions, region, min_amount, max_amount)
+
     valid_transactions = []
     invalid_count = 0
     total_input = len(transactions)
@@ -154,152 +160,181 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     }
     return valid_transactions, invalid_count, summary
 
+def _validate_and_filter_table(table, region, min_amount, max_amount):
+    """
+    validate_and_filter over a TransactionTable's columns: prefix checks run
+    once per distinct ProductID/CustomerID and amounts come from the revenue
+    column, so row dicts are only built for the rows that are kept.
+    """
+    amounts = table.revenue
+    print("\n--- Data Validation & Filtering ---")
+    print(f"Available Regions: {', '.join(sorted(set(table.regions.values)))}")
+    print(f"Transaction Amount Range: ${min(amounts):,.2f} to ${max(amounts):,.2f}")
+
+    product_ok = [v.startswith('P') for v in table.product_ids.values]
+    customer_ok = [v.startswith('C') for v in table.customer_ids.values]
+    product_codes = table.product_ids.codes
+    customer_codes = table.customer_ids.codes
+    region_codes = table.regions.codes
+    region_code = table.regions.code_of(region) if region else None
+
+    kept = []
+    invalid_count = 0
+    filtered_by_region = 0
+    filtered_by_amount = 0
+    for i, tid in enumerate(table.transaction_ids):
+        # Strict validation prefixes required by Task 1.3
+        if not (tid.startswith('T') and product_ok[product_codes[i]] and customer_ok[customer_codes[i]]):
+            invalid_count += 1
+            continue
+        if region and region_codes[i] != region_code:
+            filtered_by_region += 1
+            continue
+        amount = amounts[i]
+        if (min_amount is not None and amount < min_amount) or \
+           (max_amount is not None and amount > max_amount):
+            filtered_by_amount += 1
+            continue
+        kept.append(i)
+
+    summary = {
+        'total_input': len(table),
+        'invalid': invalid_count,
+        'filtered_by_region': filtered_by_region,
+        'filtered_by_amount': filtered_by_amount,
+        'final_count': len(kept)
+    }
+    return [table[i] for i in kept], invalid_count, summary
+
+@instrumented
 def calculate_metrics(cleaned_data):
-    total_revenue = sum(item['Quantity'] * item['UnitPrice'] for item in cleaned_data)
-    total_quantity = sum(item['Quantity'] for item in cleaned_data)
+    agg = as_aggregate(cleaned_data)
+    total_revenue = agg.total_revenue
+    total_quantity = agg.total_quantity
     print(f"Total Revenue: ${total_revenue:,.2f}")
     print(f"Total Items Sold: {total_quantity}")
     return total_revenue, total_quantity
 
 #task 2.1 
 # b) Region-wise Sales Analysis
+@instrumented
 def region_wise_sales(transactions):
     """
     Analyzes sales by region and calculates percentages.
+    Accepts transactions or a pre-computed SalesAggregate.
     """
-    overall_total = sum(t['Quantity'] * t['UnitPrice'] for t in transactions)
+    agg = as_aggregate(transactions)
+    overall_total = agg.total_revenue
     region_stats = {}
 
-    # 1. Aggregate data
-    for t in transactions:
-        reg = t['Region']
-        sales = t['Quantity'] * t['UnitPrice']
-        
-        if reg not in region_stats:
-            region_stats[reg] = {'total_sales': 0.0, 'transaction_count': 0}
-        
-        region_stats[reg]['total_sales'] += sales
-        region_stats[reg]['transaction_count'] += 1
-
-    # 2. Calculate percentages
-    for reg in region_stats:
-        total_reg_sales = region_stats[reg]['total_sales']
-        region_stats[reg]['percentage'] = round((total_reg_sales / overall_total) * 100, 2)
+    # 1. Copy the aggregated totals and calculate percentages
+    for reg, data in agg.regions.items():
+        region_stats[reg] = {
+            'total_sales': data['total_sales'],
+            'transaction_count': data['transaction_count'],
+            'percentage': round((data['total_sales'] / overall_total) * 100, 2)
+        }
 
-    # 3. Sort by total_sales descending (Requirement)
+    # 2. Sort by total_sales descending (Requirement)
     sorted_regions = dict(sorted(region_stats.items(), 
                                  key=lambda x: x[1]['total_sales'], 
                                  reverse=True))
     return sorted_regions
 
 # c) Top Selling Products
+@instrumented
 def top_selling_products(transactions, n=5):
     """
     Finds top n products by total quantity sold.
+    Accepts transactions or a pre-computed SalesAggregate.
     """
-    product_data = {}
+    agg = as_aggregate(transactions)
 
-    # 1. Aggregate by ProductName
-    for t in transactions:
-        name = t['ProductName']
-        qty = t['Quantity']
-        rev = qty * t['UnitPrice']
-        
-        if name not in product_data:
-            product_data[name] = {'qty': 0, 'rev': 0.0}
-        
-        product_data[name]['qty'] += qty
-        product_data[name]['rev'] += rev
+    # 1. Select the n products with the highest TotalQuantity (heap, no full sort)
+    best = top_k(agg.products.items(), n, key=lambda x: x[1]['qty'])
 
     # 2. Convert to list of tuples: (Name, TotalQty, TotalRev)
-    product_list = [(name, data['qty'], data['rev']) for name, data in product_data.items()]
-
-    # 3. Sort by TotalQuantity descending
-    product_list.sort(key=lambda x: x[1], reverse=True)
-
-    # 4. Return top n
-    return product_list[:n]
+    return [(name, data['qty'], data['rev']) for name, data in best]
 
 # d) Customer Purchase Analysis
+@instrumented
 def customer_analysis(transactions):
     """
     Analyzes customer purchase patterns.
+    Accepts transactions or a pre-computed SalesAggregate. Approximate
+    aggregates report an estimated 'unique_products' count instead of
+    the 'products_bought' list.
     """
-    cust_stats = {}
-
-    for t in transactions:
-        cid = t['CustomerID']
-        val = t['Quantity'] * t['UnitPrice']
-        prod = t['ProductName']
-        
-        if cid not in cust_stats:
-            cust_stats[cid] = {'total_spent': 0.0, 'purchase_count': 0, 'products': set()}
-        
-        cust_stats[cid]['total_spent'] += val
-        cust_stats[cid]['purchase_count'] += 1
-        cust_stats[cid]['products'].add(prod) # set() ensures uniqueness
+    agg = as_aggregate(transactions)
 
     # Final calculations and formatting
     final_analysis = {}
-    for cid, data in cust_stats.items():
-        avg_val = data['total_spent'] / data['purchase_count']
-        final_analysis[cid] = {
-            'total_spent': round(data['total_spent'], 2),
-            'purchase_count': data['purchase_count'],
-            'avg_order_value': round(avg_val, 2),
-            'products_bought': sorted(list(data['products'])) # Unique list
-        }
+    for cid, data in agg.customers.items():
+        final_analysis[cid] = _customer_stats(data, agg.approximate)
 
     # Sort by total_spent descending
     sorted_customers = dict(sorted(final_analysis.items(), 
                                    key=lambda x: x[1]['total_spent'], 
                                    reverse=True))
     return sorted_customers
+
+@instrumented
+def top_customers(transactions, n=5):
+    """
+    The first n entries of customer_analysis() without analyzing every
+    customer: the top spenders are picked with a heap, and only they get
+    their products_bought list built.
+    Returns: dict CustomerID -> stats, sorted by total_spent descending
+    """
+    agg = as_aggregate(transactions)
+    best = top_k(agg.customers.items(), n, key=lambda x: round(x[1]['total_spent'], 2))
+    return {cid: _customer_stats(data, agg.approximate) for cid, data in best}
+
+def _customer_stats(data, approximate):
+    stats = {
+        'total_spent': round(data['total_spent'], 2),
+        'purchase_count': data['purchase_count'],
+        'avg_order_value': round(data['total_spent'] / data['purchase_count'], 2)
+    }
+    if approximate:
+        # Sketches only know how many distinct products, not which
+        stats['unique_products'] = len(data['products'])
+    else:
+        stats['products_bought'] = sorted(list(data['products'])) # Unique list
+    return stats
 #Data-based Analysis
+@instrumented
 def daily_sales_trend(transactions):
     """
     Analyzes sales trends by date.
+    Accepts transactions or a pre-computed SalesAggregate.
     Returns: dictionary sorted chronologically.
     """
-    daily_stats = {}
-
-    for t in transactions:
-        date = t['Date']
-        revenue = t['Quantity'] * t['UnitPrice']
-        customer = t['CustomerID']
-
-        if date not in daily_stats:
-            # Initialize with a set for unique customers
-            daily_stats[date] = {
-                'revenue': 0.0,
-                'transaction_count': 0,
-                'customers': set() 
-            }
-        
-        daily_stats[date]['revenue'] += revenue
-        daily_stats[date]['transaction_count'] += 1
-        daily_stats[date]['customers'].add(customer)
+    agg = as_aggregate(transactions)
 
     # Format the final dictionary and calculate unique customer count
     formatted_trend = {}
     # Sorting keys (dates) chronologically
-    for date in sorted(daily_stats.keys()):
+    for date in sorted(agg.daily.keys()):
+        day = agg.daily[date]
         formatted_trend[date] = {
-            'revenue': round(daily_stats[date]['revenue'], 2),
-            'transaction_count': daily_stats[date]['transaction_count'],
-            'unique_customers': len(daily_stats[date]['customers'])
+            'revenue': round(day['revenue'], 2),
+            'transaction_count': day['transaction_count'],
+            'unique_customers': len(day['customers'])
         }
 
     return formatted_trend
 
 
+@instrumented
 def find_peak_sales_day(transactions):
     """
     Identifies the date with the highest revenue.
+    Accepts transactions or a pre-computed SalesAggregate.
     Returns: tuple (date, revenue, transaction_count)
     """
-    # Reuse our daily_sales_trend function to get the data
-    trend = daily_sales_trend(transactions)
+    # Reuse our daily_sales_trend view; it only walks the per-day totals
+    trend = daily_sales_trend(as_aggregate(transactions))
     
     if not trend:
         return None
@@ -309,136 +344,483 @@ def find_peak_sales_day(transactions):
     peak_data = trend[peak_date]
 
     return (peak_date, peak_data['revenue'], peak_data['transaction_count'])
+
+# Time windows (dates are converted to ordinal day numbers once per call)
+@instrumented
+def sales_by_period(transactions, period=MONTHLY):
+    """
+    Rolls the daily totals up into ISO weeks (period="week") or months.
+    Accepts transactions or a pre-computed SalesAggregate.
+    Returns: dict period label -> {'revenue', 'transaction_count', 'unique_customers'}, chronological
+    """
+    agg = as_aggregate(transactions)
+    return period_rollup(daily_series(agg), period, agg.approximate, agg.precision)
+
+@instrumented
+def rolling_sales_metrics(transactions, windows=(7, 30)):
+    """
+    Rolling revenue, transaction and unique-customer totals over the last
+    7 and 30 calendar days (or the given window lengths) for every sales day.
+    Accepts transactions or a pre-computed SalesAggregate.
+    Returns: dict date -> {'revenue_7d', 'transactions_7d', 'unique_customers_7d', ...}
+    """
+    agg = as_aggregate(transactions)
+    return rolling_metrics(daily_series(agg), windows, agg.approximate)
+
+@instrumented
+def day_over_day_sales(transactions):
+    """
+    Revenue change of every sales day against the previous calendar day.
+    Accepts transactions or a pre-computed SalesAggregate.
+    Returns: dict date -> {'revenue', 'previous_revenue', 'change', 'change_pct'}
+    """
+    return day_over_day(daily_series(as_aggregate(transactions)))
+
+# Customer cohorts and repeat purchases (integer-coded histories, see utils/customer_analytics.py)
+@instrumented
+def cohort_retention(transactions):
+    """
+    Groups customers by first-purchase month and counts how many of each
+    cohort bought again 0, 1, 2, ... months later.
+    Accepts transactions or a pre-computed CustomerAnalytics.
+    Returns: dict cohort month -> {'customers', 'active', 'retention' (%)}
+    """
+    return as_customer_analytics(transactions).retention_matrix()
+
+@instrumented
+def repeat_purchase_distribution(transactions):
+    """
+    How many customers bought on 1, 2, 3, ... separate days.
+    Accepts transactions or a pre-computed CustomerAnalytics.
+    Returns: tuple (dict days -> customers, repeat rate in %)
+    """
+    return as_customer_analytics(transactions).repeat_distribution()
+
+@instrumented
+def basket_size_distribution(transactions):
+    """
+    How many baskets (a customer's purchases on one day) hold 1, 2, 3, ... lines.
+    Accepts transactions or a pre-computed CustomerAnalytics.
+    Returns: tuple (dict lines -> baskets, average lines per basket)
+    """
+    return as_customer_analytics(transactions).basket_size_distribution()
+
+@instrumented
+def product_associations(transactions, by=BY_CUSTOMER, min_support=0.01, min_confidence=0.1, n=None, workers=1):
+    """
+    Market basket analysis: product pairs bought by the same customer
+    (by="customer") or by the same customer on the same date (by="day"),
+    with support, confidence and lift (see utils/market_basket.py).
+    Pairs in fewer than min_support of the baskets are pruned.
+    Accepts transactions, or a CustomerAnalytics for by="customer".
+    Returns: list of rule dicts ('antecedent', 'consequent', 'count', 'support',
+    'confidence', 'lift'), strongest lift first (the first n if given)
+    """
+    rules = basket_pair_counts(transactions, by, min_support, workers).rules(min_confidence)
+    return rules if n is None else rules[:n]
 #Task2.3: Product Performance
-def low_performing_products(transactions, threshold=10):
+@instrumented
+def low_performing_products(transactions, threshold=10, n=None):
     """
     Identifies products with total quantity sold below the threshold.
+    Accepts transactions or a pre-computed SalesAggregate.
+    n: only return the n lowest sellers (heap selection instead of a full sort).
     Returns: list of tuples (ProductName, TotalQuantity, TotalRevenue)
     """
-    product_totals = {}
+    agg = as_aggregate(transactions)
 
-    # 1. Aggregate totals for all products
-    for t in transactions:
-        name = t['ProductName']
-        qty = t['Quantity']
-        rev = qty * t['UnitPrice']
-        
-        if name not in product_totals:
-            product_totals[name] = {'qty': 0, 'rev': 0.0}
-        
-        product_totals[name]['qty'] += qty
-        product_totals[name]['rev'] += rev
-
-    # 2. Filter by threshold and convert to list of tuples
+    # 1. Filter by threshold and convert to list of tuples
     low_performers = []
-    for name, data in product_totals.items():
+    for name, data in agg.products.items():
         if data['qty'] < threshold:
             low_performers.append((name, data['qty'], data['rev']))
 
-    # 3. Sort by TotalQuantity ascending (Requirement)
+    # 2. Sort by TotalQuantity ascending (Requirement)
+    if n is not None:
+        return bottom_k(low_performers, n, key=lambda x: x[1])
     low_performers.sort(key=lambda x: x[1])
 
     return low_performers
 
-def generate_report(cleaned_data, output_path):
-    region_sales = {}
-    for record in cleaned_data:
-        region = record["Region"]
-        revenue = record["Quantity"] * record["UnitPrice"]
-        region_sales[region] = region_sales.get(region, 0) + revenue
-    with open(output_path, 'w') as f:
-        f.write("SALES ANALYTICS REPORT\n======================\n\n")
-        for region, total in region_sales.items():
-            f.write(f"Region: {region:10} | Total Revenue: ${total:,.2f}\n")
-    print(f"Report successfully generated at: {output_path}")
+@instrumented
+def largest_transactions(transactions, n=5):
+    """
+    The n largest single transactions (n <= LARGEST_TRANSACTIONS). Every
+    aggregate keeps them in a mergeable TopK, so they survive chunk, worker
+    and file merges without a pass over the rows.
+    Accepts transactions or a pre-computed SalesAggregate.
+    Returns: list of dicts (TransactionID, Date, CustomerID, Region, Amount), largest first
+    """
+    agg = as_aggregate(transactions)
+    return [{'TransactionID': tid, 'Date': date, 'CustomerID': cid, 'Region': region, 'Amount': amount}
+            for amount, (tid, date, cid, region) in agg.largest.items()[:n]]
 
-from datetime import datetime
+def enrichment_summary(enriched_transactions):
+    """
+    Single pass over enriched rows (a list, a generator or None).
+    An enriched TransactionTable is summarized per ProductID, not per row.
+    Returns: tuple (matched_count, total_count, sorted list of unmatched ProductIDs)
+    """
+    if isinstance(enriched_transactions, TransactionTable) and enriched_transactions.product_info is not None:
+        info = enriched_transactions.product_info
+        pids = enriched_transactions.product_ids.values
+        counts = Counter(enriched_transactions.product_ids.codes)
+        matched = sum(count for code, count in counts.items() if info[code].get('API_Match'))
+        failed = {pids[code] for code in counts if not info[code].get('API_Match')}
+        return matched, len(enriched_transactions), sorted(failed)
+
+    matched = 0
+    total = 0
+    failed = set()
+    for t in enriched_transactions or []:
+        total += 1
+        if t.get('API_Match'):
+            matched += 1
+        else:
+            failed.add(t['ProductID'])
+    return matched, total, sorted(failed)
+
+# Report sections (see utils/report_engine.py). Each section is built once from the
+# shared aggregate, cached by the fingerprints of the aggregate parts it depends on,
+# and only rendered as text when a text report is written.
+LINE = "-" * 60
+TOP_N = 5
+TREND_DAYS = 10 # Days of the daily trend shown in the text report (JSON/CSV have every day)
+LOW_QTY_THRESHOLD = 15
+LOW_PERFORMERS_SHOWN = 10 # Lowest sellers listed; heap-selected instead of sorting every product
+WINDOW_MONTHS, WINDOW_WEEKS = 12, 8
+TOP_ASSOCIATIONS = 10
+
+def _distinct_state(values):
+    # A set of IDs, or the registers of a HyperLogLog sketch
+    return values.registers.hex() if hasattr(values, 'registers') else sorted(values)
+
+# Dict orders are kept in the fingerprints: ties and the summary report follow first-seen order
+REPORT_DEPENDENCIES = {
+    'totals': lambda inputs: digest([inputs['aggregate'].total_revenue, inputs['aggregate'].transaction_count,
+                                     inputs['aggregate'].date_range]),
+    'regions': lambda inputs: digest(list(inputs['aggregate'].regions.items())),
+    'products': lambda inputs: digest(list(inputs['aggregate'].products.items())),
+    # Summary figures instead of every customer row: hashing ~10^5 customers cost more than
+    # rebuilding the top-customers section it guards
+    'customers': lambda inputs: digest([inputs['aggregate'].transaction_count, inputs['aggregate'].total_revenue,
+                                        inputs['aggregate'].total_quantity, len(inputs['aggregate'].customers)]),
+    'daily': lambda inputs: digest([[day, data['revenue'], data['transaction_count'], len(data['customers'])]
+                                    for day, data in inputs['aggregate'].daily.items()]),
+    # Rolling and per-period unique counts depend on who bought, not only on how many
+    'daily_customers': lambda inputs: digest([[day, data['revenue'], data['transaction_count'],
+                                               _distinct_state(data['customers'])]
+                                              for day, data in inputs['aggregate'].daily.items()]),
+    'rates': lambda inputs: digest([[c, inputs['rates'].rate(c)] for c in inputs['currencies']]
+                                   if inputs.get('rates') and inputs.get('currencies') else None),
+    'associations': lambda inputs: digest(inputs.get('associations')),
+    'largest': lambda inputs: digest(inputs['aggregate'].largest.items()),
+}
+
+def _build_header(inputs):
+    return {'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'records': inputs['aggregate'].transaction_count}
+
+def _render_header(data):
+    return ("=" * 60 + "\n" + " " * 15 + "SALES ANALYTICS REPORT\n" +
+            " " * 10 + f"Generated: {data['generated']}\n" +
+            " " * 10 + f"Records Processed: {data['records']}\n" + "=" * 60 + "\n\n")
+
+def _build_overall_summary(inputs):
+    agg = inputs['aggregate']
+    total_rev = agg.total_revenue
+    total_txns = agg.transaction_count
+    rates, currencies = inputs.get('rates'), inputs.get('currencies')
+    return {
+        'total_revenue': total_rev,
+        'total_transactions': total_txns,
+        'average_order_value': total_rev / total_txns if total_txns > 0 else 0,
+        'date_range': list(agg.date_range) if agg.date_range else None,
+        'converted_revenue': rates.convert(total_rev, currencies) if rates and currencies else {}
+    }
+
+def _render_overall_summary(data):
+    dates = data['date_range']
+    lines = ["OVERALL SUMMARY\n" + LINE + "\n", f"Total Revenue:       ${data['total_revenue']:,.2f}\n"]
+    for currency, amount in data['converted_revenue'].items():
+        lines.append(f"{'  in ' + currency + ':':<21}{format_money(amount, currency)}\n")
+    lines.append(f"Total Transactions:  {data['total_transactions']}\n")
+    lines.append(f"Average Order Value: ${data['average_order_value']:,.2f}\n")
+    lines.append(f"Date Range:          {f'{dates[0]} to {dates[1]}' if dates else 'N/A'}\n\n")
+    return "".join(lines)
+
+def _overall_summary_rows(data):
+    dates = data['date_range'] or [None, None]
+    rows = [['total_revenue', data['total_revenue']], ['total_transactions', data['total_transactions']],
+            ['average_order_value', data['average_order_value']], ['first_date', dates[0]], ['last_date', dates[1]]]
+    rows.extend([f'total_revenue_{c}', amount] for c, amount in data['converted_revenue'].items())
+    return ['metric', 'value'], rows
+
+def _build_region_performance(inputs):
+    return [dict(region=reg, **stats) for reg, stats in region_wise_sales(inputs['aggregate']).items()]
+
+def _render_region_performance(data):
+    lines = ["REGION-WISE PERFORMANCE\n" + LINE + "\n",
+             f"{'Region':<15} {'Sales':<15} {'% Total':<12} {'Transactions':<12}\n"]
+    for r in data:
+        lines.append(f"{r['region']:<15} ${r['total_sales']:<14,.2f} {r['percentage']:<11}% {r['transaction_count']:<12}\n")
+    return "".join(lines) + "\n"
+
+def _build_top_products(inputs):
+    return [{'rank': i, 'product': name, 'quantity': qty, 'revenue': rev}
+            for i, (name, qty, rev) in enumerate(top_selling_products(inputs['aggregate'], n=TOP_N), 1)]
+
+def _render_top_products(data):
+    lines = [f"TOP {TOP_N} PRODUCTS\n" + LINE + "\n", f"{'Rank':<6} {'Product Name':<20} {'Qty':<10} {'Revenue':<15}\n"]
+    for p in data:
+        lines.append(f"{p['rank']:<6} {p['product']:<20} {p['quantity']:<10} ${p['revenue']:<14,.2f}\n")
+    return "".join(lines) + "\n"
+
+def _build_top_customers(inputs):
+    return [{'rank': i, 'customer_id': cid, 'total_spent': stats['total_spent'],
+             'purchase_count': stats['purchase_count']}
+            for i, (cid, stats) in enumerate(top_customers(inputs['aggregate'], n=TOP_N).items(), 1)]
+
+def _render_top_customers(data):
+    lines = [f"TOP {TOP_N} CUSTOMERS\n" + LINE + "\n",
+             f"{'Rank':<6} {'Customer ID':<15} {'Total Spent':<15} {'Order Count':<12}\n"]
+    for c in data:
+        lines.append(f"{c['rank']:<6} {c['customer_id']:<15} ${c['total_spent']:<14,.2f} {c['purchase_count']:<12}\n")
+    return "".join(lines) + "\n"
+
+def _build_daily_trend(inputs):
+    return [dict(date=day, **stats) for day, stats in daily_sales_trend(inputs['aggregate']).items()]
+
+def _render_daily_trend(data):
+    lines = ["DAILY SALES TREND\n" + LINE + "\n", f"{'Date':<15} {'Revenue':<15} {'Txns':<10} {'Unique Cust':<12}\n"]
+    for d in data[:TREND_DAYS]: # Showing first 10 days for brevity
+        lines.append(f"{d['date']:<15} ${d['revenue']:<14,.2f} {d['transaction_count']:<10} {d['unique_customers']:<12}\n")
+    return "".join(lines) + "\n"
+
+def _build_time_windows(inputs):
+    """
+    The latest WINDOW_MONTHS months and WINDOW_WEEKS ISO weeks, rolling
+    7/30-day totals as of the last day and the largest day-over-day changes.
+    """
+    agg = inputs['aggregate']
+    series = daily_series(agg) # Shared by every window below
+    data = {'monthly': [], 'weekly': [], 'rolling_as_of': None, 'rolling': [], 'largest_rise': None,
+            'largest_drop': None}
+    if not series:
+        return data
+
+    for key, period, count in (('monthly', MONTHLY, WINDOW_MONTHS), ('weekly', WEEKLY, WINDOW_WEEKS)):
+        rollup = period_rollup(series, period, agg.approximate, agg.precision)
+        data[key] = [dict(period=label, **stats) for label, stats in list(rollup.items())[-count:]]
+
+    last_day, rolling = list(rolling_metrics(series, (7, 30), agg.approximate).items())[-1]
+    data['rolling_as_of'] = last_day
+    data['rolling'] = [{'days': days, 'revenue': rolling[f'revenue_{days}d'],
+                        'transaction_count': rolling[f'transactions_{days}d'],
+                        'unique_customers': rolling[f'unique_customers_{days}d']} for days in (7, 30)]
+
+    changes = day_over_day(series)
+    for key, pick in (('largest_rise', max), ('largest_drop', min)):
+        day, stats = pick(changes.items(), key=lambda x: x[1]['change'])
+        data[key] = {'date': day, 'change': stats['change']}
+    return data
+
+def _render_time_windows(data):
+    lines = ["TIME WINDOWS\n" + LINE + "\n"]
+    if data['rolling_as_of'] is None:
+        return lines[0] + "No dated sales\n\n"
+
+    for title, key in (("Monthly", 'monthly'), ("Weekly", 'weekly')):
+        lines.append(f"{title} (latest {len(data[key])}):\n")
+        lines.append(f"{'Period':<15} {'Revenue':<15} {'Txns':<10} {'Unique Cust':<12}\n")
+        for p in data[key]:
+            lines.append(f"{p['period']:<15} ${p['revenue']:<14,.2f} {p['transaction_count']:<10} {p['unique_customers']:<12}\n")
+        lines.append("\n")
+
+    lines.append(f"Rolling totals as of {data['rolling_as_of']}:\n")
+    for w in data['rolling']:
+        lines.append(f" - {w['days']}-day: ${w['revenue']:,.2f} from {w['transaction_count']} txns, "
+                     f"{w['unique_customers']} unique customers\n")
+
+    for title, key in (("rise", 'largest_rise'), ("drop", 'largest_drop')):
+        change = data[key]
+        sign = '-' if change['change'] < 0 else '+'
+        lines.append(f"Largest day-over-day {title}: {change['date']} ({sign}${abs(change['change']):,.2f})\n")
+    return "".join(lines) + "\n"
+
+def _time_windows_rows(data):
+    rows = [[key, p['period'], p['revenue'], p['transaction_count'], p['unique_customers']]
+            for key in ('monthly', 'weekly') for p in data[key]]
+    rows.extend([f"rolling_{w['days']}d", data['rolling_as_of'], w['revenue'], w['transaction_count'],
+                 w['unique_customers']] for w in data['rolling'])
+    return ['window', 'period', 'revenue', 'transaction_count', 'unique_customers'], rows
+
+def _build_product_performance(inputs):
+    agg = inputs['aggregate']
+    peak = find_peak_sales_day(agg)
+    return {
+        'peak_day': {'date': peak[0], 'revenue': peak[1], 'transaction_count': peak[2]} if peak else None,
+        'low_threshold': LOW_QTY_THRESHOLD,
+        'low_performing': [{'product': name, 'quantity': qty, 'revenue': rev}
+                           for name, qty, rev in low_performing_products(agg, threshold=LOW_QTY_THRESHOLD,
+                                                                         n=LOW_PERFORMERS_SHOWN)]
+    }
 
-def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
+def _render_product_performance(data):
+    peak = data['peak_day']
+    lines = ["PRODUCT PERFORMANCE ANALYSIS\n" + LINE + "\n"]
+    if peak:
+        lines.append(f"Peak Sales Day: {peak['date']} (${peak['revenue']:,.2f} with {peak['transaction_count']} txns)\n")
+    else:
+        lines.append("Peak Sales Day: N/A\n")
+    lines.append(f"Low Performing Products (Qty < {data['low_threshold']}, lowest {LOW_PERFORMERS_SHOWN}):\n")
+    for p in data['low_performing']:
+        lines.append(f" - {p['product']} ({p['quantity']} sold)\n")
+    return "".join(lines) + "\n"
+
+def _build_largest_transactions(inputs):
+    return [dict(rank=i, **t) for i, t in enumerate(largest_transactions(inputs['aggregate'], n=TOP_N), 1)]
+
+def _render_largest_transactions(data):
+    lines = [f"LARGEST {TOP_N} TRANSACTIONS\n" + LINE + "\n",
+             f"{'Rank':<6} {'Transaction':<12} {'Date':<12} {'Customer':<10} {'Region':<8} {'Amount':<15}\n"]
+    for t in data:
+        lines.append(f"{t['rank']:<6} {t['TransactionID']:<12} {t['Date']:<12} {t['CustomerID']:<10} "
+                     f"{t['Region']:<8} ${t['Amount']:<14,.2f}\n")
+    return "".join(lines) + "\n"
+
+def _render_associations(data):
+    lines = ["PRODUCT ASSOCIATIONS (bought together)\n" + LINE + "\n"]
+    if not data:
+        lines.append("No product pairs above the minimum support\n")
+    else:
+        lines.append(f"{'If bought':<20} {'Also bought':<20} {'Support':<9} {'Conf.':<7} {'Lift':<6}\n")
+    for rule in data[:TOP_ASSOCIATIONS]:
+        lines.append(f"{rule['antecedent'][:19]:<20} {rule['consequent'][:19]:<20} {rule['support']:<9.2%} "
+                     f"{rule['confidence']:<7.0%} {rule['lift']:<6.2f}\n")
+    return "".join(lines) + "\n"
+
+def _build_enrichment(inputs):
+    # enriched_transactions=None when enrichment was skipped
+    enriched_count, enriched_total, failed_pids = enrichment_summary(inputs.get('enriched'))
+    return {'enriched_count': enriched_count, 'total': enriched_total,
+            'success_rate': (enriched_count / enriched_total * 100) if enriched_total else 0,
+            'failed_product_ids': failed_pids}
+
+def _render_enrichment(data):
+    failed = data['failed_product_ids']
+    return ("API ENRICHMENT SUMMARY\n" + LINE + "\n" +
+            f"Total Products Enriched: {data['enriched_count']}\n" +
+            f"Success Rate:            {data['success_rate']:.2f}%\n" +
+            f"Failed Product IDs:      {', '.join(failed) if failed else 'None'}\n" + "=" * 60 + "\n")
+
+def _build_region_totals(inputs):
+    agg = inputs['aggregate']
+    rates, currencies = inputs.get('rates'), inputs.get('currencies')
+    totals = {region: data['total_sales'] for region, data in agg.regions.items()}
+    converted = rates.convert_totals(totals, currencies) if rates and currencies else {}
+    return [{'region': region, 'total_revenue': total, 'converted_revenue': converted.get(region, {})}
+            for region, total in totals.items()]
+
+def _render_region_totals(data):
+    lines = ["SALES ANALYTICS REPORT\n======================\n\n"]
+    for r in data:
+        extra = "".join(f" | {format_money(amount, c)}" for c, amount in r['converted_revenue'].items())
+        lines.append(f"Region: {r['region']:10} | Total Revenue: ${r['total_revenue']:,.2f}{extra}\n")
+    return "".join(lines)
+
+def _region_totals_rows(data):
+    currencies = list(data[0]['converted_revenue']) if data else []
+    return (['region', 'total_revenue'] + [f'total_revenue_{c}' for c in currencies],
+            [[r['region'], r['total_revenue']] + [r['converted_revenue'][c] for c in currencies] for r in data])
+
+def _record_rows(*fields):
+    # CSV rows for sections whose data is a list of flat dicts
+    return lambda data: (list(fields), [[record[field] for field in fields] for record in data])
+
+REPORT_SECTIONS = [
+    Section('header', (), _build_header, _render_header, volatile=True),
+    Section('overall_summary', ('totals', 'rates'), _build_overall_summary, _render_overall_summary,
+            _overall_summary_rows),
+    Section('region_performance', ('regions', 'totals'), _build_region_performance, _render_region_performance,
+            _record_rows('region', 'total_sales', 'percentage', 'transaction_count')),
+    Section('top_products', ('products',), _build_top_products, _render_top_products,
+            _record_rows('rank', 'product', 'quantity', 'revenue')),
+    Section('top_customers', ('customers',), _build_top_customers, _render_top_customers,
+            _record_rows('rank', 'customer_id', 'total_spent', 'purchase_count')),
+    Section('daily_trend', ('daily',), _build_daily_trend, _render_daily_trend,
+            _record_rows('date', 'revenue', 'transaction_count', 'unique_customers')),
+    Section('time_windows', ('daily_customers',), _build_time_windows, _render_time_windows, _time_windows_rows),
+    Section('product_performance', ('daily', 'products'), _build_product_performance, _render_product_performance,
+            lambda data: _record_rows('product', 'quantity', 'revenue')(data['low_performing'])),
+    Section('largest_transactions', ('largest',), _build_largest_transactions, _render_largest_transactions,
+            _record_rows('rank', 'TransactionID', 'Date', 'CustomerID', 'Region', 'Amount')),
+    Section('associations', ('associations',), lambda inputs: list(inputs['associations']), _render_associations,
+            _record_rows('antecedent', 'consequent', 'count', 'support', 'confidence', 'lift')),
+    # Counting matches costs as much as fingerprinting the enriched rows would, so it is not cached
+    Section('enrichment', (), _build_enrichment, _render_enrichment, volatile=True),
+    Section('region_totals', ('regions', 'rates'), _build_region_totals, _render_region_totals, _region_totals_rows),
+]
+_report_engines = {} # Cache file -> ReportEngine, so each file is read once per process
+
+def _report_engine(cache):
+    """
+    cache: False (build every section), True (the REPORT_CACHE file) or a cache file path
+    """
+    if not cache:
+        return ReportEngine(REPORT_SECTIONS, REPORT_DEPENDENCIES)
+    path = REPORT_CACHE if cache is True else cache
+    if path not in _report_engines:
+        _report_engines[path] = ReportEngine(REPORT_SECTIONS, REPORT_DEPENDENCIES, cache_path=path)
+    return _report_engines[path]
+
+def _print_written(paths, output_file, message):
+    for path in paths:
+        print(f"{message}: {path}" if path == output_file else f"Machine-readable report written to: {path}")
+
+@instrumented
+def generate_report(cleaned_data, output_path, rates=None, currencies=None, formats=('text',), cache=False):
+    """
+    Writes the per-region revenue summary.
+    rates/currencies: a RateTable and the currency codes each total is also
+    shown in (converted from the table in memory, no HTTP calls).
+    formats: any of "text", "json" (<name>.json) and "csv" (<name>_region_totals.csv).
+    cache: reuse unchanged sections from the report cache, as in generate_sales_report.
+    """
+    inputs = {'aggregate': as_aggregate(cleaned_data), 'rates': rates, 'currencies': currencies}
+    written = _report_engine(cache).render(['region_totals'], inputs, output_path, formats)
+    _print_written(written, output_path, "Report successfully generated at")
+
+@instrumented
+def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt',
+                          time_windows=False, associations=None, rates=None, currencies=None, formats=('text',),
+                          cache=False):
     """
     Generates a comprehensive formatted text report combining all analytics.
+    Accepts transactions or a pre-computed SalesAggregate. Every section is
+    a view over one aggregate.
+    time_windows: add monthly/weekly rollups, rolling 7/30-day totals and
+    the largest day-over-day changes after the daily trend.
+    associations: rules from product_associations(); the strongest 10 are
+    listed in a PRODUCT ASSOCIATIONS section.
+    rates/currencies: a RateTable and the currency codes the overall summary
+    also shows the total revenue in.
+    formats: any of "text", "json" (<name>.json, every section's data) and
+    "csv" (<name>_<section>.csv per tabular section).
+    cache: True reuses sections from REPORT_CACHE while the parts of the
+    aggregate they show are unchanged (a path selects another cache file);
+    False (default) builds every section and touches no file.
     """
-    # 1. Pre-calculate data using your existing functions
-    total_rev = sum(t['Quantity'] * t['UnitPrice'] for t in transactions)
-    total_txns = len(transactions)
-    avg_order = total_rev / total_txns if total_txns > 0 else 0
-    dates = sorted([t['Date'] for t in transactions])
-    date_range = f"{dates[0]} to {dates[-1]}" if dates else "N/A"
-
-    # Get data from your Task 2 functions
-    from utils.data_processor import (region_wise_sales, top_selling_products, 
-                                    customer_analysis, daily_sales_trend, 
-                                    find_peak_sales_day, low_performing_products)
-    
-    reg_perf = region_wise_sales(transactions)
-    top_5_prods = top_selling_products(transactions, n=5)
-    cust_perf = customer_analysis(transactions)
-    daily_trend = daily_sales_trend(transactions)
-    peak_day = find_peak_sales_day(transactions)
-    low_prods = low_performing_products(transactions, threshold=15)
-
-    # API Summary calculations
-    enriched_count = sum(1 for t in enriched_transactions if t.get('API_Match'))
-    success_rate = (enriched_count / len(enriched_transactions) * 100) if enriched_transactions else 0
-    failed_pids = sorted(list(set(t['ProductID'] for t in enriched_transactions if not t.get('API_Match'))))
-
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # SECTION 1: HEADER
-        f.write("=" * 60 + "\n")
-        f.write(" " * 15 + "SALES ANALYTICS REPORT\n")
-        f.write(f" " * 10 + f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f" " * 10 + f"Records Processed: {total_txns}\n")
-        f.write("=" * 60 + "\n\n")
-
-        # SECTION 2: OVERALL SUMMARY
-        f.write("OVERALL SUMMARY\n" + "-" * 60 + "\n")
-        f.write(f"Total Revenue:       ${total_rev:,.2f}\n")
-        f.write(f"Total Transactions:  {total_txns}\n")
-        f.write(f"Average Order Value: ${avg_order:,.2f}\n")
-        f.write(f"Date Range:          {date_range}\n\n")
-
-        # SECTION 3: REGION-WISE PERFORMANCE
-        f.write("REGION-WISE PERFORMANCE\n" + "-" * 60 + "\n")
-        f.write(f"{'Region':<15} {'Sales':<15} {'% Total':<12} {'Transactions':<12}\n")
-        for reg, stats in reg_perf.items():
-            f.write(f"{reg:<15} ${stats['total_sales']:<14,.2f} {stats['percentage']:<11}% {stats['transaction_count']:<12}\n")
-        f.write("\n")
-
-        # SECTION 4: TOP 5 PRODUCTS
-        f.write("TOP 5 PRODUCTS\n" + "-" * 60 + "\n")
-        f.write(f"{'Rank':<6} {'Product Name':<20} {'Qty':<10} {'Revenue':<15}\n")
-        for i, (name, qty, rev) in enumerate(top_5_prods, 1):
-            f.write(f"{i:<6} {name:<20} {qty:<10} ${rev:<14,.2f}\n")
-        f.write("\n")
-
-        # SECTION 5: TOP 5 CUSTOMERS
-        f.write("TOP 5 CUSTOMERS\n" + "-" * 60 + "\n")
-        f.write(f"{'Rank':<6} {'Customer ID':<15} {'Total Spent':<15} {'Order Count':<12}\n")
-        top_5_custs = list(cust_perf.items())[:5]
-        for i, (cid, stats) in enumerate(top_5_custs, 1):
-            f.write(f"{i:<6} {cid:<15} ${stats['total_spent']:<14,.2f} {stats['purchase_count']:<12}\n")
-        f.write("\n")
-
-        # SECTION 6: DAILY SALES TREND
-        f.write("DAILY SALES TREND\n" + "-" * 60 + "\n")
-        f.write(f"{'Date':<15} {'Revenue':<15} {'Txns':<10} {'Unique Cust':<12}\n")
-        for date, stats in list(daily_trend.items())[:10]: # Showing first 10 days for brevity
-            f.write(f"{date:<15} ${stats['revenue']:<14,.2f} {stats['transaction_count']:<10} {stats['unique_customers']:<12}\n")
-        f.write("\n")
-
-        # SECTION 7: PRODUCT PERFORMANCE ANALYSIS
-        f.write("PRODUCT PERFORMANCE ANALYSIS\n" + "-" * 60 + "\n")
-        f.write(f"Peak Sales Day: {peak_day[0]} (${peak_day[1]:,.2f} with {peak_day[2]} txns)\n")
-        f.write("Low Performing Products (Qty < 15):\n")
-        for p in low_prods:
-            f.write(f" - {p[0]} ({p[1]} sold)\n")
-        f.write("\n")
-
-        # SECTION 8: API ENRICHMENT SUMMARY
-        f.write("API ENRICHMENT SUMMARY\n" + "-" * 60 + "\n")
-        f.write(f"Total Products Enriched: {enriched_count}\n")
-        f.write(f"Success Rate:            {success_rate:.2f}%\n")
-        f.write(f"Failed Product IDs:      {', '.join(failed_pids) if failed_pids else 'None'}\n")
-        f.write("=" * 60 + "\n")
-
-    print(f"Comprehensive report generated at: {output_file}")
+    # 1. Aggregate once; every section below is a view over it
+    inputs = {'aggregate': as_aggregate(transactions), 'enriched': enriched_transactions,
+              'associations': associations, 'rates': rates, 'currencies': currencies}
+    names = ['header', 'overall_summary', 'region_performance', 'top_products', 'top_customers', 'daily_trend']
+    if time_windows:
+        names.append('time_windows')
+    names.extend(['product_performance', 'largest_transactions'])
+    if associations is not None:
+        names.append('associations')
+    names.append('enrichment')
+
+    written = _report_engine(cache).render(names, inputs, output_file, formats)
+    _print_written(written, output_file, "Comprehensive report generated at")
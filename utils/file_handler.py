@@ -1,29 +1,141 @@
-def read_sales_data(filename):
+import codecs
+import os
+
+from utils.profiler import instrumented
+
+ENCODINGS = ['utf-8', 'latin-1', 'cp1252'] # Required encodings to try
+SAMPLE_SIZE = 64 * 1024 # Bytes inspected when detecting the file encoding
+
+
+def detect_encoding(filename, sample_size=SAMPLE_SIZE):
     """
-    Reads sales data from file handling encoding issues.
-    Returns: list of raw lines (strings)
+    Detects the file encoding from a sample of the first bytes.
+    Returns: encoding name (string)
     """
-    encodings = ['utf-8', 'latin-1', 'cp1252'] # Required encodings to try 
-    
-    for encoding in encodings:
+    with open(filename, 'rb') as file:
+        sample = file.read(sample_size)
+
+    for encoding in ENCODINGS:
+        # Incremental decoder so a multi-byte character cut at the end
+        # of the sample is not mistaken for invalid data
+        decoder = codecs.getincrementaldecoder(encoding)()
         try:
-            with open(filename, 'r', encoding=encoding) as file: # Use 'with' statement 
-                # Read all lines
-                lines = file.readlines()
-                
-                # Requirements: 
-                # 1. Skip the header row (first line)
-                # 2. Remove empty lines (strip whitespace and filter)
-                data_lines = [line.strip() for line in lines[1:] if line.strip()]
-                
-                return data_lines
-                
-        except FileNotFoundError:
-            print(f"Error: The file '{filename}' was not found.") # Handle FileNotFoundError 
-            return []
+            decoder.decode(sample, final=False)
+            return encoding
         except UnicodeDecodeError:
-            # If this encoding fails, the loop continues to the next one
             continue
-            
-    print("Error: Could not read the file with supported encodings.")
-    return []
\ No newline at end of file
+
+    return ENCODINGS[-1]
+
+
+def stream_sales_data(filename, encoding=None):
+    """
+    Lazily yields stripped, non-empty data lines (header skipped).
+    Memory use is bounded by the longest line, not by the file size.
+    """
+    if encoding is None:
+        encoding = detect_encoding(filename)
+
+    with open(filename, 'rb') as file:
+        file.readline() # Skip the header row (first line)
+
+        for raw_line in file:
+            line = _decode_line(raw_line, encoding).strip()
+            if line:
+                yield line
+
+
+def _decode_line(raw_line, encoding):
+    try:
+        return raw_line.decode(encoding)
+    except UnicodeDecodeError:
+        # Byte sequence outside the sample; latin-1 never fails
+        return raw_line.decode('latin-1')
+
+
+def data_start_offset(filename):
+    """
+    Returns the byte offset of the first line after the header.
+    """
+    with open(filename, 'rb') as file:
+        file.readline()
+        return file.tell()
+
+
+def split_into_chunks(filename, chunk_count):
+    """
+    Splits the data section of a file into byte ranges aligned to line starts.
+    Returns: list of (start, end) tuples covering every data line exactly once
+    """
+    start = data_start_offset(filename)
+    size = os.path.getsize(filename)
+    step = max(1, (size - start) // max(1, chunk_count))
+
+    bounds = [start]
+    with open(filename, 'rb') as file:
+        for target in range(start + step, size, step):
+            file.seek(target)
+            file.readline() # Move to the next line start
+            offset = file.tell()
+            if bounds[-1] < offset < size:
+                bounds.append(offset)
+    bounds.append(size)
+
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def complete_lines_end(filename, start, end=None):
+    """
+    Returns the offset just after the last newline in [start, end), so a
+    line that is still being appended is left for the next read.
+    """
+    if end is None:
+        end = os.path.getsize(filename)
+
+    with open(filename, 'rb') as file:
+        position = end
+        while position > start:
+            block_start = max(start, position - SAMPLE_SIZE)
+            file.seek(block_start)
+            newline = file.read(position - block_start).rfind(b'\n')
+            if newline != -1:
+                return block_start + newline + 1
+            position = block_start
+    return start
+
+
+def read_line_range(filename, start, end, encoding):
+    """
+    Yields the stripped, non-empty lines in the byte range [start, end).
+    start must be a line start (see split_into_chunks).
+    """
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    for raw_line in data.split(b'\n'):
+        line = _decode_line(raw_line, encoding).strip()
+        if line:
+            yield line
+
+
+@instrumented
+def read_sales_data(filename, stream=False):
+    """
+    Reads sales data from file handling encoding issues.
+    Returns: list of raw lines (strings), or a generator if stream=True
+    """
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print(f"Error: The file '{filename}' was not found.") # Handle FileNotFoundError
+        return iter([]) if stream else []
+
+    lines = stream_sales_data(filename, encoding)
+    if stream:
+        return lines
+
+    # Requirements:
+    # 1. Skip the header row (first line)
+    # 2. Remove empty lines (strip whitespace and filter)
+    return list(lines)
@@ -0,0 +1,110 @@
+import hashlib
+import math
+
+SPARSE_ENTRY_BYTES = 32 # Rough memory of one dict entry, vs 1 byte per dense register
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter with fixed memory (2**precision bytes).
+    Sketches with the same precision merge exactly via update(), so counts
+    can be computed per shard or per process and combined afterwards.
+    Standard error is about 1.04 / sqrt(2**precision).
+
+    A sketch starts sparse: only the non-zero registers are kept, in a dict.
+    It switches to the dense register array once the dict would be about as
+    large, so the many small sets (e.g. one per customer) stay small. Both
+    forms give the same registers and therefore the same estimates.
+    """
+
+    __slots__ = ('precision', '_sparse', '_dense', '_sparse_limit') # One sketch per customer adds up
+
+    def __init__(self, precision=10):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self._sparse = {} # Register index -> rank while sparse, else None
+        self._dense = None
+        self._sparse_limit = (1 << precision) // SPARSE_ENTRY_BYTES
+
+    @property
+    def registers(self):
+        """
+        The dense register array (built on the fly while the sketch is sparse).
+        """
+        if self._dense is not None:
+            return self._dense
+        registers = bytearray(1 << self.precision)
+        for index, rank in self._sparse.items():
+            registers[index] = rank
+        return registers
+
+    @registers.setter
+    def registers(self, registers):
+        if len(registers) != 1 << self.precision:
+            raise ValueError("HyperLogLog registers do not match the precision")
+        if len(registers) - registers.count(0) <= self._sparse_limit:
+            self._sparse = {index: rank for index, rank in enumerate(registers) if rank}
+            self._dense = None
+        else:
+            self._sparse = None
+            self._dense = bytearray(registers)
+
+    def add(self, value):
+        # Stable hash: Python's hash() of str differs between processes
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        x = int.from_bytes(digest, 'big')
+
+        bits = 64 - self.precision
+        index = x >> bits
+        rank = bits - (x & ((1 << bits) - 1)).bit_length() + 1
+        if self._dense is not None:
+            if rank > self._dense[index]:
+                self._dense[index] = rank
+        elif rank > self._sparse.get(index, 0):
+            self._sparse[index] = rank
+            if len(self._sparse) > self._sparse_limit:
+                self._densify()
+
+    def _densify(self):
+        self._dense = self.registers
+        self._sparse = None
+
+    def update(self, other):
+        """
+        Merges another sketch into this one (register-wise max).
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        if self._dense is None and other._dense is None:
+            sparse = self._sparse
+            for index, rank in other._sparse.items():
+                if rank > sparse.get(index, 0):
+                    sparse[index] = rank
+            if len(sparse) > self._sparse_limit:
+                self._densify()
+        else:
+            self._dense = bytearray(map(max, self.registers, other.registers))
+            self._sparse = None
+
+    def count(self):
+        """
+        Returns: float estimate of the number of distinct values added
+        """
+        registers = self.registers
+        m = len(registers)
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+
+        estimate = alpha * m * m / sum(2.0 ** -r for r in registers)
+
+        # Small-range correction (linear counting)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def __len__(self):
+        return int(round(self.count()))
@@ -0,0 +1,161 @@
+import math
+import os
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+from utils.customer_analytics import CustomerAnalytics, as_customer_analytics, insert_code
+from utils.transaction_table import TransactionTable, DictionaryColumn
+from utils.profiler import instrumented
+
+BY_CUSTOMER = 'customer' # A basket is everything one customer ever bought
+BY_DAY = 'day' # A basket is what one customer bought on one date
+SHARD_MIN_BASKETS = 5000 # Below this, process start-up costs more than it saves
+
+
+def day_baskets(transactions):
+    """
+    The products of each (customer, date) pair, in a single pass.
+    Returns: tuple (list of sorted array('I') of product codes, list of product names)
+    """
+    products = DictionaryColumn() # Only the value <-> code mapping is used
+    baskets = {}
+    if isinstance(transactions, TransactionTable):
+        # Codes are translated once per distinct value, not per row
+        product_map = [products.encode(v) for v in transactions.product_names.values]
+        n_days = len(transactions.dates.values)
+        for c, d, p in zip(transactions.customer_ids.codes, transactions.dates.codes,
+                           transactions.product_names.codes):
+            key = c * n_days + d
+            basket = baskets.get(key)
+            if basket is None:
+                basket = baskets[key] = array('I')
+            insert_code(basket, product_map[p])
+    else:
+        for t in transactions:
+            key = (t['CustomerID'], t['Date'])
+            basket = baskets.get(key)
+            if basket is None:
+                basket = baskets[key] = array('I')
+            insert_code(basket, products.encode(t['ProductName']))
+    return list(baskets.values()), products.values
+
+
+def _count_pair_shard(task):
+    """
+    Worker: counts co-occurring product pairs in a shard of baskets.
+    Pair (a, b) with a < b is keyed as a * n_items + b.
+    Returns: dict pair key -> baskets containing both
+    """
+    baskets, n_items = task
+    counts = Counter()
+    for items in baskets: # Ascending codes, so a < b in every pair
+        counts.update(a * n_items + b for a, b in combinations(items, 2))
+    return counts
+
+
+class PairCounts:
+    """
+    Item and pair frequencies over a set of baskets, restricted to items
+    and pairs that reach min_count baskets.
+    """
+
+    def __init__(self, names, basket_count, item_counts, pair_counts, min_count):
+        self.names = names
+        self.basket_count = basket_count
+        self.item_counts = item_counts # Product code -> baskets (all items)
+        self.pair_counts = pair_counts # a * len(names) + b -> baskets (frequent pairs only)
+        self.min_count = min_count
+
+    def pairs(self):
+        """
+        Yields (product a, product b, baskets with both) for the frequent pairs.
+        """
+        n = len(self.names)
+        for key, count in self.pair_counts.items():
+            a, b = divmod(key, n)
+            yield self.names[a], self.names[b], count
+
+    def rules(self, min_confidence=0.0):
+        """
+        Both directions of every frequent pair as association rules.
+        support: share of baskets with both products; confidence: share of
+        baskets with the antecedent that also hold the consequent; lift:
+        confidence relative to the consequent's own frequency (> 1 means
+        bought together more often than chance).
+        Returns: list of rule dicts, strongest lift first
+        """
+        n = len(self.names)
+        total = self.basket_count
+        rules = []
+        for key, count in self.pair_counts.items():
+            for x, y in (divmod(key, n), divmod(key, n)[::-1]):
+                confidence = count / self.item_counts[x]
+                if confidence < min_confidence:
+                    continue
+                rules.append({
+                    'antecedent': self.names[x],
+                    'consequent': self.names[y],
+                    'count': count,
+                    'support': round(count / total, 4),
+                    'confidence': round(confidence, 4),
+                    'lift': round(confidence * total / self.item_counts[y], 4)
+                })
+        rules.sort(key=lambda r: (-r['lift'], -r['count'], r['antecedent'], r['consequent']))
+        return rules
+
+
+@instrumented
+def count_pairs(baskets, names, min_support=0.01, workers=1):
+    """
+    Counts product pairs across baskets (sorted sequences of distinct product codes).
+    Items below min_support (share of baskets) are removed from every basket
+    before pairs are formed, since no pair containing them can reach it;
+    pairs are counted on `workers` processes over basket shards and pruned
+    to min_support after merging.
+    Returns: PairCounts
+    """
+    total = len(baskets)
+    min_count = max(1, math.ceil(min_support * total))
+
+    item_counts = [0] * len(names)
+    for basket in baskets:
+        for p in basket:
+            item_counts[p] += 1
+    frequent = [count >= min_count for count in item_counts]
+    pruned = [array('I', [p for p in basket if frequent[p]]) for basket in baskets]
+    pruned = [basket for basket in pruned if len(basket) > 1] # Needs two or more items to form a pair
+
+    n_items = len(names)
+    if workers > 1 and len(pruned) >= SHARD_MIN_BASKETS:
+        size = -(-len(pruned) // workers)
+        tasks = [(pruned[i:i + size], n_items) for i in range(0, len(pruned), size)]
+        pair_counts = Counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard in executor.map(_count_pair_shard, tasks):
+                pair_counts.update(shard)
+    else:
+        pair_counts = _count_pair_shard((pruned, n_items))
+
+    pair_counts = {key: count for key, count in pair_counts.items() if count >= min_count}
+    return PairCounts(names, total, item_counts, pair_counts, min_count)
+
+
+def basket_pair_counts(transactions, by=BY_CUSTOMER, min_support=0.01, workers=1):
+    """
+    Builds the baskets (per customer, or per customer and day) and counts
+    their product pairs. by=BY_CUSTOMER also accepts a CustomerAnalytics,
+    whose per-customer product codes are the baskets.
+    Returns: PairCounts
+    """
+    if by == BY_CUSTOMER:
+        analytics = as_customer_analytics(transactions)
+        baskets, names = analytics.product_codes, analytics.products.values
+    elif by == BY_DAY:
+        if isinstance(transactions, CustomerAnalytics):
+            raise ValueError("Day baskets need the transactions, not a CustomerAnalytics")
+        baskets, names = day_baskets(transactions)
+    else:
+        raise ValueError(f"by must be '{BY_CUSTOMER}' or '{BY_DAY}'")
+    return count_pairs(baskets, names, min_support, workers or os.cpu_count() or 1)
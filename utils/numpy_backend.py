@@ -0,0 +1,106 @@
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; the pure-Python backend always works
+    np = None
+
+from utils.sales_aggregate import SalesAggregate, add_largest_rows
+
+
+def numpy_available():
+    return np is not None
+
+
+def _codes(column):
+    # Zero-copy view over the array('I') code column
+    return np.frombuffer(column.codes, dtype=np.uintc).astype(np.int64)
+
+
+def _group_sets(outer, inner, n_inner, outer_values, inner_values):
+    """
+    Builds {outer_code: set(inner values)} from distinct (outer, inner) pairs.
+    Work scales with the number of distinct pairs, not with rows.
+    """
+    keys = np.sort(outer * n_inner + inner)
+    pairs = keys[np.r_[True, keys[1:] != keys[:-1]]] # Distinct, sorted by outer code
+    outer_codes = pairs // n_inner
+    values = np.array(inner_values, dtype=object)[pairs % n_inner]
+
+    # One slice per outer code that occurs
+    bounds = np.flatnonzero(np.diff(outer_codes)) + 1
+    sets = [set() for _ in outer_values]
+    for o, group in zip(outer_codes[np.r_[0, bounds]].tolist(), np.split(values, bounds)):
+        sets[o] = set(group)
+    return sets
+
+
+def aggregate_table_numpy(table):
+    """
+    Vectorized equivalent of aggregate_sales() for a TransactionTable.
+    Grouped sums use bincount, which accumulates in row order, so every
+    total matches the pure-Python backend exactly.
+    Returns: SalesAggregate
+    """
+    if np is None:
+        raise ImportError("The numpy backend requires NumPy (pip install numpy)")
+
+    agg = SalesAggregate()
+    if len(table) == 0:
+        return agg
+
+    qty = np.frombuffer(table.quantity, dtype=np.longlong)
+    revenue = np.frombuffer(table.revenue, dtype=np.float64)
+
+    region = _codes(table.regions)
+    product = _codes(table.product_names)
+    customer = _codes(table.customer_ids)
+    date = _codes(table.dates)
+
+    n_regions = len(table.regions.values)
+    n_products = len(table.product_names.values)
+    n_customers = len(table.customer_ids.values)
+    n_dates = len(table.dates.values)
+
+    # Totals (cumsum is sequential, unlike the pairwise np.sum)
+    agg.total_revenue = float(np.cumsum(revenue)[-1])
+    agg.total_quantity = int(qty.sum())
+    agg.transaction_count = len(table)
+    agg.min_amount = float(revenue.min())
+    agg.max_amount = float(revenue.max())
+
+    # Codes are assigned in first-seen order, so iterating by code keeps
+    # the same dict order as the row-by-row backend
+    reg_sales = np.bincount(region, weights=revenue, minlength=n_regions).tolist()
+    reg_count = np.bincount(region, minlength=n_regions).tolist()
+    for code, name in enumerate(table.regions.values):
+        agg.regions[name] = {'total_sales': reg_sales[code], 'transaction_count': reg_count[code]}
+
+    # Quantity sums go through float64 weights; exact below 2**53 units
+    prod_qty = np.bincount(product, weights=qty, minlength=n_products).astype(np.int64).tolist()
+    prod_rev = np.bincount(product, weights=revenue, minlength=n_products).tolist()
+    for code, name in enumerate(table.product_names.values):
+        agg.products[name] = {'qty': prod_qty[code], 'rev': prod_rev[code]}
+
+    cust_spent = np.bincount(customer, weights=revenue, minlength=n_customers).tolist()
+    cust_count = np.bincount(customer, minlength=n_customers).tolist()
+    cust_products = _group_sets(customer, product, n_products,
+                                table.customer_ids.values, table.product_names.values)
+    for code, cid in enumerate(table.customer_ids.values):
+        agg.customers[cid] = {
+            'total_spent': cust_spent[code],
+            'purchase_count': cust_count[code],
+            'products': cust_products[code]
+        }
+
+    day_rev = np.bincount(date, weights=revenue, minlength=n_dates).tolist()
+    day_count = np.bincount(date, minlength=n_dates).tolist()
+    day_customers = _group_sets(date, customer, n_customers,
+                                table.dates.values, table.customer_ids.values)
+    for code, day in enumerate(table.dates.values):
+        agg.daily[day] = {
+            'revenue': day_rev[code],
+            'transaction_count': day_count[code],
+            'customers': day_customers[code]
+        }
+
+    add_largest_rows(agg, table)
+    return agg
@@ -0,0 +1,142 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.file_handler import detect_encoding, split_into_chunks, read_line_range
+from utils.data_processor import clean_lines, print_cleaning_stats
+from utils.mmap_parser import parse_line_range, parse_file
+from utils.sales_aggregate import SalesAggregate, aggregate_sales
+from utils.transaction_table import TransactionTable
+from utils.profiler import instrumented
+
+CHUNK_BYTES = 64 * 1024 * 1024 # Upper bound on the bytes one worker holds at a time
+
+
+def _clean_chunk(task):
+    """
+    Worker: parses and cleans one newline-aligned byte range.
+    Returns: tuple (valid_records, total_parsed, invalid_count)
+    """
+    filename, start, end, encoding, as_table = task
+    if as_table:
+        return parse_line_range(filename, start, end, encoding)
+    return clean_lines(read_line_range(filename, start, end, encoding))
+
+
+def parallel_parse(filename, workers=None, as_table=False):
+    """
+    Parses and cleans a sales file on several cores, without printing.
+    The data section is split into byte ranges aligned to newlines, each range
+    is cleaned in a ProcessPoolExecutor worker and the results are merged in
+    file order, so the records match clean_data exactly.
+    Returns: tuple (valid_records, total_parsed, invalid_count)
+    Raises: FileNotFoundError
+    """
+    workers = workers or os.cpu_count() or 1
+    encoding = detect_encoding(filename)
+    size = os.path.getsize(filename)
+
+    # Several chunks per worker keeps the pool busy and bounds chunk size
+    chunk_count = max(workers * 4, size // CHUNK_BYTES + 1)
+    tasks = [(filename, start, end, encoding, as_table)
+             for start, end in split_into_chunks(filename, chunk_count)]
+
+    valid_records = TransactionTable() if as_table else []
+    total_parsed = 0
+    invalid_count = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() yields in submission order, which keeps the file order
+        for records, parsed, invalid in executor.map(_clean_chunk, tasks):
+            valid_records.extend(records)
+            total_parsed += parsed
+            invalid_count += invalid
+
+    return valid_records, total_parsed, invalid_count
+
+
+@instrumented
+def parallel_clean_data(filename, workers=None, as_table=False):
+    """
+    Parses and cleans a sales file on several cores (see parallel_parse).
+    Records and printed stats match clean_data exactly.
+    Returns: list of transaction dicts, or a TransactionTable if as_table=True
+    """
+    try:
+        valid_records, total_parsed, invalid_count = parallel_parse(filename, workers, as_table)
+    except FileNotFoundError:
+        print(f"Error: The file '{filename}' was not found.")
+        return TransactionTable() if as_table else []
+
+    print_cleaning_stats(total_parsed, invalid_count, len(valid_records))
+    return valid_records
+
+
+def _aggregate_chunk(task):
+    """
+    Worker: cleans one byte range and returns its partial aggregate, so only
+    the (small) rollups travel back to the parent process.
+    Returns: tuple (SalesAggregate, total_parsed, invalid_count)
+    """
+    filename, start, end, encoding, approximate, precision = task
+    table, parsed, invalid = parse_line_range(filename, start, end, encoding)
+    return aggregate_sales(table, approximate=approximate, precision=precision), parsed, invalid
+
+
+@instrumented
+def parallel_aggregate(filename, workers=None, approximate=False, precision=10):
+    """
+    Map-reduce analytics for one large file: each worker aggregates a chunk
+    and the partial aggregates are merged in file order.
+    Returns: SalesAggregate, readable by every data_processor analytics view
+    """
+    workers = workers or os.cpu_count() or 1
+    merged = SalesAggregate(approximate, precision)
+    try:
+        encoding = detect_encoding(filename)
+        size = os.path.getsize(filename)
+    except FileNotFoundError:
+        print(f"Error: The file '{filename}' was not found.")
+        return merged
+
+    chunk_count = max(workers * 4, size // CHUNK_BYTES + 1)
+    tasks = [(filename, start, end, encoding, approximate, precision)
+             for start, end in split_into_chunks(filename, chunk_count)]
+
+    total_parsed = 0
+    invalid_count = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for agg, parsed, invalid in executor.map(_aggregate_chunk, tasks):
+            merged.merge(agg)
+            total_parsed += parsed
+            invalid_count += invalid
+
+    print_cleaning_stats(total_parsed, invalid_count, merged.transaction_count)
+    return merged
+
+
+def _aggregate_file(task):
+    """
+    Worker: reads, cleans and aggregates one whole file.
+    Returns: tuple (SalesAggregate, total_parsed, invalid_count)
+    """
+    filename, approximate, precision = task
+    table, parsed, invalid = parse_file(filename)
+    return aggregate_sales(table, approximate=approximate, precision=precision), parsed, invalid
+
+
+@instrumented
+def aggregate_files(filenames, workers=None, approximate=False, precision=10):
+    """
+    Aggregates many sales files (e.g. a month of daily dumps) in parallel,
+    one file per worker, and reduces them into a single SalesAggregate.
+    """
+    workers = workers or os.cpu_count() or 1
+    merged = SalesAggregate(approximate, precision)
+    tasks = [(filename, approximate, precision) for filename in filenames]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for filename, (agg, parsed, invalid) in zip(filenames, executor.map(_aggregate_file, tasks)):
+            print(f"{filename}: parsed {parsed}, invalid {invalid}, valid {agg.transaction_count}")
+            merged.merge(agg)
+
+    return merged
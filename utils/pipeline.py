@@ -0,0 +1,243 @@
+import contextlib
+import io
+import os
+
+from utils.mmap_parser import parse_sales_file
+from utils.columnar_cache import load_cleaned_table
+from utils.data_processor import (calculate_metrics, region_wise_sales, top_selling_products,
+                                  top_customers, daily_sales_trend, find_peak_sales_day,
+                                  low_performing_products, generate_report, validate_and_filter,
+                                  generate_sales_report, product_associations, enrichment_summary,
+                                  largest_transactions)
+from utils.sales_aggregate import aggregate_sales
+from utils.api_handler import enrich_sales_data, save_enriched_data
+from utils.prefetch import ApiPrefetcher
+from utils.currency import print_converted_totals
+from utils.parallel_processor import parallel_clean_data
+from utils.profiler import MetricsRecorder
+from utils.output_writer import COMPRESSION_EXTENSIONS
+
+STAGES = ['read_clean', 'aggregate', 'filter', 'analyze', 'fetch', 'enrich', 'save', 'report', 'summary']
+
+
+def run_pipeline(input_file, enriched_file='data/enriched_sales_data.txt', sales_report_file='output/sales_report.txt',
+                 summary_file='output/summary_report.txt', region=None, min_amount=1000, max_amount=None,
+                 workers=1, choose_filters=None, trace_memory=False, profile_dir=None, use_cache=True,
+                 enriched_format='text', compression=None, time_windows=False, associations=False,
+                 currencies=None, report_formats=('text',)):
+    """
+    Runs the full read -> clean -> analyze -> enrich -> report flow for one file.
+    choose_filters: optional callable(regions, min_amount, max_amount) returning
+    (region, min_amount, max_amount), used for interactive filtering.
+    workers > 1 parses and cleans the file on several cores.
+    use_cache: reuse the columnar cache of the cleaned data while the file is unchanged,
+    and unchanged report sections from the report cache.
+    enriched_format: "text" (pipe-delimited) or "columnar" (binary, <name>.cols directory).
+    compression: "gzip" or "zstd" to compress the text enriched file (.gz / .zst appended).
+    time_windows: add the weekly/monthly/rolling TIME WINDOWS section to the sales report.
+    associations: add the PRODUCT ASSOCIATIONS (co-purchase) section to the sales report.
+    currencies: currency codes (e.g. ['EUR', 'GBP']) the totals are also reported in;
+    the console summary defaults to EUR.
+    report_formats: "text" plus optionally "json" and "csv" for both reports.
+    trace_memory / profile_dir: see utils.profiler.MetricsRecorder.
+    The exchange-rate table and product lookups run in the background from the
+    start (see utils.prefetch.ApiPrefetcher) and are awaited at steps 6 and 10.
+    Returns: dict with the aggregates, counts, per-stage timings and metrics
+    """
+    recorder = MetricsRecorder(trace_memory, profile_dir)
+    previous = recorder.activate() # Instrumented functions report into this run
+    prefetcher = ApiPrefetcher()
+    try:
+        # Network round trips start now and overlap with parsing and analytics
+        prefetcher.start_rates("USD")
+        prefetcher.start_catalog()
+        result = _run_stages(recorder, prefetcher, input_file, enriched_file, sales_report_file, summary_file,
+                             region, min_amount, max_amount, workers, choose_filters, use_cache, enriched_format,
+                             compression, time_windows, associations, currencies, report_formats)
+    finally:
+        prefetcher.close()
+        recorder.deactivate(previous)
+
+    wall_times = recorder.wall_times()
+    result['timings'] = {stage: wall_times[stage] for stage in STAGES if stage in wall_times}
+    result['metrics'] = recorder.to_dict()
+    return result
+
+
+def _run_stages(recorder, prefetcher, input_file, enriched_file, sales_report_file, summary_file,
+                region, min_amount, max_amount, workers, choose_filters, use_cache, enriched_format, compression,
+                time_windows, associations, currencies, report_formats):
+    stage = recorder.stage
+
+    with stage('read_clean') as record:
+        # [1/10] Reading Data
+        print("\n[1/10] Reading sales data...")
+        if use_cache:
+            print(f"✓ Reading {input_file} (cleaned columns are cached while it is unchanged)")
+
+            # [2/10] Cleaning Data
+            print("\n[2/10] Parsing and cleaning data...")
+            cleaned_data = load_cleaned_table(input_file, workers=workers)
+        elif workers > 1:
+            print(f"✓ Splitting {input_file} across {workers} workers")
+
+            # [2/10] Cleaning Data
+            print("\n[2/10] Parsing and cleaning data...")
+            cleaned_data = parallel_clean_data(input_file, workers=workers, as_table=True)
+        else:
+            print(f"✓ Memory-mapping {input_file}")
+
+            # [2/10] Cleaning Data
+            print("\n[2/10] Parsing and cleaning data...")
+            cleaned_data = parse_sales_file(input_file) # Columnar store, parsed block by block
+        record.rows_out = len(cleaned_data)
+
+    if len(cleaned_data) == 0:
+        raise ValueError(f"No valid transactions found in {input_file}")
+    prefetcher.start_products(cleaned_data.product_ids.values) # Resolved while the analyses run
+
+    with stage('aggregate'):
+        sales_agg = aggregate_sales(cleaned_data) # Single pass shared by every analysis below
+    total_rev = sales_agg.total_revenue
+    print(f"✓ Parsed {len(cleaned_data)} records")
+    print(f"Task 2.1 - Total Revenue: {total_rev}")
+
+    # [3/10] Display Filter Options (User Interaction Requirement)
+    print("\n[3/10] Filter Options Available:")
+    available_regions = sorted(sales_agg.regions)
+    print(f"Regions: {', '.join(available_regions)}")
+    print(f"Amount Range: ${sales_agg.min_amount:,.2f} - ${sales_agg.max_amount:,.2f}")
+    if choose_filters:
+        region, min_amount, max_amount = choose_filters(available_regions, min_amount, max_amount)
+
+    with stage('filter', rows_in=len(cleaned_data)) as record:
+        # [4/10] Validation and Filtering
+        print("\n[4/10] Validating transactions...")
+        filtered_data, inv_count, summary = validate_and_filter(cleaned_data, region=region,
+                                                                min_amount=min_amount, max_amount=max_amount)
+        print(f"✓ Valid: {len(filtered_data)} | Invalid: {inv_count}")
+        record.rows_out = len(filtered_data)
+
+    with stage('analyze'):
+        # [5/10] Data Analyses (views over the shared aggregate)
+        print("\n[5/10] Analyzing sales data...")
+        region_wise_sales(sales_agg)
+        top_selling_products(sales_agg, n=3)
+        top_customers(sales_agg, n=5) # The report only shows the top 5
+        daily_sales_trend(sales_agg)
+        find_peak_sales_day(sales_agg)
+        low_performing_products(sales_agg, threshold=15, n=10) # The report lists the lowest 10
+        largest_transactions(sales_agg, n=5)
+        rules = product_associations(cleaned_data, workers=workers) if associations else None
+        print("✓ Analysis complete")
+
+    with stage('fetch'):
+        # [6/10] API Fetch (started in the background; only new or expired ProductIDs hit the API)
+        print("\n[6/10] Fetching product data from API...")
+        product_map, fetched = prefetcher.products()
+        print(f"✓ Resolved {len(product_map)} products ({fetched} looked up from API)")
+        if product_map:
+            sample_id = next(iter(product_map))
+            print(f"Sample Product from API: {sample_id}: {product_map[sample_id]}")
+
+    with stage('enrich', rows_in=len(cleaned_data)):
+        # [7/10] Enrichment
+        print("\n[7/10] Enriching sales data...")
+        enriched_data = enrich_sales_data(cleaned_data, product_map)
+        match_count, _, _ = enrichment_summary(enriched_data) # Counted per ProductID, no row dicts
+        print(f"✓ Enriched {match_count} transactions")
+        print(f"Sample Enriched Record (Match={enriched_data[0]['API_Match']})")
+
+    with stage('save', rows_in=len(cleaned_data)):
+        # [8/10] Saving Data
+        print("\n[8/10] Saving enriched data...")
+        if enriched_format == 'columnar':
+            enriched_file = os.path.splitext(enriched_file)[0] + '.cols'
+        elif compression:
+            enriched_file += COMPRESSION_EXTENSIONS[compression]
+        rates = prefetcher.rates() if currencies else None # Revenue_<currency> columns per row
+        save_enriched_data(enriched_data, enriched_file, file_format=enriched_format, compression=compression,
+                           rates=rates, currencies=currencies)
+        print(f"✓ Saved to: {enriched_file}")
+
+    with stage('report'):
+        # [9/10] Generating Final Report
+        print("\n[9/10] Generating comprehensive report...")
+        rates = prefetcher.rates() if currencies else None # The table step 8 already collected
+        generate_sales_report(sales_agg, enriched_data, sales_report_file, time_windows=time_windows,
+                              associations=rules, rates=rates, currencies=currencies, formats=report_formats,
+                              cache=use_cache)
+
+    with stage('summary'):
+        # [10/10] Final Analytics and Reporting
+        print("\n[10/10] Finalizing Global Summary...")
+        rates = prefetcher.rates() # Fetched in the background since startup
+        filtered_agg = aggregate_sales(filtered_data)
+        rev_usd, qty = calculate_metrics(filtered_agg)
+
+        print("\n--- Final Global Summary ---")
+        print(f"Total Revenue (USD): ${rev_usd:,.2f}")
+        print_converted_totals(rev_usd, rates, currencies or ['EUR'])
+
+        generate_report(filtered_agg, summary_file, rates, currencies, formats=report_formats, cache=use_cache)
+
+    return {
+        'input_file': input_file,
+        'aggregate': sales_agg,
+        'filtered_aggregate': filtered_agg,
+        'row_count': len(cleaned_data),
+        'match_count': match_count
+    }
+
+
+def common_root(input_files):
+    """
+    Deepest directory containing every input file.
+    """
+    return os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in input_files])
+
+
+def output_name(input_file, root=None):
+    """
+    Output name of an input file: its path below root without the extension
+    (e.g. a/sales for <root>/a/sales.txt), or just its stem without a root.
+    """
+    if root is None:
+        return os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.relpath(os.path.splitext(os.path.abspath(input_file))[0], root)
+
+
+def output_paths(input_file, output_dir, root=None):
+    """
+    Per-file output locations used in batch mode: <output_dir>/<output name>/...
+    Pass common_root(inputs) as root so that a/sales.txt and b/sales.txt do
+    not share (and overwrite) one output directory.
+    """
+    file_dir = os.path.join(output_dir, output_name(input_file, root))
+    os.makedirs(file_dir, exist_ok=True)
+    return {
+        'enriched_file': os.path.join(file_dir, 'enriched_sales_data.txt'),
+        'sales_report_file': os.path.join(file_dir, 'sales_report.txt'),
+        'summary_file': os.path.join(file_dir, 'summary_report.txt')
+    }
+
+
+def run_pipeline_quietly(task):
+    """
+    Process-pool worker for batch mode: runs one file's pipeline with its
+    console output captured, so parallel runs do not interleave. The output
+    is also written to pipeline.log next to the file's reports.
+    Returns: pipeline result dict, plus 'error' (None on success) and 'log'
+    """
+    input_file, options = task
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            result = run_pipeline(input_file, **options)
+        result['error'] = None
+    except Exception as e:
+        result = {'input_file': input_file, 'error': str(e), 'timings': {}}
+    result['log'] = log.getvalue()
+    with open(os.path.join(os.path.dirname(options['summary_file']), 'pipeline.log'), 'w', encoding='utf-8') as f:
+        f.write(result['log'])
+    return result
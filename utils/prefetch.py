@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import partial
+
+from utils.api_cache import OFFLINE
+from utils.api_handler import fetch_rate_table, fetch_all_products
+from utils.currency import RateTable, FALLBACK_RATES
+from utils.product_resolver import ProductResolver
+
+AWAIT_TIMEOUT = 60 # Seconds to wait for a background lookup before using its fallback
+
+
+class ApiPrefetcher:
+    """
+    Runs a pipeline's network lookups on background threads, so their round
+    trips overlap with parsing and analytics instead of adding to them.
+    The exchange rates and the product catalog start at once; ProductIDs are
+    resolved as soon as they are known. Each lookup keeps its own request
+    timeouts and fallbacks, and its console messages are printed when its
+    result is collected, so the log reads in the usual order.
+    """
+
+    def __init__(self, offline=None, await_timeout=AWAIT_TIMEOUT):
+        self.offline = OFFLINE if offline is None else offline
+        self.await_timeout = await_timeout
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='prefetch')
+        self._rates = None
+        self._rates_base = "USD"
+        self._rate_table = None
+        self._catalog = None
+        self._products = None
+
+    def start_rates(self, base="USD"):
+        # One request brings every currency; conversions then use the RateTable
+        self._rates = self._executor.submit(self._logged, fetch_rate_table, base)
+        self._rates_base = base
+
+    def start_catalog(self):
+        # Offline runs only have the resolver's stored products to offer
+        if not self.offline:
+            self._catalog = self._executor.submit(self._logged, partial(fetch_all_products, with_fetched_at=True))
+
+    def start_products(self, raw_pids):
+        """
+        Resolves local ProductIDs in the background (see ProductResolver).
+        The catalog is stored first, so only IDs it lacks still hit the API.
+        """
+        self._products = self._executor.submit(self._resolve, list(raw_pids))
+
+    @staticmethod
+    def _logged(func, *args):
+        messages = []
+        return func(*args, log=messages.append), messages
+
+    def _resolve(self, raw_pids):
+        messages = []
+        offline = self.offline
+        catalog, fetched_at = [], None
+        if self._catalog is not None:
+            try:
+                (catalog, fetched_at), messages = self._catalog.result()
+            except Exception as e:
+                messages.append(f"API Failure: Could not fetch the product catalog. Error: {e}")
+            # No catalog means the API is unreachable: serve the stored products
+            # rather than waiting for the same timeouts and retries again
+            offline = offline or not catalog
+
+        # SQLite connections belong to the thread that opened them
+        resolver = ProductResolver(offline=offline)
+        try:
+            if catalog:
+                resolver.add_products(catalog, fetched_at) # Keeps a stale catalog's real age
+            product_map = resolver.resolve(raw_pids, log=messages.append)
+            return (product_map, resolver.last_fetched), messages
+        finally:
+            resolver.close()
+
+    def _collect(self, future, what, fallback):
+        try:
+            result, messages = future.result(timeout=self.await_timeout)
+        except TimeoutError:
+            print(f"API Error: {what} took longer than {self.await_timeout}s. Using fallback")
+            return fallback
+        except Exception as e:
+            print(f"API Error fetching {what}: {e}. Using fallback")
+            return fallback
+        for message in messages:
+            print(message)
+        return result
+
+    def rates(self):
+        """
+        Waits for the exchange rates started by start_rates(); later calls
+        return the same table.
+        Returns: RateTable (FALLBACK_RATES if the lookup failed or timed out)
+        """
+        if self._rate_table is None:
+            base = self._rates_base
+            fallback = RateTable(base, FALLBACK_RATES if base == "USD" else {}, fallback=True)
+            self._rate_table = self._collect(self._rates, "exchange rates", fallback)
+        return self._rate_table
+
+    def products(self):
+        """
+        Waits for the lookup started by start_products().
+        Returns: tuple (product mapping, number of IDs looked up from the API)
+        """
+        return self._collect(self._products, "product data", ({}, 0))
+
+    def close(self):
+        # Lookups still running finish on their own; nothing waits for them
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,192 @@
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from utils.api_cache import OFFLINE
+from utils.api_handler import DUMMYJSON_URL, FETCH_WORKERS, PRODUCTS_TTL, create_session
+from utils.profiler import instrumented, record_http
+
+DEFAULT_RESOLVER_PATH = os.environ.get('SALES_PRODUCT_CACHE', '.cache/products.sqlite')
+BATCH_SIZE = 100 # Max products per DummyJSON skip/limit request
+MAX_GAP = 10 # Unneeded IDs tolerated inside one batch to save a request
+
+
+class ProductResolver:
+    """
+    Memoized ProductID -> numeric ID -> API metadata resolver.
+    Metadata is persisted in SQLite between runs; only IDs that are new or
+    older than ttl are looked up, in batched skip/limit requests.
+    resolve() returns the same {id: {'title', 'category', 'brand', 'rating'}}
+    mapping as create_product_mapping, so enrich_sales_data is unchanged.
+    """
+
+    def __init__(self, path=DEFAULT_RESOLVER_PATH, ttl=PRODUCTS_TTL, offline=None,
+                 base_url=DUMMYJSON_URL, max_workers=FETCH_WORKERS):
+        self.ttl = ttl
+        self.offline = OFFLINE if offline is None else offline
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.last_fetched = 0 # IDs looked up from the API by the last resolve()
+
+        self._numeric = {} # 'P101' -> 101 (None if unparseable)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        # info is NULL for IDs the API does not know, so they are not retried until expiry
+        self._conn.execute("CREATE TABLE IF NOT EXISTS products ("
+                           "id INTEGER PRIMARY KEY, info TEXT, fetched_at REAL NOT NULL)")
+
+    def numeric_id(self, raw_pid):
+        """
+        Extracts the numeric ID (P101 -> 101), parsing each ProductID once.
+        """
+        if raw_pid not in self._numeric:
+            try:
+                self._numeric[raw_pid] = int(raw_pid.replace('P', '').strip())
+            except ValueError:
+                self._numeric[raw_pid] = None
+        return self._numeric[raw_pid]
+
+    def add_products(self, api_products, fetched_at=None):
+        """
+        Stores products already fetched elsewhere (e.g. fetch_all_products output).
+        fetched_at: when they were fetched (default: now). A catalog served
+        stale from the API cache keeps its age, so it still expires on time;
+        rows fetched more recently are not replaced by it.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        self._conn.executemany(
+            "INSERT INTO products (id, info, fetched_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET info = excluded.info, fetched_at = excluded.fetched_at "
+            "WHERE excluded.fetched_at >= products.fetched_at",
+            [(p['id'], json.dumps(self._format(p)), fetched_at) for p in api_products if p.get('id') is not None])
+        self._conn.commit()
+
+    @instrumented
+    def resolve(self, raw_pids, log=print):
+        """
+        Resolves local ProductIDs to API metadata.
+        log: receives the failure message when the API cannot be reached.
+        Returns: dict mapping numeric product ID to info (known products only)
+        """
+        ids = {self.numeric_id(pid) for pid in set(raw_pids)}
+        ids = {i for i in ids if i is not None and i > 0} # DummyJSON IDs start at 1
+
+        stored = self._load(ids)
+        now = time.time()
+        missing = sorted(i for i in ids if i not in stored or now - stored[i][1] >= self.ttl)
+
+        self.last_fetched = 0
+        if missing and not self.offline:
+            try:
+                fetched = self._fetch(missing)
+            except requests.exceptions.RequestException as e:
+                # Keep serving whatever is stored, even if expired
+                log(f"API Failure: Could not resolve {len(missing)} products. Error: {e}")
+            else:
+                self._store(missing, fetched, now)
+                for i in missing:
+                    stored[i] = (fetched.get(i), now)
+                self.last_fetched = len(missing)
+
+        return {i: info for i, (info, _) in stored.items() if info is not None}
+
+    def _load(self, ids):
+        stored = {}
+        id_list = list(ids)
+        for start in range(0, len(id_list), 500): # Stay below SQLite's parameter limit
+            batch = id_list[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for i, info, fetched_at in self._conn.execute(
+                    f"SELECT id, info, fetched_at FROM products WHERE id IN ({placeholders})", batch):
+                stored[i] = (json.loads(info) if info else None, fetched_at)
+        return stored
+
+    def _store(self, ids, fetched, now):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO products (id, info, fetched_at) VALUES (?, ?, ?)",
+            [(i, json.dumps(fetched[i]) if i in fetched else None, now) for i in ids])
+        self._conn.commit()
+
+    @staticmethod
+    def _format(p):
+        return {
+            'title': p.get('title'),
+            'category': p.get('category'),
+            'brand': p.get('brand'),
+            'rating': p.get('rating')
+        }
+
+    @staticmethod
+    def _batches(ids):
+        """
+        Groups sorted IDs into (skip, limit) requests, assuming ID n is at
+        position n - 1 (DummyJSON IDs start at 1); _fetch checks the result.
+        """
+        batches = []
+        first = last = ids[0]
+        for i in ids[1:]:
+            if i - last > MAX_GAP or i - first >= BATCH_SIZE:
+                batches.append((first - 1, last - first + 1))
+                first = i
+            last = i
+        batches.append((first - 1, last - first + 1))
+        return batches
+
+    def _fetch(self, ids):
+        """
+        Looks up the given numeric IDs with batched, concurrent requests.
+        A skip/limit batch only lines up with the IDs while the catalog has
+        no gaps, so IDs a batch did not return are requested one by one
+        (/products/{id}); only those the API answers 404 for are absent.
+        Returns: dict id -> info for the IDs the API returned
+        """
+        url = f"{self.base_url}/products"
+        session = create_session(self.max_workers)
+        fields = 'title,category,brand,rating'
+
+        def get(request_url, params):
+            start = time.perf_counter()
+            try:
+                response = session.get(request_url, params=params, timeout=10)
+            except requests.exceptions.RequestException:
+                record_http(request_url, time.perf_counter() - start)
+                raise
+            record_http(response.url, time.perf_counter() - start, response.status_code)
+            return response
+
+        def fetch_batch(batch):
+            skip, limit = batch
+            response = get(url, {'limit': limit, 'skip': skip, 'select': fields})
+            response.raise_for_status()
+            return response.json().get('products', [])
+
+        def fetch_one(product_id):
+            response = get(f"{url}/{product_id}", {'select': fields})
+            if response.status_code == 404:
+                return None # Not in the catalog
+            response.raise_for_status()
+            return response.json()
+
+        found = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for products in executor.map(fetch_batch, self._batches(ids)):
+                    for p in products:
+                        found[p.get('id')] = self._format(p)
+                unmatched = [i for i in ids if i not in found]
+                for product_id, p in zip(unmatched, executor.map(fetch_one, unmatched)):
+                    if p is not None:
+                        found[product_id] = self._format(p)
+        finally:
+            session.close()
+        return found
+
+    def close(self):
+        self._conn.close()
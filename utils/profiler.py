@@ -0,0 +1,215 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from utils.transaction_table import TransactionTable
+
+try:
+    import resource # Unix only; peak RSS is omitted elsewhere
+except ImportError:
+    resource = None
+
+_active = None # MetricsRecorder receiving measurements, if any
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if os.uname().sysname == 'Darwin' else peak # macOS reports bytes
+
+
+def _length(value):
+    # Only row containers count: len() of a tuple result, a filename or a
+    # sketch is not a number of rows
+    if isinstance(value, (list, dict, TransactionTable)):
+        return len(value)
+    return None
+
+
+class StageRecord:
+    """
+    Measurements for one execution of a stage. Callers may set rows_in /
+    rows_out inside the with-block when they are not known up front.
+    """
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_traced_kb = None
+        self.peak_rss_kb = None
+        self._child_peak = 0
+
+
+class MetricsRecorder:
+    """
+    Collects per-stage wall time, CPU time, peak memory, row counts and HTTP
+    latencies. Stages are entered with `with recorder.stage(name):`; the
+    @instrumented functions report into whichever recorder is active.
+    trace_memory: track peak Python allocations per stage with tracemalloc
+    (noticeable overhead). profile_dir: dump a cProfile file per top-level stage.
+    """
+
+    def __init__(self, trace_memory=False, profile_dir=None):
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.stages = {} # name -> aggregated totals over all calls
+        self.http = []
+        self._local = threading.local() # Stage stacks are per thread
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def activate(self):
+        """
+        Makes this recorder receive @instrumented and HTTP measurements.
+        Returns: the previously active recorder (pass it to deactivate)
+        """
+        global _active
+        previous, _active = _active, self
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return previous
+
+    def deactivate(self, previous=None):
+        global _active
+        _active = previous
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def stage(self, name, rows_in=None):
+        return _Stage(self, name, rows_in)
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def record_http(self, url, latency_s, status=None):
+        self.http.append({'url': url, 'latency_s': round(latency_s, 6), 'status': status})
+
+    def _finish(self, record):
+        totals = self.stages.setdefault(record.name, {
+            'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows_in': None, 'rows_out': None,
+            'peak_traced_kb': None, 'peak_rss_kb': None
+        })
+        totals['calls'] += 1
+        totals['wall_s'] += record.wall_s
+        totals['cpu_s'] += record.cpu_s
+        for field in ('rows_in', 'rows_out'):
+            value = getattr(record, field)
+            if value is not None:
+                totals[field] = (totals[field] or 0) + value
+        for field in ('peak_traced_kb', 'peak_rss_kb'):
+            value = getattr(record, field)
+            if value is not None:
+                totals[field] = max(totals[field] or 0, value)
+
+    def wall_times(self):
+        """
+        Returns: dict stage name -> total wall seconds
+        """
+        return {name: totals['wall_s'] for name, totals in self.stages.items()}
+
+    def to_dict(self):
+        stages = {}
+        for name, totals in self.stages.items():
+            stage = dict(totals, wall_s=round(totals['wall_s'], 6), cpu_s=round(totals['cpu_s'], 6))
+            rows = totals['rows_in'] if totals['rows_in'] is not None else totals['rows_out']
+            stage['rows_per_s'] = round(rows / totals['wall_s'], 1) if rows and totals['wall_s'] > 0 else None
+            stages[name] = stage
+        return {'stages': stages, 'http': self.http}
+
+    def write_json(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+class _Stage:
+    """
+    Context manager measuring one stage; nested stages are supported.
+    """
+
+    def __init__(self, recorder, name, rows_in):
+        self.recorder = recorder
+        self.record = StageRecord(name, rows_in)
+        self.profile = None
+
+    def __enter__(self):
+        recorder = self.recorder
+        # tracemalloc peaks and cProfile are process-wide: only the main thread uses them
+        self.main_thread = threading.current_thread() is threading.main_thread()
+        if self.main_thread and recorder.trace_memory and tracemalloc.is_tracing():
+            # Save the enclosing stage's peak before resetting it for this one
+            if recorder._stack:
+                parent = recorder._stack[-1].record
+                parent._child_peak = max(parent._child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        if self.main_thread and recorder.profile_dir and not recorder._stack:
+            self.profile = cProfile.Profile() # Only top-level stages: profilers cannot nest
+            self.profile.enable()
+        recorder._stack.append(self)
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        record = self.record
+        record.wall_s = time.perf_counter() - self._wall
+        record.cpu_s = time.process_time() - self._cpu
+        record.peak_rss_kb = _peak_rss_kb()
+
+        recorder = self.recorder
+        recorder._stack.pop()
+        if self.main_thread and recorder.trace_memory and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], record._child_peak)
+            record.peak_traced_kb = peak // 1024
+            if recorder._stack:
+                parent = recorder._stack[-1].record
+                parent._child_peak = max(parent._child_peak, peak)
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(os.path.join(recorder.profile_dir, f"{record.name}.prof"))
+
+        recorder._finish(record)
+        return False
+
+
+def instrumented(func):
+    """
+    Decorator recording a function call as a stage named module.function in
+    the active recorder. rows_in/rows_out are the row counts of the first
+    argument and of the result when they are a list, dict or TransactionTable
+    (tuple results are not counted). No-op when nothing is recording.
+    """
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        recorder = _active
+        if recorder is None:
+            return func(*args, **kwargs)
+        with recorder.stage(name, _length(args[0]) if args else None) as record:
+            result = func(*args, **kwargs)
+            record.rows_out = _length(result)
+        return result
+
+    return wrapper
+
+
+def record_http(url, latency_s, status=None):
+    """
+    Reports one HTTP request to the active recorder, if any.
+    """
+    if _active is not None:
+        _active.record_http(url, latency_s, status)
@@ -0,0 +1,191 @@
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError: # Not available on Windows; saves then only merge without a lock
+    fcntl = None
+
+REPORT_CACHE = os.environ.get('SALES_REPORT_CACHE', '.cache/report_sections.json')
+CACHE_VERSION = 2 # Bump when a section's data or layout changes, so old entries are not reused
+MAX_CACHE_ENTRIES = 256 # Oldest entries are dropped beyond this
+FORMATS = ('text', 'json', 'csv')
+
+
+def digest(value):
+    """
+    Stable hash of a JSON-serializable value (same value -> same digest in every process).
+    """
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+class Section:
+    """
+    One report section.
+    depends: names of the dependencies (see ReportEngine) whose fingerprints
+    decide whether a cached copy is still valid.
+    build(inputs): returns the section data (JSON-serializable; this is what
+    the JSON output holds).
+    render(data): returns the section text.
+    rows(data): optional; returns (header, rows) for the section's CSV file.
+    volatile: never cached (e.g. a header with the generation time).
+    """
+
+    def __init__(self, name, depends, build, render, rows=None, volatile=False):
+        self.name = name
+        self.depends = tuple(depends)
+        self.build = build
+        self.render = render
+        self.rows = rows
+        self.volatile = volatile
+
+
+class ReportEngine:
+    """
+    Renders reports from declared sections. Each dependency is fingerprinted
+    at most once per report; a section whose dependency fingerprints are
+    unchanged is served from the cache (in memory, and in a JSON file when
+    cache_path is set) without being rebuilt or re-rendered. Section text is
+    only rendered when the text format is requested.
+    dependencies: dict name -> callable(inputs) returning a fingerprint string
+    """
+
+    def __init__(self, sections, dependencies, cache_path=None, max_entries=MAX_CACHE_ENTRIES):
+        self.sections = {section.name: section for section in sections}
+        self.dependencies = dependencies
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._cache = None
+        self.hits = 0
+        self.misses = 0
+
+    def _read_entries(self):
+        """
+        Returns: dict of the entries stored in cache_path ({} if missing or unreadable)
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('version') == CACHE_VERSION:
+                return stored['entries']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Ignoring unreadable report cache {self.cache_path}: {e}")
+        return {}
+
+    def _load_cache(self):
+        if self._cache is None:
+            self._cache = self._read_entries()
+        return self._cache
+
+    def _save_cache(self):
+        if not self.cache_path:
+            self._trim(self._cache)
+            return
+        directory = os.path.dirname(self.cache_path)
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Parallel batch workers share the file: each one re-reads it under
+            # the lock and adds its entries, instead of replacing the others'
+            with open(f"{self.cache_path}.lock", 'w') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                merged = {key: entry for key, entry in self._read_entries().items() if key not in self._cache}
+                merged.update(self._cache) # Ours were used last, so they go after the stored ones
+                self._cache = self._trim(merged)
+                tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': CACHE_VERSION, 'entries': self._cache}, f)
+                os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: Could not save the report cache: {e}")
+
+    def _trim(self, cache):
+        while len(cache) > self.max_entries:
+            del cache[next(iter(cache))] # Dicts keep insertion order: oldest first
+        return cache
+
+    def _section_entries(self, names, inputs):
+        """
+        Returns: list of (section, cache entry dict with 'data' and, once rendered, 'text')
+        """
+        cache = self._load_cache()
+        fingerprints = {}
+        entries = []
+        changed = False
+        for name in names:
+            section = self.sections[name]
+            if section.volatile:
+                entries.append((section, {'data': section.build(inputs)}))
+                continue
+            for dep in section.depends:
+                if dep not in fingerprints:
+                    fingerprints[dep] = self.dependencies[dep](inputs)
+            key = f"{name}:{digest([fingerprints[dep] for dep in section.depends])}"
+            entry = cache.pop(key, None) # Re-inserted below, so it counts as recently used
+            if entry is None:
+                self.misses += 1
+                entry = {'data': section.build(inputs)}
+                changed = True
+            else:
+                self.hits += 1
+            cache[key] = entry
+            entries.append((section, entry))
+        return entries, changed
+
+    def render(self, names, inputs, output_file, formats=('text',)):
+        """
+        Builds (or reuses) the named sections and writes them in each format:
+        text -> output_file; json -> <output_file stem>.json;
+        csv -> <output_file stem>_<section>.csv for every tabular section.
+        Returns: list of the paths written
+        """
+        unknown = [fmt for fmt in formats if fmt not in FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown report format(s): {', '.join(unknown)} (known: {', '.join(FORMATS)})")
+
+        entries, changed = self._section_entries(names, inputs)
+        stem = os.path.splitext(output_file)[0]
+        written = []
+
+        if 'text' in formats:
+            parts = []
+            for section, entry in entries:
+                if 'text' not in entry:
+                    entry['text'] = section.render(entry['data'])
+                    changed = changed or not section.volatile
+                parts.append(entry['text'])
+            with open(output_file, 'w', encoding='utf-8') as out:
+                out.write("".join(parts)) # Assembled in memory, written with a single write()
+            written.append(output_file)
+
+        if 'json' in formats:
+            path = stem + '.json'
+            document = {
+                'generated': datetime.now().isoformat(timespec='seconds'),
+                'sections': {section.name: entry['data'] for section, entry in entries}
+            }
+            with open(path, 'w', encoding='utf-8') as out:
+                json.dump(document, out, indent=2)
+            written.append(path)
+
+        if 'csv' in formats:
+            for section, entry in entries:
+                if section.rows is None:
+                    continue
+                header, rows = section.rows(entry['data'])
+                path = f"{stem}_{section.name}.csv"
+                with open(path, 'w', encoding='utf-8', newline='') as out:
+                    writer = csv.writer(out)
+                    writer.writerow(header)
+                    writer.writerows(rows)
+                written.append(path)
+
+        if changed:
+            self._save_cache()
+        return written
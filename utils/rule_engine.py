@@ -0,0 +1,234 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from utils.transaction_table import TransactionTable
+
+# Stages decide which summary counter a rejection lands in
+CLEAN = 'clean'       # Malformed record (clean_data's "invalid")
+VALIDATE = 'validate' # Fails the Task 1.3 prefix checks (validate_and_filter's "invalid")
+FILTER = 'filter'     # Valid, but outside the requested region/amount range
+
+Rule = namedtuple('Rule', ['name', 'field', 'test', 'value', 'stage'], defaults=[None, CLEAN])
+Rule.__doc__ = """
+Declarative row check: `field` must pass `test` (against `value`), or the
+row is rejected and counted under `name`.
+field: a transaction field name, or 'Amount' (Quantity * UnitPrice)
+test: one of TESTS
+"""
+
+# Always checked first: a row must split into 8 fields with numeric Quantity/UnitPrice
+FIELD_COUNT = 'field_count'
+NUMERIC_FIELDS = 'numeric_fields'
+
+# Requirement: Validation Rules (the checks clean_data applies)
+CLEAN_RULES = (
+    Rule('transaction_id_prefix', 'TransactionID', 'startswith', 'T'),
+    Rule('quantity_positive', 'Quantity', 'gt', 0),
+    Rule('price_positive', 'UnitPrice', 'gt', 0),
+    Rule('customer_id_present', 'CustomerID', 'not_blank'),
+    Rule('region_present', 'Region', 'not_blank'),
+)
+
+# Strict validation prefixes required by Task 1.3 (the T prefix is already a cleaning rule)
+VALIDATION_RULES = (
+    Rule('product_id_prefix', 'ProductID', 'startswith', 'P', VALIDATE),
+    Rule('customer_id_prefix', 'CustomerID', 'startswith', 'C', VALIDATE),
+)
+
+# Local variable holding each field inside the generated parser
+_FIELD_VARS = {
+    'TransactionID': 'tid', 'Date': 'date', 'ProductID': 'pid', 'ProductName': 'pname',
+    'Quantity': 'qty_val', 'UnitPrice': 'price_val', 'CustomerID': 'cid', 'Region': 'region',
+    'Amount': 'amount'
+}
+TESTS = {
+    'startswith': '{var}.startswith({value})',
+    'eq': '{var} == {value}',
+    'ne': '{var} != {value}',
+    'gt': '{var} > {value}',
+    'ge': '{var} >= {value}',
+    'lt': '{var} < {value}',
+    'le': '{var} <= {value}',
+    'in': '{var} in {value}',
+    'not_blank': '{var}.strip() != ""',
+}
+# A CustomerID/Region that already has a code passed not_blank before
+_CODED_NOT_BLANK = {'CustomerID': 'cid_code is None and ', 'Region': 'region_code is None and '}
+
+
+def filter_rules(region=None, min_amount=None, max_amount=None):
+    """
+    The region/amount filters of validate_and_filter as rules.
+    Returns: tuple of Rule (empty when no filter is set)
+    """
+    rules = []
+    if region:
+        rules.append(Rule('region', 'Region', 'eq', region, FILTER))
+    if min_amount is not None:
+        rules.append(Rule('min_amount', 'Amount', 'ge', min_amount, FILTER))
+    if max_amount is not None:
+        rules.append(Rule('max_amount', 'Amount', 'le', max_amount, FILTER))
+    return tuple(rules)
+
+
+class CompiledRules:
+    """
+    A rule set compiled into one generated function that parses a block of
+    lines, applies every rule in order, counts the first rule each rejected
+    row fails, and appends only the accepted rows to a TransactionTable.
+    Rejected rows are never decoded into numbers beyond the checks, never
+    dictionary-encoded and never stored.
+    """
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        names = [FIELD_COUNT, NUMERIC_FIELDS] + [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique")
+        self.names = names
+        self.stages = dict.fromkeys([FIELD_COUNT, NUMERIC_FIELDS], CLEAN)
+        self.stages.update((rule.name, rule.stage) for rule in self.rules)
+        self.source = self._generate()
+        namespace = {'TransactionTable': TransactionTable}
+        namespace.update((f'_value{i}', rule.value) for i, rule in enumerate(self.rules))
+        exec(compile(self.source, f'<rules {", ".join(self.names)}>', 'exec'), namespace)
+        self._parse = namespace['parse']
+
+    def _generate(self):
+        checks = []
+        for i, rule in enumerate(self.rules):
+            if rule.field not in _FIELD_VARS:
+                raise ValueError(f"Rule {rule.name}: unknown field {rule.field}")
+            if rule.test not in TESTS:
+                raise ValueError(f"Rule {rule.name}: unknown test {rule.test} (known: {', '.join(TESTS)})")
+            condition = TESTS[rule.test].format(var=_FIELD_VARS[rule.field], value=f'_value{i}')
+            if rule.test == 'not_blank' and rule.field in _CODED_NOT_BLANK:
+                checks.append(f"if {_CODED_NOT_BLANK[rule.field]}not ({condition}):")
+            else:
+                checks.append(f"if not ({condition}):")
+            checks.append(f"    rejected[{i + 2}] += 1")
+            checks.append("    continue")
+
+        # Rules on ProductName see the name with its commas removed, as clean_lines does
+        names_checked = any(rule.field == 'ProductName' for rule in self.rules)
+        strip_name = ["if ',' in pname:", "    pname = pname.replace(',', '')"]
+
+        lines = [
+            "def parse(lines, table, rejected):",
+            "    dates, product_ids, product_names = table.dates, table.product_ids, table.product_names",
+            "    customer_ids, regions = table.customer_ids, table.regions",
+            "    date_index, pid_index, name_index = dates._index, product_ids._index, product_names._index",
+            "    cid_index, region_index = customer_ids._index, regions._index",
+            "    add_date, add_pid, add_name = dates.codes.append, product_ids.codes.append, product_names.codes.append",
+            "    add_cid, add_region = customer_ids.codes.append, regions.codes.append",
+            "    add_tid = table.transaction_ids.append",
+            "    add_qty, add_price, add_revenue = table.quantity.append, table.unit_price.append, table.revenue.append",
+            "    total_parsed = 0",
+            "    for line in lines:",
+            "        line = line.strip()",
+            "        if not line:",
+            "            continue",
+            "        total_parsed += 1",
+            "        parts = line.split('|') # Requirement: Split by pipe delimiter",
+            "        if len(parts) != 8:",
+            "            rejected[0] += 1",
+            "            continue",
+            "        tid, date, pid, pname, qty, price, cid, region = parts",
+            "        try:",
+            "            # Requirement: Handle commas in Numbers",
+            "            qty_val = int(qty.replace(',', '') if ',' in qty else qty)",
+            "            price_val = float(price.replace(',', '') if ',' in price else price)",
+            "        except ValueError:",
+            "            rejected[1] += 1",
+            "            continue",
+            "        amount = qty_val * price_val",
+            "        cid_code = cid_index.get(cid)",
+            "        region_code = region_index.get(region)",
+        ]
+        body = (strip_name if names_checked else []) + checks + ([] if names_checked else strip_name) + [
+            "date_code = date_index.get(date)",
+            "if date_code is None:",
+            "    date_code = dates.encode(date)",
+            "pid_code = pid_index.get(pid)",
+            "if pid_code is None:",
+            "    pid_code = product_ids.encode(pid)",
+            "name_code = name_index.get(pname)",
+            "if name_code is None:",
+            "    name_code = product_names.encode(pname)",
+            "if cid_code is None:",
+            "    cid_code = customer_ids.encode(cid)",
+            "if region_code is None:",
+            "    region_code = regions.encode(region)",
+            "add_tid(tid)",
+            "add_date(date_code)",
+            "add_pid(pid_code)",
+            "add_name(name_code)",
+            "add_cid(cid_code)",
+            "add_region(region_code)",
+            "add_qty(qty_val)",
+            "add_price(price_val)",
+            "add_revenue(amount)",
+        ]
+        lines.extend("        " + line for line in body)
+        lines.append("    return total_parsed")
+        return "\n".join(lines) + "\n"
+
+    def parse(self, lines, table, counts):
+        """
+        Parses decoded lines into table, adding rejections to counts (rule name -> rows).
+        Returns: tuple (lines parsed, lines rejected)
+        """
+        rejected = [0] * len(self.names)
+        total_parsed = self._parse(lines, table, rejected)
+        for name, count in zip(self.names, rejected):
+            counts[name] = counts.get(name, 0) + count
+        return total_parsed, sum(rejected)
+
+    def summary(self, total_parsed, counts, final_count):
+        """
+        validate_and_filter-style summary of one fused pass, with the
+        rejections of every rule under 'rules'.
+        """
+        by_stage = {CLEAN: 0, VALIDATE: 0, FILTER: 0}
+        for name, count in counts.items():
+            by_stage[self.stages[name]] += count
+        return {
+            'total_parsed': total_parsed,
+            'cleaning_invalid': by_stage[CLEAN],
+            'total_input': total_parsed - by_stage[CLEAN], # Rows clean_data would have kept
+            'invalid': by_stage[VALIDATE],
+            'filtered_by_region': counts.get('region', 0),
+            'filtered_by_amount': counts.get('min_amount', 0) + counts.get('max_amount', 0),
+            'final_count': final_count,
+            'rules': dict(counts)
+        }
+
+
+def _frozen(rule):
+    """
+    Returns the rule with a list/set value made hashable (and an 'in'
+    value a frozenset, for constant-time membership tests).
+    """
+    value = rule.value
+    if rule.test == 'in' and isinstance(value, (list, tuple, set, frozenset)):
+        return rule._replace(value=frozenset(value))
+    if isinstance(value, list):
+        return rule._replace(value=tuple(value))
+    if isinstance(value, set):
+        return rule._replace(value=frozenset(value))
+    return rule
+
+
+def compile_rules(rules):
+    """
+    Compiles a sequence of Rule once; later calls with the same rules reuse it.
+    List and set values (e.g. Rule('region', 'Region', 'in', ['North', 'East']))
+    are frozen first, so they can be cached.
+    Returns: CompiledRules
+    """
+    return _compile_rules(tuple(_frozen(rule) for rule in rules))
+
+
+@lru_cache(maxsize=32)
+def _compile_rules(rules):
+    return CompiledRules(rules)
@@ -0,0 +1,280 @@
+from itertools import compress
+
+from utils.hyperloglog import HyperLogLog
+from utils.topk import TopK, top_k
+from utils.transaction_table import TransactionTable
+from utils.profiler import instrumented
+
+LARGEST_TRANSACTIONS = 10 # Largest single transactions every aggregate keeps
+
+
+class SalesAggregate:
+    """
+    Holds every region, product, customer and date rollup of a dataset.
+    Built in a single pass by aggregate_sales(); the analytics functions in
+    data_processor are thin views over it.
+
+    Aggregates hold unrounded partial state, so aggregates of separate
+    shards (chunks, files, workers) can be combined with merge().
+    With approximate=True the customer product sets and daily customer
+    sets are HyperLogLog sketches, keeping memory bounded per key (sparse,
+    so a customer with a few products costs a few entries, not 2**precision bytes).
+    `largest` keeps the LARGEST_TRANSACTIONS biggest transactions in a TopK
+    accumulator; each transaction lives in one shard, so the merged top-k
+    equals the top-k of the whole dataset.
+    """
+
+    def __init__(self, approximate=False, precision=10):
+        self.approximate = approximate
+        self.precision = precision
+        self.total_revenue = 0.0
+        self.total_quantity = 0
+        self.transaction_count = 0
+        self.min_amount = None
+        self.max_amount = None
+
+        # Dicts keep first-seen order, which the views rely on for ties
+        self.regions = {}    # Region -> {'total_sales', 'transaction_count'}
+        self.products = {}   # ProductName -> {'qty', 'rev'}
+        self.customers = {}  # CustomerID -> {'total_spent', 'purchase_count', 'products'}
+        self.daily = {}      # Date -> {'revenue', 'transaction_count', 'customers'}
+        self.largest = TopK(LARGEST_TRANSACTIONS) # (amount, (TransactionID, Date, CustomerID, Region))
+
+    def add(self, t):
+        """
+        Folds one transaction dict into every rollup.
+        """
+        qty = t['Quantity']
+        amount = qty * t['UnitPrice'] # Computed once per row
+        self.add_values(t['Region'], t['ProductName'], t['CustomerID'], t['Date'], qty, amount)
+        self.largest.add(amount, (t['TransactionID'], t['Date'], t['CustomerID'], t['Region']))
+
+    def add_values(self, region, product, customer, date, qty, amount):
+        """
+        Folds one already-decoded row into every rollup.
+        """
+        self.total_revenue += amount
+        self.total_quantity += qty
+        self.transaction_count += 1
+
+        if self.min_amount is None or amount < self.min_amount:
+            self.min_amount = amount
+        if self.max_amount is None or amount > self.max_amount:
+            self.max_amount = amount
+
+        reg = self.regions.get(region)
+        if reg is None:
+            reg = self.regions[region] = {'total_sales': 0.0, 'transaction_count': 0}
+        reg['total_sales'] += amount
+        reg['transaction_count'] += 1
+
+        prod = self.products.get(product)
+        if prod is None:
+            prod = self.products[product] = {'qty': 0, 'rev': 0.0}
+        prod['qty'] += qty
+        prod['rev'] += amount
+
+        cust = self.customers.get(customer)
+        if cust is None:
+            cust = self.customers[customer] = {'total_spent': 0.0, 'purchase_count': 0, 'products': self.new_set()}
+        cust['total_spent'] += amount
+        cust['purchase_count'] += 1
+        cust['products'].add(product)
+
+        day = self.daily.get(date)
+        if day is None:
+            day = self.daily[date] = {'revenue': 0.0, 'transaction_count': 0, 'customers': self.new_set()}
+        day['revenue'] += amount
+        day['transaction_count'] += 1
+        day['customers'].add(customer)
+
+    def new_set(self):
+        """
+        Returns an empty distinct-value container for this mode.
+        """
+        return HyperLogLog(self.precision) if self.approximate else set()
+
+    def merge(self, other):
+        """
+        Folds another partial aggregate into this one.
+        Keys new to this aggregate are appended, so merging shards in file
+        order keeps the same first-seen order as a single pass.
+        Returns: self
+        """
+        if (other.approximate, other.precision) != (self.approximate, self.precision):
+            raise ValueError("Cannot merge exact and approximate aggregates")
+
+        self.total_revenue += other.total_revenue
+        self.total_quantity += other.total_quantity
+        self.transaction_count += other.transaction_count
+
+        if other.min_amount is not None and (self.min_amount is None or other.min_amount < self.min_amount):
+            self.min_amount = other.min_amount
+        if other.max_amount is not None and (self.max_amount is None or other.max_amount > self.max_amount):
+            self.max_amount = other.max_amount
+
+        for stats, other_stats in ((self.regions, other.regions), (self.products, other.products),
+                                   (self.customers, other.customers), (self.daily, other.daily)):
+            for key, data in other_stats.items():
+                mine = stats.get(key)
+                if mine is None:
+                    mine = stats[key] = {field: (self.new_set() if isinstance(value, (set, HyperLogLog)) else 0)
+                                         for field, value in data.items()}
+                for field, value in data.items():
+                    if isinstance(value, (set, HyperLogLog)):
+                        mine[field].update(value) # Exact union, or register-wise max
+                    else:
+                        mine[field] += value
+        self.largest.update(other.largest) # Other's rows come later, as in a single pass
+        return self
+
+    def to_dict(self):
+        """
+        Returns: JSON-serializable dict of the full partial state
+        (sets become sorted lists, sketches become hex strings).
+        """
+        def encode(value):
+            if isinstance(value, set):
+                return sorted(value)
+            if isinstance(value, HyperLogLog):
+                return value.registers.hex()
+            return value
+
+        state = {
+            'approximate': self.approximate,
+            'precision': self.precision,
+            'total_revenue': self.total_revenue,
+            'total_quantity': self.total_quantity,
+            'transaction_count': self.transaction_count,
+            'min_amount': self.min_amount,
+            'max_amount': self.max_amount
+        }
+        for name in ('regions', 'products', 'customers', 'daily'):
+            state[name] = {key: {field: encode(value) for field, value in data.items()}
+                           for key, data in getattr(self, name).items()}
+        state['largest'] = [[amount, list(row)] for amount, row in self.largest.items()]
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuilds an aggregate saved with to_dict().
+        """
+        agg = cls(state['approximate'], state['precision'])
+        for field in ('total_revenue', 'total_quantity', 'transaction_count', 'min_amount', 'max_amount'):
+            setattr(agg, field, state[field])
+
+        def decode(value):
+            if agg.approximate:
+                sketch = HyperLogLog(agg.precision)
+                sketch.registers = bytearray.fromhex(value)
+                return sketch
+            return set(value)
+
+        for name, set_field in (('regions', None), ('products', None),
+                                ('customers', 'products'), ('daily', 'customers')):
+            stats = getattr(agg, name)
+            for key, data in state[name].items():
+                stats[key] = {field: (decode(value) if field == set_field else value)
+                              for field, value in data.items()}
+        agg.largest = TopK.from_items(LARGEST_TRANSACTIONS,
+                                      [(amount, tuple(row)) for amount, row in state['largest']])
+        return agg
+
+    @property
+    def date_range(self):
+        """
+        Returns: tuple (first_date, last_date) or None if empty
+        """
+        if not self.daily:
+            return None
+        return min(self.daily), max(self.daily)
+
+
+@instrumented
+def aggregate_sales(transactions, backend="python", approximate=False, precision=10):
+    """
+    Computes every analytics rollup in one pass over the transactions.
+    Accepts transaction dicts or a TransactionTable.
+    backend: "python" (default) or "numpy" for vectorized group-bys;
+    both produce identical results.
+    approximate: use HyperLogLog sketches (at most 2**precision bytes each) for
+    customer product sets and daily unique customers (python backend only).
+    Returns: SalesAggregate
+    """
+    if approximate and backend != "python":
+        raise ValueError("Approximate aggregation is only supported by the python backend")
+
+    if backend == "numpy":
+        from utils.numpy_backend import aggregate_table_numpy # Optional dependency
+        if not isinstance(transactions, TransactionTable):
+            transactions = TransactionTable.from_records(transactions)
+        return aggregate_table_numpy(transactions)
+    if backend != "python":
+        raise ValueError(f"Unknown analytics backend: {backend}")
+
+    if isinstance(transactions, TransactionTable):
+        return _aggregate_table(transactions, approximate, precision)
+
+    agg = SalesAggregate(approximate, precision)
+    for t in transactions:
+        agg.add(t)
+    return agg
+
+
+def _aggregate_table(table, approximate=False, precision=10):
+    """
+    Aggregates straight from the columns: no row dicts are built and the
+    stored revenue column is reused instead of recomputing Quantity * UnitPrice.
+    """
+    agg = SalesAggregate(approximate, precision)
+    regions = table.regions.values
+    products = table.product_names.values
+    customers = table.customer_ids.values
+    dates = table.dates.values
+
+    for r, p, c, d, qty, amount in zip(table.regions.codes, table.product_names.codes,
+                                      table.customer_ids.codes, table.dates.codes,
+                                      table.quantity, table.revenue):
+        agg.add_values(regions[r], products[p], customers[c], dates[d], qty, amount)
+    add_largest_rows(agg, table)
+    return agg
+
+
+def add_largest_rows(agg, table):
+    """
+    Feeds a table's LARGEST_TRANSACTIONS biggest rows into agg.largest
+    without a per-row heap operation: the k-th largest amount is found
+    first, then only rows at or above it are ranked (earlier rows first on ties).
+    """
+    amounts = table.revenue
+    k = agg.largest.k
+    if len(amounts) == 0 or k <= 0:
+        return
+    threshold = min(top_k(amounts, k, key=None))
+    candidates = compress(range(len(amounts)), map(threshold.__le__, amounts))
+    for i in top_k(candidates, k, key=amounts.__getitem__):
+        agg.largest.add(amounts[i], (table.transaction_ids[i], table.dates[i], table.customer_ids[i],
+                                     table.regions[i]))
+
+
+def merge_aggregates(aggregates):
+    """
+    Reduces partial aggregates (e.g. one per file or worker) into one.
+    The first aggregate is updated in place.
+    Returns: SalesAggregate (empty if no aggregates were given)
+    """
+    merged = None
+    for agg in aggregates:
+        merged = agg if merged is None else merged.merge(agg)
+    return merged if merged is not None else SalesAggregate()
+
+
+def as_aggregate(data):
+    """
+    Accepts either transactions or a ready SalesAggregate.
+    Lets the analytics functions share one pre-computed aggregate.
+    """
+    if isinstance(data, SalesAggregate):
+        return data
+    return aggregate_sales(data)
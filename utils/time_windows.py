@@ -0,0 +1,205 @@
+from collections import deque
+from datetime import date
+
+from utils.hyperloglog import HyperLogLog
+
+WEEKLY = 'week'
+MONTHLY = 'month'
+
+
+def daily_series(agg):
+    """
+    Converts a SalesAggregate's per-day rollup to ordinal day numbers once,
+    so every window below works on integers instead of date strings.
+    Dates that are not YYYY-MM-DD are left out.
+    Returns: list of (ordinal, day stats) in chronological order
+    """
+    series = []
+    for day, stats in agg.daily.items():
+        try:
+            series.append((date.fromisoformat(day).toordinal(), stats))
+        except ValueError:
+            continue
+    series.sort(key=lambda item: item[0])
+    return series
+
+
+def _union(a, b):
+    merged = HyperLogLog(a.precision)
+    merged.registers = bytearray(map(max, a.registers, b.registers))
+    return merged
+
+
+class _DistinctCounter:
+    """
+    Exact distinct count over a sliding window of sets: each value holds a
+    reference count, so a day leaving the window is subtracted, not re-scanned.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, values):
+        counts = self.counts
+        for v in values:
+            counts[v] = counts.get(v, 0) + 1
+
+    def remove(self, values):
+        counts = self.counts
+        for v in values:
+            if counts[v] == 1:
+                del counts[v]
+            else:
+                counts[v] -= 1
+
+    def __len__(self):
+        return len(self.counts)
+
+
+class _SketchWindow:
+    """
+    Sliding union of HyperLogLog sketches, which cannot be subtracted.
+    Two-stack queue: each stack keeps running unions, so every sketch is
+    merged a constant number of times however long the window is.
+    """
+
+    def __init__(self):
+        self.front = [] # (sketch, union of it and everything pushed before it)
+        self.back = []
+        self.back_union = None
+
+    def add(self, sketch):
+        self.back.append(sketch)
+        self.back_union = sketch if self.back_union is None else _union(self.back_union, sketch)
+
+    def remove(self, sketch):
+        if not self.front:
+            union = None
+            while self.back:
+                s = self.back.pop()
+                union = s if union is None else _union(union, s)
+                self.front.append((s, union))
+            self.back_union = None
+        self.front.pop()
+
+    def __len__(self):
+        if self.front and self.back_union is not None:
+            return len(_union(self.front[-1][1], self.back_union))
+        if self.front:
+            return len(self.front[-1][1])
+        return len(self.back_union) if self.back_union is not None else 0
+
+
+class SlidingWindow:
+    """
+    Revenue, transaction and distinct-customer totals over the last `days`
+    calendar days. Days are pushed in order and expire as the window moves,
+    so a full series costs one pass regardless of the window length.
+    """
+
+    def __init__(self, days, approximate=False):
+        self.days = days
+        self.revenue = 0.0
+        self.transaction_count = 0
+        self._days = deque()
+        self._customers = _SketchWindow() if approximate else _DistinctCounter()
+
+    def push(self, ordinal, stats):
+        self._days.append((ordinal, stats))
+        self.revenue += stats['revenue']
+        self.transaction_count += stats['transaction_count']
+        self._customers.add(stats['customers'])
+
+        while self._days[0][0] <= ordinal - self.days:
+            _, old = self._days.popleft()
+            self.revenue -= old['revenue']
+            self.transaction_count -= old['transaction_count']
+            self._customers.remove(old['customers'])
+        if len(self._days) == 1:
+            self.revenue = stats['revenue'] # Drop rounding drift whenever the window restarts
+
+    @property
+    def unique_customers(self):
+        return len(self._customers)
+
+
+def rolling_metrics(series, windows=(7, 30), approximate=False):
+    """
+    Rolling totals for every day in the series, over calendar-day windows
+    that end on (and include) that day.
+    Returns: dict date string -> {'revenue_7d', 'transactions_7d', 'unique_customers_7d', ...}
+    """
+    trackers = [(days, SlidingWindow(days, approximate)) for days in windows]
+    result = {}
+    for ordinal, stats in series:
+        row = {}
+        for days, window in trackers:
+            window.push(ordinal, stats)
+            row[f'revenue_{days}d'] = round(window.revenue, 2)
+            row[f'transactions_{days}d'] = window.transaction_count
+            row[f'unique_customers_{days}d'] = window.unique_customers
+        result[date.fromordinal(ordinal).isoformat()] = row
+    return result
+
+
+def day_over_day(series):
+    """
+    Revenue change against the previous calendar day (0 if it had no sales).
+    Returns: dict date string -> {'revenue', 'previous_revenue', 'change', 'change_pct'}
+    """
+    result = {}
+    previous_ordinal, previous_revenue = None, 0.0
+    for ordinal, stats in series:
+        revenue = stats['revenue']
+        before = previous_revenue if previous_ordinal == ordinal - 1 else 0.0
+        result[date.fromordinal(ordinal).isoformat()] = {
+            'revenue': round(revenue, 2),
+            'previous_revenue': round(before, 2),
+            'change': round(revenue - before, 2),
+            'change_pct': round((revenue - before) / before * 100, 2) if before else None
+        }
+        previous_ordinal, previous_revenue = ordinal, revenue
+    return result
+
+
+def _period_key(ordinal, period):
+    if period == WEEKLY:
+        monday = ordinal - (ordinal - 1) % 7 # Ordinal 1 (0001-01-01) is a Monday
+        year, week, _ = date.fromordinal(monday).isocalendar()
+        return monday, f"{year}-W{week:02d}"
+    day = date.fromordinal(ordinal)
+    return day.year * 12 + day.month, f"{day.year}-{day.month:02d}"
+
+
+def period_rollup(series, period=MONTHLY, approximate=False, precision=10):
+    """
+    Weekly (ISO weeks, e.g. 2024-W01) or monthly (2024-01) totals.
+    Consecutive days of one period are merged as the series is walked.
+    Returns: dict period label -> {'revenue', 'transaction_count', 'unique_customers'}, chronological
+    """
+    if period not in (WEEKLY, MONTHLY):
+        raise ValueError(f"period must be '{WEEKLY}' or '{MONTHLY}'")
+
+    result = {}
+    current_key = label = None
+    revenue = count = 0
+    customers = None
+
+    def flush():
+        result[label] = {'revenue': round(revenue, 2), 'transaction_count': count,
+                         'unique_customers': len(customers)}
+
+    for ordinal, stats in series:
+        key, new_label = _period_key(ordinal, period)
+        if key != current_key:
+            if current_key is not None:
+                flush()
+            current_key, label = key, new_label
+            revenue, count = 0.0, 0
+            customers = HyperLogLog(precision) if approximate else set()
+        revenue += stats['revenue']
+        count += stats['transaction_count']
+        customers.update(stats['customers'])
+    if current_key is not None:
+        flush()
+    return result
@@ -0,0 +1,73 @@
+import heapq
+from itertools import count
+
+
+def top_k(items, k, key):
+    """
+    Returns: the k items with the largest key, same as sorted(items, key=key, reverse=True)[:k]
+    Only k items are held at a time, so this is O(n log k) instead of a full sort.
+    """
+    return heapq.nlargest(k, items, key=key)
+
+
+def bottom_k(items, k, key):
+    """
+    Returns: the k items with the smallest key, same as sorted(items, key=key)[:k]
+    """
+    return heapq.nsmallest(k, items, key=key)
+
+
+class TopK:
+    """
+    Streaming top-k (or bottom-k with largest=False) over (score, item) pairs,
+    holding at most k items in a heap. Equal scores keep arrival order, as a
+    stable sort would. Accumulators over disjoint chunks merge via update();
+    merging them in chunk order gives the same result as one pass.
+    """
+
+    def __init__(self, k, largest=True):
+        self.k = k
+        self.largest = largest
+        self._heap = [] # The root is the entry that drops out next
+        self._seq = count()
+
+    def add(self, score, item):
+        if self.k <= 0:
+            return
+        # Later arrivals rank below earlier ones with the same score
+        entry = (score if self.largest else -score, -next(self._seq), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def update(self, other):
+        """
+        Merges another accumulator (same direction) into this one.
+        """
+        if other.largest != self.largest:
+            raise ValueError("Cannot merge a top-k with a bottom-k accumulator")
+        for key, _, item in sorted(other._heap, key=lambda e: -e[1]): # Other's arrival order
+            self.add(key if self.largest else -key, item)
+
+    def items(self):
+        """
+        Returns: list of (score, item), best first
+        """
+        ranked = sorted(self._heap, reverse=True)
+        if self.largest:
+            return [(key, item) for key, _, item in ranked]
+        return [(-key, item) for key, _, item in ranked]
+
+    def __len__(self):
+        return len(self._heap)
+
+    @classmethod
+    def from_items(cls, k, items, largest=True):
+        """
+        Rebuilds an accumulator from items() output (ties keep their order).
+        """
+        accumulator = cls(k, largest)
+        for score, item in items:
+            accumulator.add(score, item)
+        return accumulator
@@ -0,0 +1,117 @@
+from bisect import bisect_left, bisect_right
+
+from utils.transaction_table import TransactionTable
+
+
+class TransactionIndex:
+    """
+    Query index over cleaned transactions (clean_data output or a
+    TransactionTable), built once and reused for many filter calls.
+    Valid rows are hashed by Region, ProductID, CustomerID and Date, and the
+    rows of each region are kept sorted by amount, so a region + amount range
+    query costs two bisects plus the size of the answer.
+    The index does not follow later changes to the transactions.
+    """
+
+    INDEXED_FIELDS = ('Region', 'ProductID', 'CustomerID', 'Date')
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.total_input = len(transactions)
+        if isinstance(transactions, TransactionTable):
+            amounts, regions, valid, groups = self._scan_table(transactions)
+        else:
+            amounts, regions, valid, groups = self._scan_records(transactions)
+
+        # Same header values validate_and_filter prints (all rows, valid or not)
+        self.all_regions = sorted(regions)
+        self.min_amount = min(amounts) if amounts else None
+        self.max_amount = max(amounts) if amounts else None
+
+        self.valid_count = len(valid)
+        self._groups = groups # field -> {value: ascending row positions}
+
+        # Region (None = every region) -> (sorted amounts, row positions in that order)
+        self._by_amount = {}
+        for region, positions in [(None, valid)] + list(groups['Region'].items()):
+            order = sorted(positions, key=amounts.__getitem__)
+            self._by_amount[region] = ([amounts[i] for i in order], order)
+
+    def _scan_records(self, transactions):
+        amounts = []
+        regions = set()
+        valid = []
+        groups = {field: {} for field in self.INDEXED_FIELDS}
+        for i, t in enumerate(transactions):
+            amounts.append(t['Quantity'] * t['UnitPrice'])
+            regions.add(t['Region'])
+
+            # Strict validation prefixes required by Task 1.3
+            if not (t.get('TransactionID', '').startswith('T') and
+                    t.get('ProductID', '').startswith('P') and
+                    t.get('CustomerID', '').startswith('C')):
+                continue
+            valid.append(i)
+            for field, index in groups.items():
+                index.setdefault(t[field], []).append(i)
+        return amounts, regions, valid, groups
+
+    def _scan_table(self, table):
+        # Prefix checks on the dictionaries run once per distinct value, not per row
+        product_ok = [v.startswith('P') for v in table.product_ids.values]
+        customer_ok = [v.startswith('C') for v in table.customer_ids.values]
+        product_codes = table.product_ids.codes
+        customer_codes = table.customer_ids.codes
+        valid = [i for i, tid in enumerate(table.transaction_ids)
+                 if tid.startswith('T') and product_ok[product_codes[i]] and customer_ok[customer_codes[i]]]
+
+        groups = {}
+        for field in self.INDEXED_FIELDS:
+            column = table.column(field)
+            codes = column.codes
+            positions = [[] for _ in column.values]
+            for i in valid:
+                positions[codes[i]].append(i)
+            groups[field] = {value: rows for value, rows in zip(column.values, positions) if rows}
+
+        # Every region code is used by at least one row
+        return table.revenue, table.regions.values, valid, groups
+
+    def _rows(self, positions):
+        transactions = self.transactions
+        return [transactions[i] for i in positions]
+
+    def lookup(self, field, value):
+        """
+        Returns: list of valid transactions whose field (one of INDEXED_FIELDS) equals value
+        """
+        if field not in self._groups:
+            raise ValueError(f"{field} is not indexed (indexed: {', '.join(self.INDEXED_FIELDS)})")
+        return self._rows(self._groups[field].get(value, ()))
+
+    def count(self, field, value):
+        """
+        Returns: number of valid transactions whose field equals value
+        """
+        return len(self._groups[field].get(value, ()))
+
+    def query(self, region=None, min_amount=None, max_amount=None):
+        """
+        Same answer as validate_and_filter over the indexed transactions,
+        without scanning them or printing anything.
+        Returns: tuple (transactions in input order, invalid_count, summary)
+        """
+        amounts, positions = self._by_amount.get(region or None, ((), ()))
+        lo = 0 if min_amount is None else bisect_left(amounts, min_amount)
+        hi = len(amounts) if max_amount is None else bisect_right(amounts, max_amount)
+        matched = sorted(positions[lo:hi]) # Back to input order
+
+        invalid_count = self.total_input - self.valid_count
+        summary = {
+            'total_input': self.total_input,
+            'invalid': invalid_count,
+            'filtered_by_region': self.valid_count - len(positions) if region else 0,
+            'filtered_by_amount': len(positions) - len(matched),
+            'final_count': len(matched)
+        }
+        return self._rows(matched), invalid_count, summary
@@ -0,0 +1,168 @@
+from array import array
+
+
+class DictionaryColumn:
+    """
+    Dictionary-encoded string column: each row stores a small integer code,
+    each distinct string is stored once in `values`.
+    """
+
+    def __init__(self):
+        self.codes = array('I')
+        self.values = []
+        self._index = {}
+
+    @classmethod
+    def from_values(cls, values, codes):
+        """
+        Rebuilds a column from its distinct values and an array('I') of codes.
+        """
+        column = cls()
+        column.values = list(values)
+        column._index = {value: code for code, value in enumerate(column.values)}
+        column.codes = codes
+        return column
+
+    def encode(self, value):
+        """
+        Returns the code for value, assigning a new one on first sight.
+        """
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def extend(self, other):
+        """
+        Appends another column's rows, re-encoding its codes into this one.
+        """
+        remap = [self.encode(value) for value in other.values]
+        self.codes.extend(array('I', [remap[code] for code in other.codes]))
+
+    def code_of(self, value):
+        """
+        Returns the code for value, or None if it never occurs.
+        """
+        return self._index.get(value)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class TransactionTable:
+    """
+    Compact columnar store for cleaned transactions.
+    Numbers live in typed arrays, repeated strings are dictionary-encoded and
+    revenue (Quantity * UnitPrice) is computed once on insert.
+    Indexing and iteration still yield the familiar transaction dicts.
+    """
+
+    # Transaction field -> DictionaryColumn attribute
+    CODED_FIELDS = {
+        'Date': 'dates',
+        'ProductID': 'product_ids',
+        'ProductName': 'product_names',
+        'CustomerID': 'customer_ids',
+        'Region': 'regions',
+    }
+
+    def __init__(self):
+        self.transaction_ids = []
+        self.dates = DictionaryColumn()
+        self.product_ids = DictionaryColumn()
+        self.product_names = DictionaryColumn()
+        self.customer_ids = DictionaryColumn()
+        self.regions = DictionaryColumn()
+        self.quantity = array('q')
+        self.unit_price = array('d')
+        self.revenue = array('d')
+
+        # Optional API enrichment, one entry per ProductID code (see with_product_info)
+        self.product_info = None
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds a table from transaction dicts (e.g. clean_data output).
+        """
+        table = cls()
+        for t in records:
+            table.append_record(t)
+        return table
+
+    def append(self, tid, date, pid, pname, qty, price, cid, region):
+        self.transaction_ids.append(tid)
+        self.dates.append(date)
+        self.product_ids.append(pid)
+        self.product_names.append(pname)
+        self.customer_ids.append(cid)
+        self.regions.append(region)
+        self.quantity.append(qty)
+        self.unit_price.append(price)
+        self.revenue.append(qty * price)
+
+    def append_record(self, t):
+        self.append(t['TransactionID'], t['Date'], t['ProductID'], t['ProductName'],
+                    t['Quantity'], t['UnitPrice'], t['CustomerID'], t['Region'])
+
+    def extend(self, other):
+        """
+        Appends all rows of another TransactionTable (e.g. a parsed chunk).
+        """
+        self.transaction_ids.extend(other.transaction_ids)
+        for attr in self.CODED_FIELDS.values():
+            getattr(self, attr).extend(getattr(other, attr))
+        self.quantity.extend(other.quantity)
+        self.unit_price.extend(other.unit_price)
+        self.revenue.extend(other.revenue)
+
+    def column(self, field):
+        """
+        Returns the DictionaryColumn backing a string field.
+        """
+        return getattr(self, self.CODED_FIELDS[field])
+
+    def with_product_info(self, product_info):
+        """
+        Returns a table sharing these columns plus per-product API info.
+        product_info: list indexed by ProductID code, each a dict with
+        'API_Category', 'API_Brand', 'API_Rating' and 'API_Match'.
+        """
+        enriched = TransactionTable.__new__(TransactionTable)
+        enriched.__dict__.update(self.__dict__)
+        enriched.product_info = product_info
+        return enriched
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+    def __getitem__(self, i):
+        """
+        Returns row i as a transaction dict (backward-compatible access).
+        """
+        if i < 0:
+            i += len(self)
+        row = {
+            'TransactionID': self.transaction_ids[i],
+            'Date': self.dates[i],
+            'ProductID': self.product_ids[i],
+            'ProductName': self.product_names[i],
+            'Quantity': self.quantity[i],
+            'UnitPrice': self.unit_price[i],
+            'CustomerID': self.customer_ids[i],
+            'Region': self.regions[i]
+        }
+        if self.product_info is not None:
+            row.update(self.product_info[self.product_ids.codes[i]])
+        return row
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]